@@ -1,15 +1,24 @@
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any
 from app.logging_utils import JsonSqlLogger
+from app import timing
+from app.row_store import row_store
 from utils import csv_utils
 
 
 def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
     run_id = state.get("run_id", "")
-    rows: List[Dict[str, Any]] = state.get("data") or []
     try:
-        csv_path = csv_utils.write_csv_rows(rows)
+        rows = row_store.get(state.get("rows_handle") or "")
+        with timing.measure("render"):
+            csv_path = csv_utils.write_csv_rows(rows.iter_rows(), fieldnames=rows.columns)
         logger.info(run_id, "csv", "csv_created", {"path": csv_path})
         return {"status": "success", "data": {"csv_path": csv_path}, "log": {"event": "csv_created"}}
     except Exception as e:
         logger.exception(run_id, "csv", "csv_error", {"error": str(e)})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def arun(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async run(): CSV writing is blocking file I/O, so it runs in a worker thread."""
+    return await asyncio.to_thread(run, state, settings, logger)
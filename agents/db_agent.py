@@ -1,6 +1,118 @@
+import asyncio
 from typing import Dict, Any, List
 from app.logging_utils import JsonSqlLogger
-from mcp_client import call_mcp_tool_sync
+from app.row_store import RowSet, row_store
+from mcp_client import call_mcp_tool, call_mcp_tool_sync
+from utils import db_utils
+
+
+def _connection_args(settings) -> Dict[str, Any]:
+    """MCP db tool connection parameters from a settings-like object."""
+    args: Dict[str, Any] = {}
+    if getattr(settings, "DATA_DB_TYPE", ""):
+        args["db_type"] = settings.DATA_DB_TYPE
+    if getattr(settings, "DATA_DSN", ""):
+        args["dsn"] = settings.DATA_DSN
+    if getattr(settings, "DATA_HOST", ""):
+        args["host"] = settings.DATA_HOST
+    if getattr(settings, "DATA_PORT", ""):
+        args["port"] = int(settings.DATA_PORT) if settings.DATA_PORT else None
+    if getattr(settings, "DATA_NAME", ""):
+        args["name"] = settings.DATA_NAME
+    if getattr(settings, "DATA_USER", ""):
+        args["user"] = settings.DATA_USER
+    if getattr(settings, "DATA_PASSWORD", ""):
+        args["password"] = settings.DATA_PASSWORD
+    if getattr(settings, "DATA_SSLMODE", ""):
+        args["sslmode"] = settings.DATA_SSLMODE
+    return args
+
+
+def _rows_from_result(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if result.get("status") != "success":
+        raise Exception(result.get("error", "Unknown error from MCP"))
+    if result.get("format") == "columnar":
+        return db_utils.columnar_to_rows(result)
+    return result.get("rows", [])
+
+
+def _row_limit(settings) -> int:
+    return int(settings.DB_AGENT_ROW_LIMIT)
+
+
+def _page_size(settings) -> int:
+    return int(settings.ROW_STORE_CHUNK_ROWS)
+
+
+def _query_args(settings, query: str) -> Dict[str, Any]:
+    """db.query_supabase arguments for an agent query."""
+    args = {
+        "query": query,
+        "limit": _row_limit(settings),
+        # Column names once instead of per row: smaller payload, cheaper parse
+        "format": "columnar",
+        **_connection_args(settings),
+    }
+    if _row_limit(settings) > _page_size(settings):
+        # More than a page: stream through a server-side cursor into the row store
+        args.update(cursor=True, page_size=_page_size(settings))
+    return args
+
+
+def _append_page(rows: RowSet, result: Dict[str, Any], limit: int) -> None:
+    if result.get("status") != "success":
+        raise Exception(result.get("error", "Unknown error from MCP"))
+    room = limit - rows.count
+    if result.get("format") == "columnar":
+        rows.append_columnar(result.get("columns") or [], (result.get("data") or [])[:room])
+    else:
+        rows.append_rows((result.get("rows") or [])[:room])
+
+
+def _more_pages(rows: RowSet, result: Dict[str, Any], limit: int) -> bool:
+    return bool(result.get("cursor_id")) and bool(result.get("has_more")) and rows.count < limit
+
+
+def _fetch_into(rows: RowSet, settings, query: str) -> None:
+    """Run a query into a row set, page by page when it is cursor-backed."""
+    limit = _row_limit(settings)
+    result = call_mcp_tool_sync("db", "db.query_supabase", _query_args(settings, query))
+    _append_page(rows, result, limit)
+    while _more_pages(rows, result, limit):
+        result = call_mcp_tool_sync("db", "db.fetch_page", {"cursor_id": result["cursor_id"]})
+        _append_page(rows, result, limit)
+    if result.get("cursor_id") and result.get("has_more"):
+        call_mcp_tool_sync("db", "db.close_cursor", {"cursor_id": result["cursor_id"]})
+
+
+async def _afetch_into(rows: RowSet, settings, query: str) -> None:
+    limit = _row_limit(settings)
+    result = await call_mcp_tool("db", "db.query_supabase", _query_args(settings, query))
+    _append_page(rows, result, limit)
+    while _more_pages(rows, result, limit):
+        result = await call_mcp_tool("db", "db.fetch_page", {"cursor_id": result["cursor_id"]})
+        _append_page(rows, result, limit)
+    if result.get("cursor_id") and result.get("has_more"):
+        await call_mcp_tool("db", "db.close_cursor", {"cursor_id": result["cursor_id"]})
+
+
+def _forget_stale_schema(settings, error: Exception) -> None:
+    # The NLP prompt is built from the cached schema; reload it after a missing table/column
+    if db_utils.is_schema_error(error):
+        db_utils.schema_catalog.invalidate(settings)
+
+
+def _rows_result(rows: RowSet, query_used: str) -> Dict[str, Any]:
+    # State carries the handle; csv/report read the rows through the row store
+    return {
+        "status": "success",
+        "data": {"rows_handle": rows.handle, "row_count": rows.count, "columns": rows.columns, "query_used": query_used},
+        "log": {"rows": rows.count, "spilled": rows.spilled},
+    }
+
+
+def _is_mongodb(settings) -> bool:
+    return str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower() == "mongodb"
 
 
 def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
@@ -9,47 +121,26 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
     # Try NLP query first if present; on failure, fall back to SELECT * FROM DATA_TABLE
     tried_queries: List[str] = []
     
-    def _exec_via_mcp(q: str) -> List[Dict[str, Any]]:
-        """Execute query via MCP db.query_supabase tool"""
-        # Build MCP tool arguments with connection parameters
-        mcp_args = {
-            "query": q,
-            "limit": 500,
-        }
-        
-        # Pass connection parameters if available
-        if getattr(settings, "DATA_DB_TYPE", ""):
-            mcp_args["db_type"] = settings.DATA_DB_TYPE
-        if getattr(settings, "DATA_DSN", ""):
-            mcp_args["dsn"] = settings.DATA_DSN
-        if getattr(settings, "DATA_HOST", ""):
-            mcp_args["host"] = settings.DATA_HOST
-        if getattr(settings, "DATA_PORT", ""):
-            mcp_args["port"] = int(settings.DATA_PORT) if settings.DATA_PORT else None
-        if getattr(settings, "DATA_NAME", ""):
-            mcp_args["name"] = settings.DATA_NAME
-        if getattr(settings, "DATA_USER", ""):
-            mcp_args["user"] = settings.DATA_USER
-        if getattr(settings, "DATA_PASSWORD", ""):
-            mcp_args["password"] = settings.DATA_PASSWORD
-        if getattr(settings, "DATA_SSLMODE", ""):
-            mcp_args["sslmode"] = settings.DATA_SSLMODE
-        
-        result = call_mcp_tool_sync("db", "db.query_supabase", mcp_args)
-        
-        if result.get("status") == "success":
-            return result.get("rows", [])
-        else:
-            raise Exception(result.get("error", "Unknown error from MCP"))
+    def _exec_via_mcp(q: str) -> RowSet:
+        """Execute query via MCP db.query_supabase tool into a row set"""
+        rows = row_store.create(run_id)
+        try:
+            _fetch_into(rows, settings, q)
+        except Exception as e:
+            row_store.discard(rows.handle)
+            _forget_stale_schema(settings, e)
+            raise
+        return rows
     
     try:
         # MongoDB path: sample documents (basic support - fallback to direct call)
-        if str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower() == "mongodb":
+        if _is_mongodb(settings):
             try:
                 from utils import mongo_utils
-                rows = mongo_utils.sample_rows(settings, limit=500)
-                logger.info(run_id, "db", "mongo_sampled", {"rows": len(rows)})
-                return {"status": "success", "data": {"rows": rows, "query_used": "mongodb_sample"}, "log": {"rows": len(rows)}}
+                rows = row_store.create(run_id)
+                rows.append_rows(mongo_utils.sample_rows(settings, limit=_row_limit(settings)))
+                logger.info(run_id, "db", "mongo_sampled", {"rows": rows.count})
+                return _rows_result(rows, "mongodb_sample")
             except Exception as e:
                 logger.exception(run_id, "db", "mongo_error", {"error": str(e)})
                 return {"status": "error", "data": {}, "log": {"error": str(e)}}
@@ -59,8 +150,8 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
             tried_queries.append(nlp_query)
             try:
                 rows = _exec_via_mcp(nlp_query)
-                logger.info(run_id, "db", "db_query_executed_mcp", {"rows": len(rows), "via": "mcp"})
-                return {"status": "success", "data": {"rows": rows, "query_used": nlp_query}, "log": {"rows": len(rows)}}
+                logger.info(run_id, "db", "db_query_executed_mcp", {"rows": rows.count, "via": "mcp"})
+                return _rows_result(rows, nlp_query)
             except Exception as e:
                 logger.error(run_id, "db", "db_nlp_query_failed", {"error": str(e), "query": nlp_query})
         
@@ -71,8 +162,51 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
         fallback = f"SELECT * FROM {table}"
         tried_queries.append(fallback)
         rows = _exec_via_mcp(fallback)
-        logger.info(run_id, "db", "db_query_executed_fallback_mcp", {"rows": len(rows), "via": "mcp"})
-        return {"status": "success", "data": {"rows": rows, "query_used": fallback}, "log": {"rows": len(rows)}}
+        logger.info(run_id, "db", "db_query_executed_fallback_mcp", {"rows": rows.count, "via": "mcp"})
+        return _rows_result(rows, fallback)
     except Exception as e:
         logger.exception(run_id, "db", "db_error", {"error": str(e), "tried": tried_queries})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def arun(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async run(): awaits the MCP calls instead of blocking a thread on them."""
+    if _is_mongodb(settings):
+        # The MongoDB sample is a direct blocking driver call
+        return await asyncio.to_thread(run, state, settings, logger)
+    run_id = state.get("run_id", "")
+    nlp_query = state.get("query") or ""
+    tried_queries: List[str] = []
+
+    async def _exec_via_mcp(q: str) -> RowSet:
+        rows = row_store.create(run_id)
+        try:
+            await _afetch_into(rows, settings, q)
+        except Exception as e:
+            row_store.discard(rows.handle)
+            _forget_stale_schema(settings, e)
+            raise
+        return rows
+
+    try:
+        if nlp_query:
+            tried_queries.append(nlp_query)
+            try:
+                rows = await _exec_via_mcp(nlp_query)
+                await logger.ainfo(run_id, "db", "db_query_executed_mcp", {"rows": rows.count, "via": "mcp"})
+                return _rows_result(rows, nlp_query)
+            except Exception as e:
+                await logger.aerror(run_id, "db", "db_nlp_query_failed", {"error": str(e), "query": nlp_query})
+
+        table = getattr(settings, "DATA_TABLE", "")
+        if not table:
+            return {"status": "error", "data": {}, "log": {"error": "No DATA_TABLE configured and NLP query failed/absent"}}
+
+        fallback = f"SELECT * FROM {table}"
+        tried_queries.append(fallback)
+        rows = await _exec_via_mcp(fallback)
+        await logger.ainfo(run_id, "db", "db_query_executed_fallback_mcp", {"rows": rows.count, "via": "mcp"})
+        return _rows_result(rows, fallback)
+    except Exception as e:
+        await logger.aexception(run_id, "db", "db_error", {"error": str(e), "tried": tried_queries})
+        return {"status": "error", "data": {}, "log": {"error": str(e)}}
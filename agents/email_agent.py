@@ -1,11 +1,11 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import os
 from app.logging_utils import JsonSqlLogger
-from mcp_client import call_mcp_tool_sync
+from mcp_client import call_mcp_tool, call_mcp_tool_sync
 
 
-def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
-    run_id = state.get("run_id", "")
+def _email_request(state: Dict[str, Any], settings) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """(skip log data, None) when the email should be skipped, else (None, email.send_report args)."""
     artifacts = state.get("artifacts") or {}
     csv_path = artifacts.get("csv_path")
     pdf_path = artifacts.get("pdf_path")
@@ -17,32 +17,38 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
     
     # If config is missing, gracefully skip email instead of failing the whole run
     if not api_key or not to_emails or not from_email:
-        logger.info(run_id, "email", "skipped", {"reason": "missing_email_config", "has_api_key": bool(api_key), "to_count": len(to_emails), "from": bool(from_email)})
-        return {"status": "skipped", "data": {}, "log": {"reason": "missing_email_config"}}
+        return {"reason": "missing_email_config", "has_api_key": bool(api_key), "to_count": len(to_emails), "from": bool(from_email)}, None
     
     # Require artifacts to exist only if we are actually sending
     if not (csv_path and os.path.exists(csv_path)):
-        logger.info(run_id, "email", "skipped", {"reason": "missing_csv", "csv_path": csv_path})
-        return {"status": "skipped", "data": {}, "log": {"reason": "missing_csv"}}
+        return {"reason": "missing_csv", "csv_path": csv_path}, None
     if not (pdf_path and os.path.exists(pdf_path)):
-        logger.info(run_id, "email", "skipped", {"reason": "missing_pdf", "pdf_path": pdf_path})
-        return {"status": "skipped", "data": {}, "log": {"reason": "missing_pdf"}}
+        return {"reason": "missing_pdf", "pdf_path": pdf_path}, None
     
     attachments = [
         {"file_path": csv_path, "mime_type": "text/csv", "file_name": os.path.basename(csv_path)},
         {"file_path": pdf_path, "mime_type": "application/pdf", "file_name": os.path.basename(pdf_path)},
     ]
+    return None, {
+        "subject": "Multi-Agent Data Assistant Report",
+        "body_text": f"Report for: {state.get('user_input','')}",
+        "to_emails": to_emails,
+        "from_email": from_email,
+        "attachments": attachments,
+        "api_key": api_key,
+    }
+
+
+def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    run_id = state.get("run_id", "")
+    skip, args = _email_request(state, settings)
+    if skip:
+        logger.info(run_id, "email", "skipped", skip)
+        return {"status": "skipped", "data": {}, "log": {"reason": skip["reason"]}}
     
     # Use MCP email.send_report tool
     try:
-        res = call_mcp_tool_sync("email", "email.send_report", {
-            "subject": "Multi-Agent Data Assistant Report",
-            "body_text": f"Report for: {state.get('user_input','')}",
-            "to_emails": to_emails,
-            "from_email": from_email,
-            "attachments": attachments,
-            "api_key": api_key,
-        })
+        res = call_mcp_tool_sync("email", "email.send_report", args)
         
         status = res.get("status", "error")
         logger.info(run_id, "email", "email_done_mcp", {"status": status, "via": "mcp"})
@@ -50,3 +56,20 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
     except Exception as e:
         logger.exception(run_id, "email", "email_error_mcp", {"error": str(e)})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def arun(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async run(): awaits the MCP email call."""
+    run_id = state.get("run_id", "")
+    skip, args = _email_request(state, settings)
+    if skip:
+        await logger.ainfo(run_id, "email", "skipped", skip)
+        return {"status": "skipped", "data": {}, "log": {"reason": skip["reason"]}}
+    try:
+        res = await call_mcp_tool("email", "email.send_report", args)
+        status = res.get("status", "error")
+        await logger.ainfo(run_id, "email", "email_done_mcp", {"status": status, "via": "mcp"})
+        return {"status": status, "data": {"email_result": res}, "log": {"status": status}}
+    except Exception as e:
+        await logger.aexception(run_id, "email", "email_error_mcp", {"error": str(e)})
+        return {"status": "error", "data": {}, "log": {"error": str(e)}}
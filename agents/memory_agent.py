@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, Any, List
 from app.logging_utils import JsonSqlLogger
 
@@ -35,3 +36,13 @@ def save(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, An
     except Exception as e:
         logger.exception(run_id, "memory", "save_error", {"error": str(e)})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def aload(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async load(): the memory store is a blocking database client."""
+    return await asyncio.to_thread(load, state, settings, logger)
+
+
+async def asave(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async save(): the memory store is a blocking database client."""
+    return await asyncio.to_thread(save, state, settings, logger)
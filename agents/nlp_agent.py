@@ -1,7 +1,46 @@
+import asyncio
+import threading
 from typing import Dict, Any, List
 import re
 from app.logging_utils import JsonSqlLogger
 from app.config import settings as _settings
+from app import timing
+
+
+# OpenAI clients are created once per API key and reused by every run. An
+# AsyncOpenAI connection pool belongs to the event loop it was first used on,
+# so async clients are also keyed by loop (asyncio.run() makes a new one)
+_clients: Dict[str, Any] = {}
+_async_clients: Dict[Any, Dict[str, Any]] = {}
+_clients_lock = threading.Lock()
+
+
+def _client(api_key: str):
+    with _clients_lock:
+        if api_key not in _clients:
+            from openai import OpenAI
+            _clients[api_key] = OpenAI(api_key=api_key)
+        return _clients[api_key]
+
+
+def _async_client(api_key: str):
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        for closed in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[closed]
+        clients = _async_clients.setdefault(loop, {})
+        if api_key not in clients:
+            from openai import AsyncOpenAI
+            clients[api_key] = AsyncOpenAI(api_key=api_key)
+        return clients[api_key]
+
+
+async def aclose_clients() -> None:
+    """Close the running loop's AsyncOpenAI clients; call before the loop shuts down."""
+    with _clients_lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
 
 
 def _extract_sql(text: str) -> str:
@@ -43,6 +82,32 @@ def _heuristic_groupby_query(table: str, columns: List[Dict[str, Any]], user_inp
     return f"SELECT * FROM {table} LIMIT 50"
 
 
+def _prompt(table: str, schema_cols: List[Dict[str, Any]], memory_msgs: List[Dict[str, Any]], user_input: str) -> str:
+    cols_str = ", ".join([f"{c.get('name')} ({c.get('type')})" for c in schema_cols]) or ""
+    mem_str = "; ".join([f"{m.get('role')}: {m.get('content')}" for m in memory_msgs[-5:]]) if memory_msgs else ""
+    return (
+        f"You are a senior data SQL assistant. Given a table name `{table}` and its columns [{cols_str}], "
+        f"and considering recent context/preferences [{mem_str}], "
+        f"write a single safe SELECT query that best answers the question: '{user_input}'. "
+        f"Rules: only SELECT; no CTE unless needed; avoid DDL/DML; prefer GROUP BY or ORDER BY as appropriate; "
+        f"if aggregating categories use COUNT(*) and return top categories; always include LIMIT 500 or fewer. "
+        f"Return only the SQL without explanations or backticks."
+    )
+
+
+def _sql_from_completion(resp, table: str, schema_cols: List[Dict[str, Any]], user_input: str) -> str:
+    content = resp.choices[0].message.content if resp and resp.choices else ""
+    sql = _extract_sql(content)
+    if sql and table and table not in sql:
+        sql = sql.replace("FROM ", f"FROM {table} ")
+    if sql:
+        from utils import db_utils
+        if not db_utils.is_safe_select(sql):
+            sql = _heuristic_groupby_query(table, schema_cols, user_input)
+        sql = db_utils.ensure_limit(sql, 500)
+    return sql
+
+
 def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
     run_id = state.get("run_id", "")
     user_input = state.get("user_input", "")
@@ -55,39 +120,21 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
         if getattr(settings, "DATA_DB_TYPE", "") and table:
             try:
                 from utils import db_utils
-                schema_cols = db_utils.get_table_columns(settings, table)
+                # Served from the schema catalog cache; the catalog is only
+                # re-read after DB_SCHEMA_CACHE_TTL or when the table is new
+                schema_cols = db_utils.describe_table(settings, table)["columns"]
             except Exception as e:
                 logger.error(run_id, "nlp", "schema_fetch_failed", {"error": str(e)})
         if getattr(settings, "OPENAI_API_KEY", ""):
             try:
-                from openai import OpenAI
-                from utils import db_utils
-                client = OpenAI(api_key=settings.OPENAI_API_KEY)
-                cols_str = ", ".join([f"{c.get('name')} ({c.get('type')})" for c in schema_cols]) or ""
-                mem_str = "; ".join([f"{m.get('role')}: {m.get('content')}" for m in memory_msgs[-5:]]) if memory_msgs else ""
-                prompt = (
-                    f"You are a senior data SQL assistant. Given a table name `{table}` and its columns [{cols_str}], "
-                    f"and considering recent context/preferences [{mem_str}], "
-                    f"write a single safe SELECT query that best answers the question: '{user_input}'. "
-                    f"Rules: only SELECT; no CTE unless needed; avoid DDL/DML; prefer GROUP BY or ORDER BY as appropriate; "
-                    f"if aggregating categories use COUNT(*) and return top categories; always include LIMIT 500 or fewer. "
-                    f"Return only the SQL without explanations or backticks."
-                )
-                resp = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.0,
-                )
-                content = resp.choices[0].message.content if resp and resp.choices else ""
-                sql = _extract_sql(content)
-                if sql and table and table not in sql:
-                    sql = sql.replace("FROM ", f"FROM {table} ")
-                if sql:
-                    from utils import db_utils
-                    if not db_utils.is_safe_select(sql):
-                        sql = _heuristic_groupby_query(table, schema_cols, user_input)
-                    sql = db_utils.ensure_limit(sql, 500)
-                query = sql
+                client = _client(settings.OPENAI_API_KEY)
+                with timing.measure("llm"):
+                    resp = client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[{"role": "user", "content": _prompt(table, schema_cols, memory_msgs, user_input)}],
+                        temperature=0.0,
+                    )
+                query = _sql_from_completion(resp, table, schema_cols, user_input)
                 used = "openai"
             except Exception as e:
                 query = None
@@ -99,3 +146,42 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
     except Exception as e:
         logger.exception(run_id, "nlp", "nlp_error", {"error": str(e)})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def arun(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async run(): awaits OpenAI directly and keeps the schema lookup off the loop."""
+    run_id = state.get("run_id", "")
+    user_input = state.get("user_input", "")
+    query = None
+    used = "mock"
+    schema_cols: List[Dict[str, Any]] = []
+    memory_msgs: List[Dict[str, Any]] = state.get("memory_messages") or []
+    table = getattr(settings, "DATA_TABLE", "")
+    try:
+        if getattr(settings, "DATA_DB_TYPE", "") and table:
+            try:
+                from utils import db_utils
+                schema_cols = (await asyncio.to_thread(db_utils.describe_table, settings, table))["columns"]
+            except Exception as e:
+                await logger.aerror(run_id, "nlp", "schema_fetch_failed", {"error": str(e)})
+        if getattr(settings, "OPENAI_API_KEY", ""):
+            try:
+                client = _async_client(settings.OPENAI_API_KEY)
+                with timing.measure("llm"):
+                    resp = await client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[{"role": "user", "content": _prompt(table, schema_cols, memory_msgs, user_input)}],
+                        temperature=0.0,
+                    )
+                query = _sql_from_completion(resp, table, schema_cols, user_input)
+                used = "openai"
+            except Exception:
+                query = None
+                used = "mock"
+        if not query:
+            query = _heuristic_groupby_query(table, schema_cols, user_input) if table else "SELECT 1"
+        await logger.ainfo(run_id, "nlp", "nlp_done", {"used": used, "query": query, "schema_cols": len(schema_cols)})
+        return {"status": "success", "data": {"query": query}, "log": {"used": used}}
+    except Exception as e:
+        await logger.aexception(run_id, "nlp", "nlp_error", {"error": str(e)})
+        return {"status": "error", "data": {}, "log": {"error": str(e)}}
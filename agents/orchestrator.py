@@ -1,5 +1,9 @@
 from typing import Any, Dict
 
+# csv and report only read the db rows (state["rows_handle"]), so they run side by side after db and
+# join (as "artifacts") before email
+PARALLEL_BRANCHES = ("csv", "report")
+
 
 def decide_next(last_node: str, state: Dict[str, Any]) -> str:
     if last_node == "memory_load":
@@ -8,10 +12,8 @@ def decide_next(last_node: str, state: Dict[str, Any]) -> str:
         # DB is mandatory
         return "db"
     if last_node == "db":
-        return "csv"
-    if last_node == "csv":
-        return "report"
-    if last_node == "report":
+        return "artifacts"
+    if last_node == "artifacts":
         return "email"
     if last_node == "email":
         return "memory_save"
@@ -1,18 +1,24 @@
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any
 from app.logging_utils import JsonSqlLogger
+from app import timing
+from app.row_store import row_store
 from utils import chart_utils, pdf_utils
 
 
 def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
     run_id = state.get("run_id", "")
-    rows: List[Dict[str, Any]] = state.get("data") or []
     chart_path = None
     try:
-        try:
-            chart_path = chart_utils.make_bar_chart_from_rows(rows, top_k=10, title="Top categories")
-        except Exception:
-            chart_path = None
-        pdf_path = pdf_utils.create_pdf_summary(state.get("user_input", ""), rows, chart_path=chart_path)
+        rows = row_store.get(state.get("rows_handle") or "")
+        with timing.measure("render"):
+            try:
+                chart_path = chart_utils.make_bar_chart_from_rows(rows.iter_rows(), top_k=10, title="Top categories")
+            except Exception:
+                chart_path = None
+            pdf_path = pdf_utils.create_pdf_summary(
+                state.get("user_input", ""), rows.iter_rows(), chart_path=chart_path, row_count=rows.count
+            )
         artifacts = dict(state.get("artifacts") or {})
         artifacts["pdf_path"] = pdf_path
         logger.info(run_id, "report", "pdf_created", {"path": pdf_path, "chart": chart_path})
@@ -20,3 +26,8 @@ def run(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any
     except Exception as e:
         logger.exception(run_id, "report", "pdf_error", {"error": str(e)})
         return {"status": "error", "data": {}, "log": {"error": str(e)}}
+
+
+async def arun(state: Dict[str, Any], settings, logger: JsonSqlLogger) -> Dict[str, Any]:
+    """Async run(): chart and PDF rendering are CPU-bound, so they run in a worker thread."""
+    return await asyncio.to_thread(run, state, settings, logger)
@@ -5,6 +5,16 @@ import os
 def check(node_name: str, last_result: Dict[str, Any]):
     if not last_result:
         return False, "no_result"
+    if node_name == "artifacts":
+        # Join of the parallel branches: every branch must pass its own check
+        branches = (last_result.get("data") or {}).get("branches") or {}
+        if not branches:
+            return False, "no_branches"
+        for branch, result in branches.items():
+            ok, reason = check(branch, result)
+            if not ok:
+                return False, f"{branch}:{reason}"
+        return True, "ok"
     status = last_result.get("status")
     if status not in ("success", "skipped"):
         return False, "node_failed"
@@ -15,8 +25,8 @@ def check(node_name: str, last_result: Dict[str, Any]):
             return False, "no_query"
     if node_name == "db":
         data = last_result.get("data") or {}
-        rows = data.get("rows") or []
-        if rows is None or len(rows) == 0:
+        count = data.get("row_count", len(data.get("rows") or []))
+        if not count:
             return False, "no_rows_from_db"
     if node_name == "csv":
         data = last_result.get("data") or {}
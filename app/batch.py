@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from uuid import uuid4
+
+from app.row_store import row_store
+from utils import db_utils
+
+
+class BatchContext:
+    """State shared by the runs of one run_many() batch.
+
+    Passed to the graph as config["configurable"]["batch"]. The nlp node
+    generates SQL through a bounded number of LLM slots, and the db node
+    executes each distinct generated query once per connection profile; runs
+    that produce the same SQL share that result (and its row set, held by
+    the batch until release()).
+    """
+
+    def __init__(self, llm_concurrency: int):
+        self.owner = f"batch-{uuid4().hex[:12]}"
+        self.llm_slots = asyncio.Semaphore(max(1, llm_concurrency))
+        self._queries: Dict[Tuple[str, str], "asyncio.Future[Dict[str, Any]]"] = {}
+        self.generated = 0
+        self.executed = 0
+        self.deduped = 0
+
+    async def run_node(self, name: str, state: Dict[str, Any], settings: Any,
+                       call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if name == "nlp":
+            async with self.llm_slots:
+                self.generated += 1
+                return await call()
+        if name == "db" and state.get("query"):
+            key = (db_utils.profile_key(settings), " ".join(state["query"].split()))
+            result = await self._execute_once(key, call)
+            handle = (result.get("data") or {}).get("rows_handle")
+            if handle:
+                row_store.retain(handle, state.get("run_id", ""))
+            return result
+        return await call()
+
+    async def _execute_once(self, key: Tuple[str, str],
+                            call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        future = self._queries.get(key)
+        if future is not None:
+            self.deduped += 1
+            # shield: a cancelled run must not cancel the query other runs wait on
+            return dict(await asyncio.shield(future))
+        future = asyncio.get_running_loop().create_future()
+        self._queries[key] = future
+        self.executed += 1
+        try:
+            result = await call()
+        except BaseException as e:
+            # Failed executions are not shared; later runs try the query again
+            self._queries.pop(key, None)
+            future.set_exception(e)
+            future.exception()  # mark retrieved when no run is waiting
+            raise
+        handle = (result.get("data") or {}).get("rows_handle")
+        if handle:
+            # Keep shared rows alive until the batch ends, whichever run finishes first
+            row_store.retain(handle, self.owner)
+        future.set_result(result)
+        return result
+
+    def release(self) -> None:
+        row_store.release_run(self.owner)
+
+    def stats(self) -> Dict[str, int]:
+        return {"sql_generated": self.generated, "sql_executed": self.executed, "sql_deduped": self.deduped}
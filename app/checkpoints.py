@@ -0,0 +1,172 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from app.database import Database
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer persisted in the app store (run_checkpoints tables).
+
+    Uses the same psycopg2 Database as the rest of the app. Each run is one
+    thread (thread_id = run_id); a channel value is stored once per version,
+    so the rows fetched by the db node are not copied into every checkpoint.
+    """
+
+    def __init__(self, db: Database):
+        super().__init__()
+        self.db = db
+
+    # Sync API
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        conf = config["configurable"]
+        loaded = self.db.load_checkpoints(
+            conf["thread_id"], conf.get("checkpoint_ns", ""), checkpoint_id=get_checkpoint_id(config), limit=1
+        )
+        tuples = self._tuples(conf["thread_id"], loaded)
+        return tuples[0] if tuples else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if not config:
+            # Listing across every run is not supported; checkpoints are looked up per run
+            return iter(())
+        conf = config["configurable"]
+        loaded = self.db.load_checkpoints(
+            conf["thread_id"],
+            conf.get("checkpoint_ns"),
+            checkpoint_id=get_checkpoint_id(config),
+            before_id=get_checkpoint_id(before) if before else None,
+            limit=None if filter else limit,
+        )
+        tuples = self._tuples(conf["thread_id"], loaded)
+        if filter:
+            tuples = [t for t in tuples if all(t.metadata.get(k) == v for k, v in filter.items())]
+            tuples = tuples[:limit] if limit is not None else tuples
+        return iter(tuples)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        conf = config["configurable"]
+        thread_id, checkpoint_ns = conf["thread_id"], conf.get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        blobs = [
+            (channel, str(version), *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+            for channel, version in new_versions.items()
+        ]
+        self.db.put_checkpoint(
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            conf.get("checkpoint_id"),
+            self.serde.dumps_typed(c),
+            self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+            blobs,
+        )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        conf = config["configurable"]
+        rows = [
+            (task_id, WRITES_IDX_MAP.get(channel, idx), channel, *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Special writes (errors, interrupts) replace earlier ones; regular writes are kept once
+        upsert = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        self.db.put_checkpoint_writes(conf["thread_id"], conf.get("checkpoint_ns", ""), conf["checkpoint_id"], rows, upsert)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.db.delete_checkpoints(thread_id)
+
+    # Async API: the Database is synchronous, so calls run on worker threads
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for t in tuples:
+            yield t
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def _tuples(self, thread_id: str, loaded: Dict[str, Any]) -> List[CheckpointTuple]:
+        blobs = {(b["checkpoint_ns"], b["channel"], b["version"]): b for b in loaded["blobs"]}
+        tuples = []
+        for row in loaded["checkpoints"]:
+            ns = row["checkpoint_ns"]
+            checkpoint = self.serde.loads_typed((row["type"], bytes(row["checkpoint"])))
+            values = {}
+            for channel, version in checkpoint["channel_versions"].items():
+                blob = blobs.get((ns, channel, str(version)))
+                if blob is not None and blob["type"] != "empty":
+                    values[channel] = self.serde.loads_typed((blob["type"], bytes(blob["blob"])))
+            writes = sorted(row["writes"], key=lambda w: writes_sort_key(w["task_path"], w["task_id"], w["idx"]))
+            parent_id = row["parent_checkpoint_id"]
+            tuples.append(CheckpointTuple(
+                config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": row["checkpoint_id"]}},
+                checkpoint={**checkpoint, "channel_values": values},
+                metadata=self.serde.loads_typed((row["metadata_type"], bytes(row["metadata"]))),
+                parent_config=(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                    if parent_id else None
+                ),
+                pending_writes=[(w["task_id"], w["channel"], self.serde.loads_typed((w["type"], bytes(w["blob"]))))
+                                for w in writes],
+            ))
+        return tuples
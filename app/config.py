@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import os
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,8 +11,24 @@ class Settings:
     SENDGRID_API_KEY: str = os.getenv("SENDGRID_API_KEY", "")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "")
     EMAIL_TO: str = os.getenv("EMAIL_TO", "")
+    # SendGrid API base URL (point at a local sink for benchmarks)
+    SENDGRID_API_HOST: str = os.getenv("SENDGRID_API_HOST", "https://api.sendgrid.com")
     DB_PATH: str = os.getenv("DB_PATH", "logs/app.db")
     LOG_FILE: str = os.getenv("LOG_FILE", "logs/events.jsonl")
+    # Log pipeline (app/logging_utils): queued, batched writes to LOG_FILE and the logs table
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").strip().lower() in ("1", "true", "yes")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_BATCH_SIZE: int = int(os.getenv("LOG_BATCH_SIZE", "500"))
+    LOG_FLUSH_INTERVAL: float = float(os.getenv("LOG_FLUSH_INTERVAL", "0.2"))
+    LOG_OVERFLOW: str = os.getenv("LOG_OVERFLOW", "block")  # block | drop-debug (DEBUG only) | spill
+    LOG_SPILL_FILE: str = os.getenv("LOG_SPILL_FILE", "logs/events.spill.jsonl")
+    # LOG_FILE rotation (app/event_log): by size (bytes, 0 off) and/or UTC day; rotated
+    # segments are gzipped and pruned by count and age (0 keeps all)
+    LOG_ROTATE_MAX_BYTES: int = int(os.getenv("LOG_ROTATE_MAX_BYTES", str(50 * 1024 * 1024)))
+    LOG_ROTATE_DAILY: bool = os.getenv("LOG_ROTATE_DAILY", "true").strip().lower() in ("1", "true", "yes")
+    LOG_COMPRESS: bool = os.getenv("LOG_COMPRESS", "true").strip().lower() in ("1", "true", "yes")
+    LOG_RETENTION_FILES: int = int(os.getenv("LOG_RETENTION_FILES", "30"))
+    LOG_RETENTION_DAYS: float = float(os.getenv("LOG_RETENTION_DAYS", "14"))
     ENV: str = os.getenv("ENV", "dev")
     SCHEDULER_TIMEZONE: str = os.getenv("SCHEDULER_TIMEZONE", "UTC")
     # External data source (relational)
@@ -40,4 +57,96 @@ class Settings:
     PGUSER: str = os.getenv("PGUSER", "")
     PGPASSWORD: str = os.getenv("PGPASSWORD", "")
 
+    # Data-source connection pools (utils/db_utils), one per connection profile
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "5"))
+    DB_POOL_IDLE_TIMEOUT: float = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+    DB_POOL_HEALTH_CHECK_AFTER: float = float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "30"))
+    DB_POOL_CHECKOUT_TIMEOUT: float = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "30"))
+
+    # App-store connection pool (app/database.py); shares the timeouts above
+    APP_DB_POOL_MIN_SIZE: int = int(os.getenv("APP_DB_POOL_MIN_SIZE", "1"))
+    APP_DB_POOL_MAX_SIZE: int = int(os.getenv("APP_DB_POOL_MAX_SIZE", "10"))
+
+    # db_server query result cache: TTL in seconds (0 disables), total byte budget
+    DB_CACHE_TTL: float = float(os.getenv("DB_CACHE_TTL", "60"))
+    DB_CACHE_MAX_BYTES: int = int(os.getenv("DB_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Schema catalog cache TTL in seconds (table/column metadata per schema)
+    DB_SCHEMA_CACHE_TTL: float = float(os.getenv("DB_SCHEMA_CACHE_TTL", "600"))
+
+    # db_server streaming cursors: idle expiry (seconds) and cap per server process
+    DB_CURSOR_IDLE_TIMEOUT: float = float(os.getenv("DB_CURSOR_IDLE_TIMEOUT", "300"))
+    DB_MAX_OPEN_CURSORS: int = int(os.getenv("DB_MAX_OPEN_CURSORS", "32"))
+    # Rows the db agent fetches per run (above ROW_STORE_CHUNK_ROWS they are paged
+    # through a cursor)
+    DB_AGENT_ROW_LIMIT: int = int(os.getenv("DB_AGENT_ROW_LIMIT", "500"))
+    # Run-scoped row store: query results live outside graph state, in memory up to
+    # ROW_STORE_SPILL_ROWS rows per result and in chunked JSONL spill files under
+    # ROW_STORE_DIR (default: a private per-process temp dir) above that; spill files of
+    # failed runs are kept for resume and purged after ROW_STORE_RETENTION_HOURS
+    ROW_STORE_DIR: str = os.getenv("ROW_STORE_DIR", "")
+    ROW_STORE_SPILL_ROWS: int = int(os.getenv("ROW_STORE_SPILL_ROWS", "5000"))
+    ROW_STORE_CHUNK_ROWS: int = int(os.getenv("ROW_STORE_CHUNK_ROWS", "1000"))
+    ROW_STORE_RETENTION_HOURS: float = float(os.getenv("ROW_STORE_RETENTION_HOURS", "24"))
+
+    # Background run queue (POST /runs): worker count, max pending runs, and
+    # max pending runs per user (0 = no per-user cap)
+    RUN_WORKERS: int = int(os.getenv("RUN_WORKERS", "4"))
+    RUN_QUEUE_MAX_DEPTH: int = int(os.getenv("RUN_QUEUE_MAX_DEPTH", "100"))
+    RUN_QUEUE_MAX_PER_USER: int = int(os.getenv("RUN_QUEUE_MAX_PER_USER", "10"))
+    # "memory" runs queued jobs inside the API process; "postgres" stores them in the
+    # run_jobs table for `python worker.py` processes on any node to claim
+    RUN_QUEUE_BACKEND: str = os.getenv("RUN_QUEUE_BACKEND", "memory")
+    # POST /run/batch: runs in flight per batch, concurrent SQL generations, batch size cap
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_LLM_CONCURRENCY: int = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+    BATCH_MAX_QUESTIONS: int = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+    # Persist graph checkpoints so failed runs can resume (POST /runs/{run_id}/resume)
+    RUN_CHECKPOINTS: bool = os.getenv("RUN_CHECKPOINTS", "true").strip().lower() in ("1", "true", "yes")
+    # Identical concurrent runs share one execution; successful results are reused
+    # for RUN_REUSE_TTL seconds (0 = only coalesce runs that are in flight)
+    RUN_SINGLE_FLIGHT: bool = os.getenv("RUN_SINGLE_FLIGHT", "true").strip().lower() in ("1", "true", "yes")
+    RUN_REUSE_TTL: float = float(os.getenv("RUN_REUSE_TTL", "60"))
+    # Postgres work queue: attempts per job, lease length and heartbeat period (seconds),
+    # idle poll period and base retry backoff (doubled per attempt)
+    RUN_JOB_MAX_ATTEMPTS: int = int(os.getenv("RUN_JOB_MAX_ATTEMPTS", "3"))
+    RUN_JOB_LEASE_SECONDS: float = float(os.getenv("RUN_JOB_LEASE_SECONDS", "60"))
+    RUN_JOB_HEARTBEAT_INTERVAL: float = float(os.getenv("RUN_JOB_HEARTBEAT_INTERVAL", "10"))
+    RUN_JOB_POLL_INTERVAL: float = float(os.getenv("RUN_JOB_POLL_INTERVAL", "1"))
+    RUN_JOB_RETRY_DELAY: float = float(os.getenv("RUN_JOB_RETRY_DELAY", "5"))
+
+    # MCP client: "stdio" runs internal servers as subprocesses (isolated),
+    # "inprocess" wires them to the client over memory streams (no stdio hop)
+    MCP_TRANSPORT: str = os.getenv("MCP_TRANSPORT", "stdio")
+    # MCP client: number of server sessions per internal server
+    MCP_DB_POOL_SIZE: int = int(os.getenv("MCP_DB_POOL_SIZE", "2"))
+    MCP_EMAIL_POOL_SIZE: int = int(os.getenv("MCP_EMAIL_POOL_SIZE", "1"))
+    # Keep one pre-initialized spare session per server for fast failover
+    MCP_WARM_STANDBY: bool = os.getenv("MCP_WARM_STANDBY", "false").strip().lower() in ("1", "true", "yes")
+    # Seconds between liveness pings of idle sessions (0 disables)
+    MCP_HEALTH_CHECK_INTERVAL: float = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+
 settings = Settings()
+
+
+class SettingsOverlay:
+    """Read-only view of a Settings object with per-run overrides on top.
+
+    Unknown override keys are dropped, so only real settings can be changed.
+    """
+
+    def __init__(self, base: Settings, overrides: Optional[Dict[str, Any]] = None):
+        self._base = base
+        self._overrides = {k: v for k, v in (overrides or {}).items() if hasattr(base, k)}
+
+    def __getattr__(self, name: str) -> Any:
+        overrides = self.__dict__.get("_overrides") or {}
+        if name in overrides:
+            return overrides[name]
+        return getattr(self.__dict__["_base"], name)
+
+
+def with_overrides(overrides: Optional[Dict[str, Any]] = None, base: Settings = settings):
+    """Settings for a single run: the process settings unless overrides are given."""
+    return SettingsOverlay(base, overrides) if overrides else base
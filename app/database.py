@@ -1,13 +1,17 @@
 import os
 import json
-import threading
+import functools
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 
 import psycopg2
 import psycopg2.extras as pg_extras
 
 from app.config import settings
+from app import timing
+from utils.db_utils import ConnectionPool
 
 
 def _pg_dsn_from_settings() -> str:
@@ -24,17 +28,67 @@ def _pg_dsn_from_settings() -> str:
     return f"host={host} port={port} dbname={db} user={user} password={pwd} sslmode=require"
 
 
+def _db_wait(method):
+    """Attribute the call (pool wait included) to the current node's db timing split."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with timing.measure("db"):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class _StorePool(ConnectionPool):
+    """ConnectionPool over the app-store DSN: plain tuple cursors, autocommit."""
+
+    def __init__(self, dsn: str, **kwargs: Any):
+        super().__init__(SimpleNamespace(DATA_DB_TYPE="postgres"), "app_store", **kwargs)
+        self.dsn = dsn
+
+    def _open(self):
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+
 class Database:
     def __init__(self, db_path: Optional[str] = None):
         # db_path kept for backward compatibility; not used for Postgres
-        self._lock = threading.Lock()
         self._dsn = _pg_dsn_from_settings()
+        self._pool = _StorePool(
+            self._dsn,
+            min_size=settings.APP_DB_POOL_MIN_SIZE,
+            max_size=settings.APP_DB_POOL_MAX_SIZE,
+            idle_timeout=settings.DB_POOL_IDLE_TIMEOUT,
+            health_check_after=settings.DB_POOL_HEALTH_CHECK_AFTER,
+            checkout_timeout=settings.DB_POOL_CHECKOUT_TIMEOUT,
+        )
         self.init_db()
 
-    def _connect(self):
-        conn = psycopg2.connect(self._dsn)
-        conn.autocommit = True
-        return conn
+    @contextmanager
+    def _conn(self) -> Iterator[Any]:
+        """Borrow a pooled connection; connections that fail are dropped, not reused."""
+        conn = self._pool.acquire()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            if not discard and not conn.closed and not conn.autocommit:
+                # Transaction helpers switch autocommit off; hand the connection back clean
+                try:
+                    conn.rollback()
+                    conn.autocommit = True
+                except Exception:
+                    discard = True
+            self._pool.release(conn, discard=discard)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self._pool.stats()
+
+    def close(self) -> None:
+        self._pool.close_all()
 
     def init_db(self) -> None:
         sqls = [
@@ -69,105 +123,496 @@ class Database:
                 content TEXT
             )
             """,
+            # Queue state for runs submitted via POST /runs
+            "ALTER TABLE runs ADD COLUMN IF NOT EXISTS user_id TEXT",
+            "ALTER TABLE runs ADD COLUMN IF NOT EXISTS queued_at TEXT",
+            "ALTER TABLE runs ADD COLUMN IF NOT EXISTS result TEXT",
+            # Durable work queue shared by all API/worker nodes (see worker.py)
+            """
+            CREATE TABLE IF NOT EXISTS run_jobs (
+                id BIGSERIAL PRIMARY KEY,
+                run_id TEXT UNIQUE,
+                user_id TEXT,
+                question TEXT,
+                overrides TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                locked_by TEXT,
+                heartbeat_at TIMESTAMPTZ,
+                last_error TEXT,
+                dedupe_key TEXT UNIQUE,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                finished_at TIMESTAMPTZ
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_run_jobs_claim ON run_jobs(status, available_at)",
+            # Per-node timing spans (app/timing.py); *_ms split out wait time inside the node
+            """
+            CREATE TABLE IF NOT EXISTS run_spans (
+                id BIGSERIAL PRIMARY KEY,
+                run_id TEXT,
+                node TEXT,
+                started_at DOUBLE PRECISION,
+                duration_ms DOUBLE PRECISION,
+                status TEXT,
+                mcp_ms DOUBLE PRECISION,
+                db_ms DOUBLE PRECISION,
+                llm_ms DOUBLE PRECISION,
+                render_ms DOUBLE PRECISION
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_run_spans_run_id ON run_spans(run_id)",
+            # LangGraph checkpoints (app/checkpoints.py); thread_id is the run_id.
+            # Channel values are stored once per version in run_checkpoint_blobs.
+            """
+            CREATE TABLE IF NOT EXISTS run_checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BYTEA,
+                metadata_type TEXT,
+                metadata BYTEA,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS run_checkpoint_blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT,
+                blob BYTEA,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS run_checkpoint_writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT,
+                type TEXT,
+                blob BYTEA,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            )
+            """,
             "CREATE INDEX IF NOT EXISTS idx_logs_run_id ON logs(run_id)",
             "CREATE INDEX IF NOT EXISTS idx_mem_user_id ON memory_messages(user_id)",
         ]
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn.cursor() as cur:
-                    for s in sqls:
-                        cur.execute(s)
-            finally:
-                conn.close()
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                for s in sqls:
+                    cur.execute(s)
 
+    @_db_wait
     def insert_log(self, run_id: str, level: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
         payload = json.dumps(data or {}, ensure_ascii=False)
         ts = datetime.utcnow().isoformat()
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "INSERT INTO logs (run_id, timestamp, level, node, event, data) VALUES (%s, %s, %s, %s, %s, %s)",
-                        (run_id, ts, level, node, event, payload),
-                    )
-            finally:
-                conn.close()
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO logs (run_id, timestamp, level, node, event, data) VALUES (%s, %s, %s, %s, %s, %s)",
+                    (run_id, ts, level, node, event, payload),
+                )
 
+    def insert_logs(self, records: List[Dict[str, Any]]) -> None:
+        """Insert many log records (run_id, timestamp, level, node, event, data) in one statement."""
+        if not records:
+            return
+        values = [
+            (r["run_id"], r["timestamp"], r["level"], r["node"], r["event"], json.dumps(r.get("data") or {}, ensure_ascii=False, default=str))
+            for r in records
+        ]
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                pg_extras.execute_values(
+                    cur,
+                    "INSERT INTO logs (run_id, timestamp, level, node, event, data) VALUES %s",
+                    values,
+                    page_size=1000,
+                )
+
+    @_db_wait
     def start_run(self, run_id: str, user_input: str) -> None:
         ts = datetime.utcnow().isoformat()
-        with self._lock:
-            conn = self._connect()
-            try:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO runs (run_id, user_input, status, started_at, finished_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (run_id) DO UPDATE SET
+                      user_input = EXCLUDED.user_input,
+                      status = EXCLUDED.status,
+                      started_at = EXCLUDED.started_at,
+                      finished_at = EXCLUDED.finished_at
+                    """,
+                    (run_id, user_input, "running", ts, None),
+                )
+
+    def enqueue_run(self, run_id: str, user_input: str, user_id: str) -> None:
+        ts = datetime.utcnow().isoformat()
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO runs (run_id, user_input, user_id, status, queued_at) VALUES (%s, %s, %s, %s, %s)",
+                    (run_id, user_input, user_id, "queued", ts),
+                )
+
+    @_db_wait
+    def finish_run(self, run_id: str, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+        ts = datetime.utcnow().isoformat()
+        payload = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE runs SET status = %s, finished_at = %s, result = COALESCE(%s, result) WHERE run_id = %s",
+                    (status, ts, payload, run_id),
+                )
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT run_id, user_input, user_id, status, queued_at, started_at, finished_at, result FROM runs WHERE run_id = %s",
+                    (run_id,),
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        out = dict(row)
+        out["result"] = json.loads(out["result"]) if out.get("result") else None
+        return out
+
+    # Work queue (run_jobs). Jobs go pending -> running -> done | failed; a running
+    # job whose heartbeat is older than the lease is claimable again.
+    def enqueue_job(self, run_id: str, question: str, overrides: Dict[str, Any], user_id: str,
+                    max_attempts: int = 3, dedupe_key: Optional[str] = None) -> bool:
+        """Insert a job and its queued runs row; False if dedupe_key was already enqueued."""
+        ts = datetime.utcnow().isoformat()
+        with self._conn() as conn:
+            # Job and runs row are inserted in one transaction
+            conn.autocommit = False
+            with conn:
                 with conn.cursor() as cur:
                     cur.execute(
                         """
-                        INSERT INTO runs (run_id, user_input, status, started_at, finished_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (run_id) DO UPDATE SET
-                          user_input = EXCLUDED.user_input,
-                          status = EXCLUDED.status,
-                          started_at = EXCLUDED.started_at,
-                          finished_at = EXCLUDED.finished_at
+                        INSERT INTO run_jobs (run_id, user_id, question, overrides, max_attempts, dedupe_key)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (dedupe_key) DO NOTHING
                         """,
-                        (run_id, user_input, "running", ts, None),
+                        (run_id, user_id, question, json.dumps(overrides or {}), max_attempts, dedupe_key),
                     )
-            finally:
-                conn.close()
+                    if cur.rowcount == 0:
+                        return False
+                    cur.execute(
+                        "INSERT INTO runs (run_id, user_input, user_id, status, queued_at) VALUES (%s, %s, %s, %s, %s)",
+                        (run_id, question, user_id, "queued", ts),
+                    )
+            return True
 
-    def finish_run(self, run_id: str, status: str) -> None:
-        ts = datetime.utcnow().isoformat()
-        with self._lock:
-            conn = self._connect()
-            try:
+    def claim_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job (pending, or running with an expired lease)."""
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    UPDATE run_jobs SET status = 'running', attempts = attempts + 1,
+                        locked_by = %s, heartbeat_at = now()
+                    WHERE id = (
+                        SELECT id FROM run_jobs
+                        WHERE attempts < max_attempts AND (
+                            (status = 'pending' AND available_at <= now())
+                            OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => %s))
+                        )
+                        ORDER BY available_at, id
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, run_id, user_id, question, overrides, attempts, max_attempts
+                    """,
+                    (worker_id, lease_seconds),
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["overrides"] = json.loads(job["overrides"]) if job.get("overrides") else {}
+        return job
+
+    def heartbeat_jobs(self, job_ids: List[int], worker_id: str) -> List[int]:
+        """Extend the leases this worker still holds; returns the ids it still owns."""
+        if not job_ids:
+            return []
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE run_jobs SET heartbeat_at = now() WHERE id = ANY(%s) AND locked_by = %s AND status = 'running' RETURNING id",
+                    (list(job_ids), worker_id),
+                )
+                return [r[0] for r in cur.fetchall()]
+
+    def complete_job(self, job_id: int, worker_id: str) -> None:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE run_jobs SET status = 'done', finished_at = now(), locked_by = NULL WHERE id = %s AND locked_by = %s",
+                    (job_id, worker_id),
+                )
+
+    def fail_job(self, job_id: int, worker_id: str, error: str, retry_delay: float, retry: bool = True) -> str:
+        """Record a failed attempt: back to pending after retry_delay, or failed once attempts
+        run out (or right away with retry=False)."""
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE run_jobs SET
+                        status = CASE WHEN %s AND attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+                        available_at = now() + make_interval(secs => %s),
+                        finished_at = CASE WHEN %s AND attempts < max_attempts THEN NULL ELSE now() END,
+                        last_error = %s, locked_by = NULL
+                    WHERE id = %s AND locked_by = %s
+                    RETURNING status
+                    """,
+                    (retry, retry_delay, retry, error, job_id, worker_id),
+                )
+                row = cur.fetchone()
+                return row[0] if row else "lost"
+
+    def expire_jobs(self, lease_seconds: float) -> List[str]:
+        """Fail jobs whose lease expired on their last allowed attempt; returns their run_ids."""
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE run_jobs SET status = 'failed', finished_at = now(), locked_by = NULL,
+                        last_error = COALESCE(last_error, 'lease expired')
+                    WHERE status = 'running' AND attempts >= max_attempts
+                      AND heartbeat_at < now() - make_interval(secs => %s)
+                    RETURNING run_id
+                    """,
+                    (lease_seconds,),
+                )
+                return [r[0] for r in cur.fetchall()]
+
+    def job_counts(self) -> Dict[str, int]:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT status, COUNT(*) FROM run_jobs GROUP BY status")
+                return {status: count for status, count in cur.fetchall()}
+
+    def pending_jobs(self, user_id: Optional[str] = None) -> int:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                if user_id is None:
+                    cur.execute("SELECT COUNT(*) FROM run_jobs WHERE status = 'pending'")
+                else:
+                    cur.execute("SELECT COUNT(*) FROM run_jobs WHERE status = 'pending' AND user_id = %s", (user_id,))
+                return cur.fetchone()[0]
+
+    def job_position(self, run_id: str) -> Optional[int]:
+        """Pending jobs ahead of run_id, or None when it is not pending."""
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT (SELECT COUNT(*) FROM run_jobs o WHERE o.status = 'pending'
+                            AND (o.available_at, o.id) < (j.available_at, j.id))
+                    FROM run_jobs j WHERE j.run_id = %s AND j.status = 'pending'
+                    """,
+                    (run_id,),
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
+
+    # Timing spans
+    def insert_spans(self, run_id: str, spans: List[Dict[str, Any]]) -> None:
+        if not spans:
+            return
+        rows = [
+            (run_id, s["node"], s["started_at"], s["duration_ms"], s.get("status"),
+             s["mcp_ms"], s["db_ms"], s["llm_ms"], s["render_ms"])
+            for s in spans
+        ]
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                pg_extras.execute_values(
+                    cur,
+                    "INSERT INTO run_spans (run_id, node, started_at, duration_ms, status, mcp_ms, db_ms, llm_ms, render_ms) VALUES %s",
+                    rows,
+                )
+
+    def get_spans(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT node, started_at, duration_ms, status, mcp_ms, db_ms, llm_ms, render_ms "
+                    "FROM run_spans WHERE run_id = %s ORDER BY started_at, id",
+                    (run_id,),
+                )
+                return [dict(r) for r in cur.fetchall()]
+
+    def node_timing_stats(self, runs: int = 200) -> List[Dict[str, Any]]:
+        """p50/p95/p99 duration and mean wait splits per node over the most recent runs."""
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    WITH recent AS (
+                        SELECT run_id FROM run_spans GROUP BY run_id ORDER BY MAX(started_at) DESC LIMIT %s
+                    )
+                    SELECT node, COUNT(*) AS count,
+                        percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+                        percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                        percentile_cont(0.99) WITHIN GROUP (ORDER BY duration_ms) AS p99_ms,
+                        AVG(mcp_ms) AS avg_mcp_ms, AVG(db_ms) AS avg_db_ms,
+                        AVG(llm_ms) AS avg_llm_ms, AVG(render_ms) AS avg_render_ms
+                    FROM run_spans WHERE run_id IN (SELECT run_id FROM recent)
+                    GROUP BY node ORDER BY p95_ms DESC
+                    """,
+                    (runs,),
+                )
+                return [dict(r) for r in cur.fetchall()]
+
+    # Graph checkpoints (see app/checkpoints.py for the LangGraph saver)
+    @_db_wait
+    def put_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, parent_id: Optional[str],
+                       checkpoint: Tuple[str, bytes], metadata: Tuple[str, bytes],
+                       blobs: List[Tuple[str, str, str, bytes]]) -> None:
+        """Store a checkpoint and the channel values (channel, version, type, blob) new in it."""
+        with self._conn() as conn:
+            conn.autocommit = False
+            with conn:
                 with conn.cursor() as cur:
+                    if blobs:
+                        pg_extras.execute_values(
+                            cur,
+                            """
+                            INSERT INTO run_checkpoint_blobs (thread_id, checkpoint_ns, channel, version, type, blob)
+                            VALUES %s ON CONFLICT DO NOTHING
+                            """,
+                            [(thread_id, checkpoint_ns, c, v, t, psycopg2.Binary(b)) for c, v, t, b in blobs],
+                        )
                     cur.execute(
-                        "UPDATE runs SET status = %s, finished_at = %s WHERE run_id = %s",
-                        (status, ts, run_id),
+                        """
+                        INSERT INTO run_checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                            type, checkpoint, metadata_type, metadata)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO UPDATE SET
+                          checkpoint = EXCLUDED.checkpoint, metadata = EXCLUDED.metadata
+                        """,
+                        (thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint[0],
+                         psycopg2.Binary(checkpoint[1]), metadata[0], psycopg2.Binary(metadata[1])),
                     )
-            finally:
-                conn.close()
+
+    @_db_wait
+    def put_checkpoint_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+                              writes: List[Tuple[str, int, str, str, bytes, str]], upsert: bool) -> None:
+        """Store pending writes (task_id, idx, channel, type, blob, task_path) of a checkpoint."""
+        if not writes:
+            return
+        conflict = (
+            "DO UPDATE SET channel = EXCLUDED.channel, type = EXCLUDED.type, blob = EXCLUDED.blob"
+            if upsert else "DO NOTHING"
+        )
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                pg_extras.execute_values(
+                    cur,
+                    "INSERT INTO run_checkpoint_writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                    "channel, type, blob, task_path) VALUES %s "
+                    f"ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) {conflict}",
+                    [(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, c, t, psycopg2.Binary(b), path)
+                     for task_id, idx, c, t, b, path in writes],
+                )
+
+    def load_checkpoints(self, thread_id: str, checkpoint_ns: Optional[str] = None, checkpoint_id: Optional[str] = None,
+                         before_id: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Checkpoints of a thread (newest first) with their pending writes, plus the thread's channel blobs."""
+        where, params = ["thread_id = %s"], [thread_id]
+        if checkpoint_ns is not None:
+            where.append("checkpoint_ns = %s")
+            params.append(checkpoint_ns)
+        if checkpoint_id is not None:
+            where.append("checkpoint_id = %s")
+            params.append(checkpoint_id)
+        if before_id is not None:
+            where.append("checkpoint_id < %s")
+            params.append(before_id)
+        sql = (
+            "SELECT checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            f"FROM run_checkpoints WHERE {' AND '.join(where)} ORDER BY checkpoint_id DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(sql, params)
+                rows = [dict(r) for r in cur.fetchall()]
+                if not rows:
+                    return {"checkpoints": [], "blobs": []}
+                cur.execute(
+                    "SELECT checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path "
+                    "FROM run_checkpoint_writes WHERE thread_id = %s AND checkpoint_id = ANY(%s)",
+                    (thread_id, [r["checkpoint_id"] for r in rows]),
+                )
+                writes = [dict(w) for w in cur.fetchall()]
+                cur.execute(
+                    "SELECT checkpoint_ns, channel, version, type, blob FROM run_checkpoint_blobs WHERE thread_id = %s",
+                    (thread_id,),
+                )
+                blobs = [dict(b) for b in cur.fetchall()]
+        for row in rows:
+            row["writes"] = [w for w in writes
+                             if w["checkpoint_id"] == row["checkpoint_id"] and w["checkpoint_ns"] == row["checkpoint_ns"]]
+        return {"checkpoints": rows, "blobs": blobs}
+
+    def delete_checkpoints(self, thread_id: str) -> None:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                for table in ("run_checkpoint_writes", "run_checkpoint_blobs", "run_checkpoints"):
+                    cur.execute(f"DELETE FROM {table} WHERE thread_id = %s", (thread_id,))
 
     # Conversational memory helpers
+    @_db_wait
     def add_memory_message(self, user_id: str, run_id: str, role: str, content: str) -> None:
         ts = datetime.utcnow().isoformat()
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "INSERT INTO memory_messages (user_id, run_id, timestamp, role, content) VALUES (%s, %s, %s, %s, %s)",
-                        (user_id, run_id, ts, role, content),
-                    )
-            finally:
-                conn.close()
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO memory_messages (user_id, run_id, timestamp, role, content) VALUES (%s, %s, %s, %s, %s)",
+                    (user_id, run_id, ts, role, content),
+                )
 
+    @_db_wait
     def get_recent_memory(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
-                    cur.execute(
-                        "SELECT user_id, run_id, timestamp, role, content FROM memory_messages WHERE user_id = %s ORDER BY id DESC LIMIT %s",
-                        (user_id, limit),
-                    )
-                    rows = cur.fetchall()
-                    out = [dict(r) for r in rows]
-                    return list(reversed(out))
-            finally:
-                conn.close()
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT user_id, run_id, timestamp, role, content FROM memory_messages WHERE user_id = %s ORDER BY id DESC LIMIT %s",
+                    (user_id, limit),
+                )
+                rows = cur.fetchall()
+                out = [dict(r) for r in rows]
+                return list(reversed(out))
 
     def get_logs(self, limit: int = 200) -> List[Dict[str, Any]]:
-        with self._lock:
-            conn = self._connect()
-            try:
-                with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
-                    cur.execute(
-                        "SELECT run_id, timestamp, level, node, event, data FROM logs ORDER BY id DESC LIMIT %s",
-                        (limit,),
-                    )
-                    rows = cur.fetchall()
-                    return [dict(r) for r in rows]
-            finally:
-                conn.close()
+        with self._conn() as conn:
+            with conn.cursor(cursor_factory=pg_extras.RealDictCursor) as cur:
+                cur.execute(
+                    "SELECT run_id, timestamp, level, node, event, data FROM logs ORDER BY id DESC LIMIT %s",
+                    (limit,),
+                )
+                rows = cur.fetchall()
+                return [dict(r) for r in rows]
@@ -0,0 +1,277 @@
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+# Rotated segments are named <stem>.<UTC rotation time>.<pid><ext>[.gz] next to
+# the live file, so sorting by name orders them by the time they were closed
+_STAMP = "%Y%m%dT%H%M%S%f"
+# Records reach the file up to a flush interval after their timestamp; segment
+# lower bounds are widened by this much when skipping by time range
+_WRITE_LAG = timedelta(minutes=5)
+
+
+def _split(path: str) -> Tuple[str, str]:
+    stem, ext = os.path.splitext(path)
+    return stem, ext or ".jsonl"
+
+
+def _segment_time(path: str, live: str) -> Optional[datetime]:
+    stem, _ = _split(live)
+    name = path[len(stem) + 1:].split(".", 1)[0]
+    try:
+        return datetime.strptime(name, _STAMP)
+    except ValueError:
+        return None
+
+
+def list_segments(path: str) -> List[str]:
+    """Rotated segments of `path`, oldest first; a segment being compressed is listed once."""
+    stem, ext = _split(path)
+    found: Dict[str, str] = {}
+    for p in glob.glob(f"{glob.escape(stem)}.*{ext}") + glob.glob(f"{glob.escape(stem)}.*{ext}.gz"):
+        if _segment_time(p, path) is None:
+            continue
+        key = p[:-3] if p.endswith(".gz") else p
+        # Both exist between the gzip finishing and the original being removed
+        if key not in found or p.endswith(".gz"):
+            found[key] = p
+    return [found[k] for k in sorted(found)]
+
+
+class RotatingJsonlWriter:
+    """Append-only JSONL file kept open per process, with rotation and retention.
+
+    Writes go through one buffered handle under a lock and are flushed once per
+    write() call (the logger writes a batch per call). The live file is rotated
+    when it would exceed `max_bytes` or when the UTC day changes; rotated
+    segments are gzipped in a background thread, then pruned to
+    `retention_files` segments and `retention_days` days (0 disables either).
+    Other processes appending to the same file notice a rotation by the path's
+    inode changing and reopen.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, daily: bool = True, compress: bool = True,
+                 retention_files: int = 0, retention_days: float = 0, buffer_size: int = 64 * 1024):
+        self.path = path
+        self.max_bytes = max(0, max_bytes)
+        self.daily = daily
+        self.compress = compress
+        self.retention_files = max(0, retention_files)
+        self.retention_days = max(0.0, retention_days)
+        self.buffer_size = buffer_size
+        dirn = os.path.dirname(path)
+        if dirn:
+            os.makedirs(dirn, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fh = None
+        self._ino: Optional[int] = None
+        self._day: Optional[str] = None
+        self.rotations = 0
+        self._jobs: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        # Segments left uncompressed (or half-compressed) by a previous process
+        for p in glob.glob(f"{glob.escape(_split(path)[0])}.*.gz.tmp"):
+            os.remove(p)
+        if self.compress:
+            for seg in list_segments(path):
+                if not seg.endswith(".gz"):
+                    self._submit(seg)
+        self._submit(None)
+
+    def _open(self) -> None:
+        self._fh = open(self.path, "a", encoding="utf-8", buffering=self.buffer_size)
+        st = os.fstat(self._fh.fileno())
+        self._ino = st.st_ino
+        # An existing file belongs to the day it was last written
+        self._day = datetime.utcfromtimestamp(st.st_mtime if st.st_size else time.time()).strftime("%Y%m%d")
+
+    def _close_handle(self) -> None:
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            finally:
+                self._fh = None
+                self._ino = None
+
+    def _ensure_open(self) -> None:
+        """(Re)open the live file if we have none or another process rotated it."""
+        if self._fh is not None:
+            try:
+                if os.stat(self.path).st_ino == self._ino:
+                    return
+            except FileNotFoundError:
+                pass
+            self._close_handle()
+        self._open()
+
+    def _should_rotate(self, incoming: int) -> bool:
+        size = os.fstat(self._fh.fileno()).st_size
+        if not size:
+            return False
+        if self.daily and datetime.utcnow().strftime("%Y%m%d") != self._day:
+            return True
+        return bool(self.max_bytes) and size + incoming > self.max_bytes
+
+    def _rotate(self) -> None:
+        stem, ext = _split(self.path)
+        segment = f"{stem}.{datetime.utcnow().strftime(_STAMP)}.{os.getpid()}{ext}"
+        try:
+            # Only rename the file we hold; if another process rotated first, just reopen
+            if os.stat(self.path).st_ino == self._ino:
+                os.replace(self.path, segment)
+                self.rotations += 1
+                self._submit(segment if self.compress else None)
+        except FileNotFoundError:
+            pass
+        self._close_handle()
+        self._open()
+
+    def write(self, data: str) -> None:
+        with self._lock:
+            self._ensure_open()
+            if self._should_rotate(len(data.encode("utf-8"))):
+                self._rotate()
+            self._fh.write(data)
+            self._fh.flush()
+
+    def _submit(self, segment: Optional[str]) -> None:
+        """Queue a segment to compress (None: only apply retention) on the background thread."""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="jsonl-compress", daemon=True)
+            self._worker.start()
+        self._jobs.put(segment)
+
+    def _run(self) -> None:
+        while True:
+            segment = self._jobs.get()
+            try:
+                if segment is not None:
+                    self._gzip(segment)
+                self._prune()
+            except Exception as e:
+                print(f"[EventLog] Failed to process {segment or 'retention'}: {e}")
+            finally:
+                self._jobs.task_done()
+
+    def _gzip(self, segment: str) -> None:
+        if not os.path.exists(segment):
+            return
+        tmp = segment + ".gz.tmp"
+        with open(segment, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp, segment + ".gz")
+        os.remove(segment)
+
+    def _prune(self) -> None:
+        segments = list_segments(self.path)
+        drop = []
+        if self.retention_days:
+            cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+            drop = [s for s in segments if (_segment_time(s, self.path) or cutoff) < cutoff]
+        if self.retention_files:
+            kept = [s for s in segments if s not in drop]
+            drop += kept[:max(0, len(kept) - self.retention_files)]
+        for s in drop:
+            try:
+                os.remove(s)
+            except FileNotFoundError:
+                pass
+
+    def wait_idle(self) -> None:
+        """Block until queued compression and retention work is done."""
+        self._jobs.join()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_handle()
+        self.wait_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        segments = list_segments(self.path)
+        return {
+            "path": self.path,
+            "size": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "segments": len(segments),
+            "segment_bytes": sum(os.path.getsize(s) for s in segments if os.path.exists(s)),
+            "rotations": self.rotations,
+        }
+
+
+def writer_from_settings(path: str) -> RotatingJsonlWriter:
+    return RotatingJsonlWriter(
+        path,
+        max_bytes=settings.LOG_ROTATE_MAX_BYTES,
+        daily=settings.LOG_ROTATE_DAILY,
+        compress=settings.LOG_COMPRESS,
+        retention_files=settings.LOG_RETENTION_FILES,
+        retention_days=settings.LOG_RETENTION_DAYS,
+    )
+
+
+def _open_segment(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def read_events(path: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                run_id: Optional[str] = None, level: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Records of the live file and its rotated (possibly gzipped) segments, oldest first.
+
+    `since`/`until` (naive values are taken as UTC) are compared with each
+    record's timestamp; segments entirely outside the range are not opened.
+    """
+    since, until = (d.astimezone(timezone.utc).replace(tzinfo=None) if d and d.tzinfo else d for d in (since, until))
+    since_s = since.isoformat() if since else None
+    until_s = until.isoformat() if until else None
+    files: List[str] = []
+    previous: Optional[datetime] = None
+    for seg in list_segments(path):
+        closed_at = _segment_time(seg, path)
+        # A segment holds records written between the previous rotation and its own
+        if since and closed_at and closed_at < since:
+            previous = closed_at
+            continue
+        if until and previous and previous - _WRITE_LAG > until:
+            break
+        files.append(seg)
+        previous = closed_at
+    if os.path.exists(path) and not (until and previous and previous - _WRITE_LAG > until):
+        files.append(path)
+
+    for p in files:
+        try:
+            f = _open_segment(p)
+        except FileNotFoundError:
+            # Compressed or pruned while we were scanning
+            if os.path.exists(p + ".gz"):
+                f = _open_segment(p + ".gz")
+            else:
+                continue
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a torn last line from a crashed writer
+                ts = str(record.get("timestamp", ""))
+                if since_s and ts < since_s:
+                    continue
+                if until_s and ts > until_s:
+                    continue
+                if run_id and record.get("run_id") != run_id:
+                    continue
+                if level and record.get("level") != level:
+                    continue
+                yield record
@@ -1,10 +1,21 @@
+import asyncio
+import atexit
 import os
 import json
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from app.database import Database
 from app.config import settings
+from app.event_log import writer_from_settings
+
+OVERFLOW_MODES = ("block", "drop-debug", "spill")
+# Levels drop-debug discards when the queue is full; anything else waits for room
+_DROPPABLE = ("DEBUG",)
+_STOP = object()
 
 
 def _ensure_dir_for_file(path: str) -> None:
@@ -14,14 +25,153 @@ def _ensure_dir_for_file(path: str) -> None:
 
 
 class JsonSqlLogger:
-    def __init__(self, database: Database, jsonl_file: Optional[str] = None):
+    """Writes log records to the JSONL file and the `logs` table.
+
+    With LOG_ASYNC (the default) log() only enqueues the record. A flusher
+    thread writes up to LOG_BATCH_SIZE records, or whatever arrived within
+    LOG_FLUSH_INTERVAL seconds, as one JSONL append and one multi-row INSERT.
+    When the queue (LOG_QUEUE_SIZE) is full, LOG_OVERFLOW decides:
+
+    - block: wait for room
+    - drop-debug: drop DEBUG records, wait for room for the rest
+    - spill: append to LOG_SPILL_FILE; the flusher loads it once the queue drains
+
+    The JSONL file is kept open and rotated by app.event_log (LOG_ROTATE_*).
+    flush() waits for everything logged so far; close() flushes and stops the thread.
+    """
+
+    def __init__(self, database: Database, jsonl_file: Optional[str] = None, async_writes: Optional[bool] = None,
+                 queue_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, overflow: Optional[str] = None,
+                 spill_file: Optional[str] = None):
         self.db = database
         self.jsonl_file = jsonl_file or settings.LOG_FILE
-        _ensure_dir_for_file(self.jsonl_file)
+        self._jsonl = writer_from_settings(self.jsonl_file)
+        self.batch_size = max(1, batch_size or settings.LOG_BATCH_SIZE)
+        self.flush_interval = flush_interval if flush_interval is not None else settings.LOG_FLUSH_INTERVAL
+        self.overflow = (overflow or settings.LOG_OVERFLOW).strip().lower()
+        if self.overflow not in OVERFLOW_MODES:
+            raise ValueError(f"LOG_OVERFLOW must be one of {', '.join(OVERFLOW_MODES)}, got {self.overflow!r}")
+        self.spill_file = spill_file or settings.LOG_SPILL_FILE
+        self._spill_lock = threading.Lock()
+        # Spill left by a previous process is loaded on the first idle flush
+        self._spill_pending = os.path.exists(self.spill_file) or os.path.exists(self.spill_file + ".draining")
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "failed": 0, "blocked": 0, "dropped": 0, "spilled": 0}
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._queue: Optional["queue.Queue[Any]"] = None
+        self._thread: Optional[threading.Thread] = None
+        if async_writes if async_writes is not None else settings.LOG_ASYNC:
+            self._queue = queue.Queue(maxsize=max(1, queue_size or settings.LOG_QUEUE_SIZE))
+            self._thread = threading.Thread(target=self._run, name="log-flusher", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _write_jsonl(self, records: List[Dict[str, Any]]) -> None:
+        self._jsonl.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        """One JSONL append and one INSERT for a batch; failures are reported, not raised."""
+        try:
+            self._write_jsonl(records)
+        except Exception as e:
+            print(f"[Logger] Failed to append {len(records)} records to {self.jsonl_file}: {e}")
+        try:
+            self.db.insert_logs(records)
+            self._count("written", len(records))
+        except Exception as e:
+            self._count("failed", len(records))
+            print(f"[Logger] Failed to insert {len(records)} log records: {e}")
+        self._count("batches")
+
+    def _spill(self, record: Dict[str, Any]) -> None:
+        with self._spill_lock:
+            _ensure_dir_for_file(self.spill_file)
+            with open(self.spill_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._spill_pending = True
+        self._count("spilled")
+
+    def _drain_spill(self) -> None:
+        draining = self.spill_file + ".draining"
+        with self._spill_lock:
+            if not self._spill_pending:
+                return
+            self._spill_pending = False
+            # A .draining file left by a crash is loaded before the newer spill
+            if os.path.exists(self.spill_file) and not os.path.exists(draining):
+                os.replace(self.spill_file, draining)
+        if not os.path.exists(draining):
+            return
+        try:
+            with open(draining, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except Exception as e:
+            print(f"[Logger] Failed to read spill file {draining}: {e}")
+            return
+        for i in range(0, len(records), self.batch_size):
+            self._write(records[i:i + self.batch_size])
+        os.remove(draining)
+        if os.path.exists(self.spill_file):
+            with self._spill_lock:
+                self._spill_pending = True
 
-    def _write_jsonl(self, record: Dict[str, Any]) -> None:
-        with open(self.jsonl_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            try:
+                item = q.get(timeout=max(self.flush_interval, 0.05))
+            except queue.Empty:
+                self._drain_spill()
+                continue
+            batch: List[Dict[str, Any]] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                # A flush() or close() caller is waiting; write what we have now
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if stop or waiters or q.empty():
+                self._drain_spill()
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+    def _enqueue(self, record: Dict[str, Any]) -> None:
+        q = self._queue
+        try:
+            q.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "spill":
+                self._spill(record)
+                return
+            if self.overflow == "drop-debug" and record["level"] in _DROPPABLE:
+                self._count("dropped")
+                return
+            self._count("blocked")
+            q.put(record)
+        self._count("enqueued")
 
     def log(self, run_id: str, level: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
         record = {
@@ -32,8 +182,44 @@ class JsonSqlLogger:
             "event": event,
             "data": data or {},
         }
-        self._write_jsonl(record)
-        self.db.insert_log(run_id, level, node, event, data or {})
+        if self._queue is None or self._closed:
+            self._write([record])
+            return
+        self._enqueue(record)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every record logged before the call has been written."""
+        if self._queue is None or self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush the queue, stop the flusher and close the JSONL file; later log() calls write synchronously."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._queue is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                print(f"[Logger] Flusher still busy after {timeout}s; {self._queue.qsize()} records may be lost")
+        self._jsonl.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out.update({
+            "async": self._queue is not None and not self._closed,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "overflow": self.overflow,
+            "jsonl": self._jsonl.stats(),
+        })
+        return out
+
+    def debug(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        self.log(run_id, "DEBUG", node, event, data)
 
     def info(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
         self.log(run_id, "INFO", node, event, data)
@@ -43,3 +229,23 @@ class JsonSqlLogger:
 
     def exception(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
         self.log(run_id, "EXCEPTION", node, event, data)
+
+    # Async variants: enqueueing is cheap, but synchronous writes or a full
+    # queue in block mode would stall the event loop, so those go to a thread
+    async def alog(self, run_id: str, level: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        if self._queue is not None and not self._closed and not self._queue.full():
+            self.log(run_id, level, node, event, data)
+            return
+        await asyncio.to_thread(self.log, run_id, level, node, event, data)
+
+    async def adebug(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        await self.alog(run_id, "DEBUG", node, event, data)
+
+    async def ainfo(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        await self.alog(run_id, "INFO", node, event, data)
+
+    async def aerror(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        await self.alog(run_id, "ERROR", node, event, data)
+
+    async def aexception(self, run_id: str, node: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        await self.alog(run_id, "EXCEPTION", node, event, data)
@@ -0,0 +1,263 @@
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from uuid import uuid4
+
+from app.config import settings
+
+
+class RowSet:
+    """Rows of one query result in the columnar shape (column names once, one
+    value list per row).
+
+    Rows are kept in memory until `spill_rows` is exceeded; from then on full
+    chunks are appended to a spill file (one JSON array of row value lists
+    per line) and only the unflushed tail stays in memory. Values JSON cannot
+    represent are stored as strings.
+
+    A page that brings new columns widens the row set: the new names are
+    appended to `columns` and earlier rows read back None for them.
+    """
+
+    def __init__(self, handle: str, path: str, spill_rows: int, chunk_rows: int):
+        self.handle = handle
+        self.path = path
+        self.spill_rows = spill_rows
+        self.chunk_rows = chunk_rows
+        self.columns: List[str] = []
+        self.count = 0
+        self.spilled = False
+        self._tail: List[List[Any]] = []
+        self._lock = threading.Lock()
+
+    def append_columnar(self, columns: List[str], data: List[List[Any]]) -> None:
+        if not data:
+            if columns and not self.columns:
+                self.columns = list(columns)
+            return
+        with self._lock:
+            if not self.columns:
+                self.columns = list(columns)
+            elif list(columns) != self.columns:
+                added = [c for c in columns if c not in self.columns]
+                if added:
+                    # Rows already stored are padded with None on read (spilled) or here (tail)
+                    self.columns = self.columns + added
+                    width = len(self.columns)
+                    self._tail = [row + [None] * (width - len(row)) for row in self._tail]
+                # Align a page whose columns differ from the stored ones
+                index = [columns.index(c) if c in columns else None for c in self.columns]
+                data = [[row[i] if i is not None else None for i in index] for row in data]
+            self._tail.extend(data)
+            self.count += len(data)
+            if self.spilled or len(self._tail) > self.spill_rows:
+                self._flush(keep_partial=True)
+
+    def append_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        it = iter(rows)
+        while True:
+            batch = list(islice(it, self.chunk_rows))
+            if not batch:
+                return
+            # Rows may differ in keys (e.g. MongoDB documents): take the union, first-seen order
+            columns = list(self.columns)
+            seen = set(columns)
+            for r in batch:
+                for c in r:
+                    if c not in seen:
+                        seen.add(c)
+                        columns.append(c)
+            self.append_columnar(columns, [[r.get(c) for c in columns] for r in batch])
+
+    def spill(self) -> None:
+        """Move every row to the spill file (used to keep a failed run's rows for resume)."""
+        with self._lock:
+            self._flush(keep_partial=False)
+            self._write_meta()
+
+    def iter_chunks(self) -> Iterator[List[List[Any]]]:
+        with self._lock:
+            spilled = self.spilled
+            tail = list(self._tail)
+            width = len(self.columns)
+        if spilled and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    chunk = json.loads(line)
+                    # Chunks spilled before the row set was widened are shorter
+                    yield [row if len(row) >= width else row + [None] * (width - len(row)) for row in chunk]
+        if tail:
+            yield tail
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        columns = self.columns
+        for chunk in self.iter_chunks():
+            for values in chunk:
+                yield dict(zip(columns, values))
+
+    def head(self, n: int) -> List[Dict[str, Any]]:
+        return list(islice(self.iter_rows(), n))
+
+    def delete(self) -> None:
+        with self._lock:
+            self._tail = []
+            for p in (self.path, self.path + ".json"):
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+
+    def _flush(self, keep_partial: bool) -> None:
+        # Called with the lock held; writes whole chunks, leaving a partial one in memory if asked
+        n = len(self._tail) - (len(self._tail) % self.chunk_rows if keep_partial else 0)
+        if n <= 0:
+            return
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for i in range(0, n, self.chunk_rows):
+                f.write(json.dumps(self._tail[i:i + self.chunk_rows], ensure_ascii=False, default=str) + "\n")
+        del self._tail[:n]
+        self.spilled = True
+
+    def _write_meta(self) -> None:
+        with open(self.path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "count": self.count}, f)
+
+    @classmethod
+    def open_spilled(cls, handle: str, path: str, chunk_rows: int) -> Optional["RowSet"]:
+        """Re-open a fully spilled row set (e.g. a failed run resumed after a restart)."""
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        rows = cls(handle, path, 0, chunk_rows)
+        rows.columns, rows.count, rows.spilled = meta["columns"], meta["count"], True
+        return rows
+
+
+class RowStore:
+    """Run-scoped row sets addressed by handle.
+
+    Graph state carries only the handle (plus a row count); nodes read rows
+    through iterators. A row set is released once no run holding it is
+    active (a batch may share one query result between runs).
+    """
+
+    def __init__(self, directory: str, spill_rows: int, chunk_rows: int):
+        self.directory = directory
+        self.spill_rows = spill_rows
+        self.chunk_rows = chunk_rows
+        self._sets: Dict[str, RowSet] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._keep: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def create(self, run_id: str) -> RowSet:
+        handle = f"{run_id or 'run'}-{uuid4().hex[:12]}"
+        rows = RowSet(handle, self._path(handle), self.spill_rows, self.chunk_rows)
+        with self._lock:
+            self._sets[handle] = rows
+            self._owners[handle] = {run_id}
+        return rows
+
+    def get(self, handle: str) -> RowSet:
+        with self._lock:
+            rows = self._sets.get(handle)
+            if rows is None:
+                rows = RowSet.open_spilled(handle, self._path(handle), self.chunk_rows)
+                if rows is None:
+                    raise KeyError(f"Rows {handle} are no longer available")
+                self._sets[handle] = rows
+                # Handles are "<run_id>-<suffix>": the resumed run owns it again
+                self._owners.setdefault(handle, set()).add(handle.rsplit("-", 1)[0])
+            return rows
+
+    def discard(self, handle: str) -> None:
+        """Drop a row set immediately (e.g. the partial result of a failed query)."""
+        with self._lock:
+            rows = self._sets.pop(handle, None)
+            self._owners.pop(handle, None)
+            self._keep.discard(handle)
+        if rows is not None:
+            rows.delete()
+
+    def retain(self, handle: str, run_id: str) -> None:
+        with self._lock:
+            self._owners.setdefault(handle, set()).add(run_id)
+
+    def release_run(self, run_id: str, keep: bool = False) -> None:
+        """Drop a run's hold on its row sets.
+
+        keep=True (a failed, resumable run) spills them to disk once the last
+        holder lets go, instead of deleting them.
+        """
+        with self._lock:
+            held = [h for h, owners in self._owners.items() if run_id in owners]
+            dropped = []
+            for handle in held:
+                owners = self._owners[handle]
+                owners.discard(run_id)
+                if keep:
+                    self._keep.add(handle)
+                if not owners:
+                    del self._owners[handle]
+                    dropped.append((self._sets.pop(handle, None), handle in self._keep))
+                    self._keep.discard(handle)
+        for rows, spill in dropped:
+            if rows is None:
+                continue
+            if spill:
+                rows.spill()
+            else:
+                rows.delete()
+
+    def purge(self, max_age: float) -> int:
+        """Delete spill files older than max_age seconds (rows of failed runs never resumed)."""
+        cutoff = time.time() - max_age
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sets = list(self._sets.values())
+        return {
+            "row_sets": len(sets),
+            "rows_in_memory": sum(len(r._tail) for r in sets),
+            "spilled": sum(1 for r in sets if r.spilled),
+        }
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.directory, f"{handle}.rows.jsonl")
+
+
+def _private_dir() -> str:
+    """Owner-only (0700) temp directory for this process, removed at exit."""
+    path = tempfile.mkdtemp(prefix="multiagent_rows-")
+    atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+# Without ROW_STORE_DIR the rows are private to this process; set it (e.g. to a volume
+# shared by API and workers) to resume failed runs from another process
+row_store = RowStore(
+    settings.ROW_STORE_DIR or _private_dir(),
+    settings.ROW_STORE_SPILL_ROWS,
+    settings.ROW_STORE_CHUNK_ROWS,
+)
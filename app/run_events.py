@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+
+def node_event(chunk: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Progress event for a LangGraph "tasks" stream chunk (task start or finish)."""
+    node = chunk.get("name")
+    if "input" in chunk:
+        return "node_started", {"node": node}
+    if chunk.get("error") is not None:
+        return "node_finished", {"node": node, "status": "error", "error": str(chunk["error"])}
+    update = chunk.get("result") or {}
+    data: Dict[str, Any] = {"node": node}
+    if node == "supervisor":
+        data.update(ok=update.get("supervisor_ok"), route=update.get("route"))
+        return "node_finished", data
+    # csv/report only write their branch result; other nodes set status directly
+    result = (update.get("branch_results") or {}).get(node) or update.get("last_result") or {}
+    data["status"] = update.get("status") or result.get("status")
+    if update.get("row_count") is not None:
+        data["rows"] = update["row_count"]
+    if update.get("query"):
+        data["query"] = update["query"]
+    if update.get("artifacts"):
+        data["artifacts"] = update["artifacts"]
+    return "node_finished", data
+
+
+class _Channel:
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self.next_id = 0
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Queue[Optional[Dict[str, Any]]]"]] = []
+        self.finished_at: Optional[float] = None
+
+
+class RunEvents:
+    """In-process progress events per run, replayed to late subscribers.
+
+    Publishing is thread-safe (sync runs publish from worker threads);
+    subscribers are async iterators on their own event loop. Channels of
+    finished runs are kept for `retention` seconds.
+    """
+
+    def __init__(self, retention: float = 300.0, max_events: int = 500):
+        self.retention = retention
+        self.max_events = max_events
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def has(self, run_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            return run_id in self._channels
+
+    def start(self, run_id: str, data: Dict[str, Any]) -> None:
+        """Open a fresh channel for a run (a resumed run replaces its finished one)."""
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None or channel.finished_at is not None:
+                self._channels[run_id] = _Channel()
+        self.publish(run_id, "run_started", data)
+
+    def publish(self, run_id: str, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            channel = self._channels.setdefault(run_id, _Channel())
+            if channel.finished_at is not None:
+                return
+            item = {"id": channel.next_id, "event": event, "ts": time.time(), "data": data}
+            channel.next_id += 1
+            if len(channel.events) < self.max_events:
+                channel.events.append(item)
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def finish(self, run_id: str, data: Dict[str, Any]) -> None:
+        """Publish run_finished and close the run's streams."""
+        self.publish(run_id, "run_finished", data)
+        with self._lock:
+            self._expire()
+            channel = self._channels.get(run_id)
+            if channel is None:
+                return
+            channel.finished_at = time.monotonic()
+            subscribers, channel.subscribers = channel.subscribers, []
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def subscribe(self, run_id: str, after: int = -1,
+                        heartbeat: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Events of a run with id > `after`: history first, then live until the run finishes.
+
+        With `heartbeat`, a "ping" event (id None) is yielded after that many idle seconds.
+        """
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None:
+                return
+            history = list(channel.events)
+            done = channel.finished_at is not None
+            if not done:
+                channel.subscribers.append(entry)
+        try:
+            for item in history:
+                if item["id"] > after:
+                    after = item["id"]
+                    yield item
+            if done:
+                return
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"id": None, "event": "ping", "ts": time.time(), "data": {}}
+                    continue
+                if item is None:
+                    return
+                if item["id"] > after:
+                    after = item["id"]
+                    yield item
+        finally:
+            with self._lock:
+                if entry in channel.subscribers:
+                    channel.subscribers.remove(entry)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.retention
+        for run_id in [r for r, c in self._channels.items() if c.finished_at is not None and c.finished_at < cutoff]:
+            del self._channels[run_id]
+
+
+run_events = RunEvents()
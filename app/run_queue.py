@@ -0,0 +1,214 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from app.database import Database
+
+
+class QueueFull(Exception):
+    """Raised by RunQueue.submit when the queue (or a user's share of it) is full."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueuedRun:
+    def __init__(self, run_id: str, question: str, overrides: Dict[str, Any], user_id: str):
+        self.run_id = run_id
+        self.question = question
+        self.overrides = overrides
+        self.user_id = user_id
+
+
+class RunQueue:
+    """In-process run queue with a bounded worker pool.
+
+    Pending runs are kept per user and served round-robin, so one user's burst
+    cannot starve everyone else. Queue state (queued/running/finished, result)
+    is written to the runs table so GET /runs/{id} can poll it.
+    """
+
+    def __init__(self, runner: Callable[..., Awaitable[Dict[str, Any]]], db: Database,
+                 workers: int = 4, max_depth: int = 100, max_per_user: int = 0):
+        self.runner = runner
+        self.db = db
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self._pending: "OrderedDict[str, Deque[QueuedRun]]" = OrderedDict()
+        self._depth = 0
+        self._running: Dict[str, QueuedRun] = {}
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        # Smoothed run duration, used to estimate Retry-After
+        self._avg_duration = 10.0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        self._ready = asyncio.Semaphore(0)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"[Queue] Started {self.workers} run workers (max depth {self.max_depth})")
+
+    async def stop(self) -> None:
+        # Runs that never finished are marked so pollers do not wait forever; collected
+        # before cancelling, since cancelled workers drop their run from _running
+        abandoned = [job.run_id for jobs in self._pending.values() for job in jobs] + list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self._running.clear()
+        self._depth = 0
+        for run_id in abandoned:
+            try:
+                await asyncio.to_thread(self.db.finish_run, run_id, "cancelled", {"error": "server shutdown"})
+            except Exception as e:
+                print(f"[Queue] Could not mark run {run_id} cancelled: {e}")
+
+    def retry_after(self) -> int:
+        """Seconds until a worker is likely to free up a queue slot."""
+        # With every worker busy, one run finishes about every avg_duration / workers seconds
+        return max(1, math.ceil(self._avg_duration / self.workers))
+
+    async def submit(self, question: str, overrides: Dict[str, Any], user_id: str) -> str:
+        if self._ready is None:
+            raise RuntimeError("Run queue is not started")
+        user_pending = len(self._pending.get(user_id) or ())
+        if self._depth >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull(f"Run queue is full ({self._depth} pending)", self.retry_after())
+        if self.max_per_user and user_pending >= self.max_per_user:
+            self.rejected += 1
+            raise QueueFull(f"Too many pending runs for user {user_id} ({user_pending})", self.retry_after())
+        # Reserve the slot before awaiting the insert so concurrent submits cannot overshoot
+        self._depth += 1
+        job = QueuedRun(str(uuid4()), question, overrides, user_id)
+        try:
+            await asyncio.to_thread(self.db.enqueue_run, job.run_id, question, user_id)
+        except Exception:
+            self._depth -= 1
+            raise
+        self._pending.setdefault(user_id, deque()).append(job)
+        self._ready.release()
+        return job.run_id
+
+    def _next(self) -> QueuedRun:
+        # Round-robin: take the head of the first user's queue, then move that user to the back
+        user_id, jobs = next(iter(self._pending.items()))
+        job = jobs.popleft()
+        if jobs:
+            self._pending.move_to_end(user_id)
+        else:
+            del self._pending[user_id]
+        self._depth -= 1
+        return job
+
+    def position(self, run_id: str) -> Optional[int]:
+        """Approximate 0-based position of a pending run, or None if not pending."""
+        for users_ahead, jobs in enumerate(self._pending.values()):
+            for index, job in enumerate(jobs):
+                if job.run_id == run_id:
+                    # Each earlier round serves one run per user
+                    return index * len(self._pending) + users_ahead
+        return None
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            await self._ready.acquire()
+            job = self._next()
+            self._running[job.run_id] = job
+            started = time.monotonic()
+            try:
+                await self.runner(job.question, overrides=job.overrides, user_id=job.user_id, run_id=job.run_id)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"[Queue] Run {job.run_id} failed: {e}")
+                try:
+                    await asyncio.to_thread(self.db.finish_run, job.run_id, "error", {"error": str(e)})
+                except Exception:
+                    pass
+            finally:
+                self._running.pop(job.run_id, None)
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * (time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "workers": self.workers,
+            "pending": self._depth,
+            "running": len(self._running),
+            "users_waiting": len(self._pending),
+            "max_depth": self.max_depth,
+            "max_per_user": self.max_per_user,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_duration": round(self._avg_duration, 3),
+        }
+
+
+class PostgresRunQueue:
+    """RunQueue front end for the run_jobs table.
+
+    The API process only enqueues; `python worker.py` processes on any node
+    claim and execute the jobs. Same submit/position/stats surface as RunQueue.
+    """
+
+    def __init__(self, db: Database, max_depth: int = 100, max_per_user: int = 0, max_attempts: int = 3,
+                 retry_after: int = 5):
+        self.db = db
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self.max_attempts = max_attempts
+        # Workers live elsewhere, so there is no local duration estimate
+        self._retry_after = retry_after
+        self.rejected = 0
+
+    async def start(self) -> None:
+        print(f"[Queue] Using Postgres work queue (max depth {self.max_depth}); run worker.py to execute jobs")
+
+    async def stop(self) -> None:
+        pass
+
+    def retry_after(self) -> int:
+        return self._retry_after
+
+    async def submit(self, question: str, overrides: Dict[str, Any], user_id: str, dedupe_key: Optional[str] = None) -> Optional[str]:
+        """Enqueue a job; returns its run_id, or None if dedupe_key was already enqueued."""
+        depth = await asyncio.to_thread(self.db.pending_jobs)
+        if depth >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull(f"Run queue is full ({depth} pending)", self.retry_after())
+        if self.max_per_user:
+            user_pending = await asyncio.to_thread(self.db.pending_jobs, user_id)
+            if user_pending >= self.max_per_user:
+                self.rejected += 1
+                raise QueueFull(f"Too many pending runs for user {user_id} ({user_pending})", self.retry_after())
+        run_id = str(uuid4())
+        inserted = await asyncio.to_thread(
+            self.db.enqueue_job, run_id, question, overrides, user_id, self.max_attempts, dedupe_key
+        )
+        return run_id if inserted else None
+
+    def position(self, run_id: str) -> Optional[int]:
+        return self.db.job_position(run_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "postgres",
+            "jobs": self.db.job_counts(),
+            "max_depth": self.max_depth,
+            "max_per_user": self.max_per_user,
+            "max_attempts": self.max_attempts,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+# Connection parameters; they reach the key through the connection-profile hash
+_CONNECTION_FIELDS = {
+    "DATA_DB_TYPE", "DATA_HOST", "DATA_PORT", "DATA_NAME", "DATA_USER",
+    "DATA_PASSWORD", "DATA_DSN", "DATA_SSLMODE",
+}
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, trailing punctuation dropped."""
+    return re.sub(r"\s+", " ", (question or "").strip().lower()).rstrip(" ?.!")
+
+
+def run_key(question: str, profile: str, overrides: Optional[Dict[str, Any]], user_id: str = "default") -> str:
+    """Identity of a run: user, normalized question, connection profile and pipeline options.
+
+    The user is part of the key because runs load and save that user's memory.
+    """
+    options = {k: str(v) for k, v in sorted((overrides or {}).items()) if k not in _CONNECTION_FIELDS}
+    raw = json.dumps([user_id, normalize_question(question), profile, options])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces identical runs.
+
+    The first caller for a key leads and executes the run; callers arriving
+    while it is in flight wait for its result, and callers within `ttl`
+    seconds after a successful run reuse that result.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[str, Future] = {}
+        self._recent: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.leads = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    def begin(self, key: str) -> Tuple[str, Any]:
+        """("fresh", result), ("wait", future) or ("lead", future) for a key."""
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None:
+                if time.monotonic() - recent[0] <= self.ttl:
+                    self.reused += 1
+                    return "fresh", recent[1]
+                del self._recent[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return "wait", future
+            future = Future()
+            self._inflight[key] = future
+            self.leads += 1
+            return "lead", future
+
+    def finish(self, key: str, future: Future, result: Optional[Dict[str, Any]] = None,
+               error: Optional[BaseException] = None) -> None:
+        """Publish the leader's outcome to waiters and remember successful results."""
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None and self.ttl > 0 and (result or {}).get("status") == "success":
+                self._recent[key] = (time.monotonic(), result)
+                self._recent.move_to_end(key)
+                while len(self._recent) > self.max_entries:
+                    self._recent.popitem(last=False)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.leads + self.coalesced + self.reused
+            hits = self.coalesced + self.reused
+            return {
+                "leads": self.leads,
+                "coalesced": self.coalesced,
+                "reused": self.reused,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                "inflight": len(self._inflight),
+                "fresh_entries": len(self._recent),
+            }
@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# Categories of wait time split out of each node's duration
+SPLITS = ("mcp", "db", "llm", "render")
+
+
+class NodeSpan:
+    """Timing of one graph node execution within a run."""
+
+    def __init__(self, run_id: str, node: str):
+        self.run_id = run_id
+        self.node = node
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = 0.0
+        self.status: Optional[str] = None
+        self.splits: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, category: str, seconds: float) -> None:
+        with self._lock:
+            self.splits[category] = self.splits.get(category, 0.0) + seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "node": self.node,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            **{f"{c}_ms": round(self.splits.get(c, 0.0) * 1000, 3) for c in SPLITS},
+        }
+
+
+_current: ContextVar[Optional[NodeSpan]] = ContextVar("node_span", default=None)
+_runs: Dict[str, List[NodeSpan]] = {}
+_runs_lock = threading.Lock()
+
+
+@contextmanager
+def node_span(run_id: str, node: str) -> Iterator[NodeSpan]:
+    """Time a node; measure() calls made inside it are attributed to this span."""
+    span = NodeSpan(run_id, node)
+    token = _current.set(span)
+    try:
+        yield span
+    finally:
+        span.duration = time.perf_counter() - span._start
+        _current.reset(token)
+        with _runs_lock:
+            _runs.setdefault(run_id, []).append(span)
+
+
+@contextmanager
+def measure(category: str) -> Iterator[None]:
+    """Add the time spent in the block to the current node's `category` split."""
+    span = _current.get()
+    if span is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span.add(category, time.perf_counter() - start)
+
+
+def pop_run(run_id: str) -> List[Dict[str, Any]]:
+    """Collected spans of a finished run, oldest first."""
+    with _runs_lock:
+        spans = _runs.pop(run_id, [])
+    return [s.to_dict() for s in sorted(spans, key=lambda s: s.started_at)]
@@ -0,0 +1 @@
+"""Benchmarks for the multi-agent pipeline (run with `python -m benchmarks.<name>`)."""
@@ -0,0 +1,326 @@
+"""End-to-end load and latency benchmark.
+
+Drives full runs through `main.run_once` (--mode direct) or the FastAPI
+`POST /run` endpoint served in-process by uvicorn (--mode http) at a fixed
+concurrency. OpenAI and SendGrid are replaced by local stubs
+(benchmarks/stubs.py) and the data source is a generated `bench_sales`
+table, so the only external requirement is the app-store Postgres
+(SUPABASE_POOLER_DSN or --store-dsn).
+
+Reports throughput, run latency and per-node p50/p95/p99 (from the run
+timing spans), peak RSS and MCP response sizes per tool. With --baseline
+the report is compared against a stored one and the process exits with
+status 1 when a metric regresses by more than --tolerance.
+
+    python -m benchmarks.e2e --rows 100000 --runs 200 --concurrency 8 --llm-latency 0.3
+    python -m benchmarks.e2e ... --save-baseline benchmarks/baselines/e2e.json
+    python -m benchmarks.e2e ... --baseline benchmarks/baselines/e2e.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.stubs import TABLE, SendGridSink, StubOpenAI, make_postgres_dataset, make_sqlite_dataset
+
+# Metrics compared against a baseline: (path in the report, True when higher is better)
+_GATED = [
+    (("throughput_rps",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("peak_rss_mb",), False),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024, 1)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _configure_env(args: argparse.Namespace, llm: StubOpenAI, sink: SendGridSink) -> None:
+    """Point the app at the stubs and the bench dataset; must run before app modules are imported."""
+    env = {
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": llm.base_url,
+        "SENDGRID_API_KEY": "bench",
+        "SENDGRID_API_HOST": sink.url,
+        "EMAIL_FROM": "bench@example.com",
+        "EMAIL_TO": "sink@example.com",
+        "DATA_TABLE": TABLE,
+        "DB_AGENT_ROW_LIMIT": str(args.rows_per_run),
+        "RUN_SINGLE_FLIGHT": "true" if args.single_flight else "false",
+    }
+    if args.data_dsn:
+        env.update(DATA_DB_TYPE="postgres", DATA_DSN=args.data_dsn)
+    else:
+        env.update(DATA_DB_TYPE="sqlite", DATA_NAME=os.path.abspath(args.sqlite_path))
+    if args.store_dsn:
+        env["SUPABASE_POOLER_DSN"] = args.store_dsn
+    if args.transport:
+        env["MCP_TRANSPORT"] = args.transport
+    os.environ.update(env)
+
+
+def _direct_runner() -> Tuple[Callable[[str], Tuple[str, str]], Callable[[], None]]:
+    from main import run_once
+    from mcp_client import cleanup_mcp_sync, initialize_mcp_sync
+
+    initialize_mcp_sync()
+
+    def run(question: str) -> Tuple[str, str]:
+        out = run_once(question, user_id="bench")
+        return out.get("run_id") or "", out.get("status") or "error"
+
+    return run, cleanup_mcp_sync
+
+
+def _http_runner() -> Tuple[Callable[[str], Tuple[str, str]], Callable[[], None]]:
+    import httpx
+    import uvicorn
+    import server
+
+    port = _free_port()
+    srv = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=srv.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not srv.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    local = threading.local()
+
+    def run(question: str) -> Tuple[str, str]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=300)
+        resp = client.post("/run", json={"question": question, "user_id": "bench"})
+        body = resp.json()
+        return body.get("run_id") or "", body.get("status") or f"http_{resp.status_code}"
+
+    def stop() -> None:
+        srv.should_exit = True
+        thread.join(timeout=30)
+
+    return run, stop
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.data_dsn:
+        make_postgres_dataset(args.data_dsn, args.rows)
+    else:
+        make_sqlite_dataset(args.sqlite_path, args.rows)
+    sql = args.sql or f"SELECT * FROM {TABLE} LIMIT {args.rows_per_run}"
+    llm = StubOpenAI(sql, args.llm_latency).start()
+    sink = SendGridSink().start()
+    _configure_env(args, llm, sink)
+
+    from main import get_app
+    from mcp_client import get_mcp_manager
+
+    run, stop = _http_runner() if args.mode == "http" else _direct_runner()
+    try:
+        for i in range(args.warmup):
+            run(f"warmup {i}: {args.question}")
+        get_mcp_manager().payload_stats(reset=True)
+        llm_before, sink_before = llm.stats(), sink.stats()
+
+        latencies: List[float] = []
+        results: List[Tuple[str, str]] = []
+        lock = threading.Lock()
+
+        def one(i: int) -> None:
+            start = time.perf_counter()
+            try:
+                outcome = run(f"{args.question} #{i}")
+            except Exception as e:
+                outcome = ("", f"exception: {e}")
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                results.append(outcome)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(one, range(args.runs)))
+        wall = time.perf_counter() - start
+        payloads = get_mcp_manager().payload_stats()
+    finally:
+        stop()
+        llm.stop()
+        sink.stop()
+
+    _, db, _ = get_app()
+    nodes: Dict[str, List[float]] = {}
+    for run_id, _status in results:
+        if not run_id:
+            continue
+        for span in db.get_spans(run_id):
+            nodes.setdefault(span["node"], []).append(float(span["duration_ms"]))
+    errors = [status for _, status in results if status not in ("success", "skipped")]
+    return {
+        "config": {
+            "mode": args.mode,
+            "rows": args.rows,
+            "rows_per_run": args.rows_per_run,
+            "runs": args.runs,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+            "data": "postgres" if args.data_dsn else "sqlite",
+            "transport": os.environ.get("MCP_TRANSPORT", "stdio"),
+        },
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(results) / wall, 3) if wall else 0.0,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "latency_ms": _summary(latencies),
+        "nodes_ms": {node: _summary(values) for node, values in sorted(nodes.items())},
+        "peak_rss_mb": _peak_rss_mb(),
+        "mcp_payloads": {
+            tool: dict(s, avg_bytes=round(s["bytes"] / s["calls"]) if s["calls"] else 0)
+            for tool, s in sorted(payloads.items())
+        },
+        "llm_stub": _delta(llm.stats(), llm_before),
+        "sendgrid_sink": _delta(sink.stats(), sink_before),
+    }
+
+
+def _delta(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {k: after[k] - before.get(k, 0) for k in after}
+
+
+def _gated_metrics(report: Dict[str, Any]) -> Dict[str, Tuple[float, bool]]:
+    metrics: Dict[str, Tuple[float, bool]] = {}
+    for path, higher_better in _GATED:
+        value: Any = report
+        for key in path:
+            value = (value or {}).get(key)
+        if value is not None:
+            metrics[".".join(path)] = (float(value), higher_better)
+    for node, summary in (report.get("nodes_ms") or {}).items():
+        metrics[f"nodes_ms.{node}.p95"] = (float(summary["p95"]), False)
+    for tool, stats in (report.get("mcp_payloads") or {}).items():
+        metrics[f"mcp_payloads.{tool}.avg_bytes"] = (float(stats["avg_bytes"]), False)
+    return metrics
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float = 10.0) -> List[str]:
+    """Regressions of `report` against `baseline` beyond `tolerance` (a fraction).
+
+    Millisecond metrics must also move by at least `min_delta_ms`, so jitter on
+    near-instant nodes does not fail the check.
+    """
+    regressions = []
+    if report.get("errors", 0) > baseline.get("errors", 0):
+        regressions.append(f"errors: {report['errors']} > baseline {baseline.get('errors', 0)}")
+    current = _gated_metrics(report)
+    for name, (base, higher_better) in _gated_metrics(baseline).items():
+        if name not in current or base <= 0:
+            continue
+        value = current[name][0]
+        change = (value - base) / base
+        if "_ms" in name and abs(value - base) < min_delta_ms:
+            continue
+        if (higher_better and change < -tolerance) or (not higher_better and change > tolerance):
+            regressions.append(f"{name}: {value:g} vs baseline {base:g} ({change:+.0%})")
+    return regressions
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    cfg = report["config"]
+    lat = report["latency_ms"]
+    print(f"[Bench] {cfg['runs']} runs ({cfg['mode']}, concurrency {cfg['concurrency']}, "
+          f"{cfg['rows_per_run']} rows/run of {cfg['rows']}, {cfg['data']}, {cfg['transport']})")
+    print(f"[Bench] throughput {report['throughput_rps']} runs/s, errors {report['errors']}, "
+          f"latency p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms, peak RSS {report['peak_rss_mb']} MB")
+    if report["error_samples"]:
+        print(f"[Bench] error statuses: {report['error_samples']}")
+    for node, s in report["nodes_ms"].items():
+        print(f"[Bench]   {node:<12} n={s['count']:<5} p50 {s['p50']:>9} ms  p95 {s['p95']:>9} ms  p99 {s['p99']:>9} ms")
+    for tool, s in report["mcp_payloads"].items():
+        print(f"[Bench]   {tool:<20} calls {s['calls']:<6} avg {s['avg_bytes']} B  max {s['max_bytes']} B")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end load and latency benchmark")
+    parser.add_argument("--mode", choices=["direct", "http"], default="direct",
+                        help="direct: main.run_once; http: POST /run on an in-process uvicorn")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2, help="runs before measuring (not counted)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows in the generated bench_sales table")
+    parser.add_argument("--rows-per-run", type=int, default=500, help="rows each run fetches (DB_AGENT_ROW_LIMIT)")
+    parser.add_argument("--sql", default="", help="SQL returned by the LLM stub (default: SELECT * ... LIMIT rows-per-run)")
+    parser.add_argument("--question", default="Show sales by category")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds the LLM stub waits per completion")
+    parser.add_argument("--sqlite-path", default=os.path.join("benchmarks", ".data", "bench.db"))
+    parser.add_argument("--data-dsn", default="", help="generate the dataset in this Postgres instead of SQLite")
+    parser.add_argument("--store-dsn", default="", help="app-store Postgres (default: SUPABASE_POOLER_DSN)")
+    parser.add_argument("--transport", choices=["stdio", "inprocess"], default="", help="MCP_TRANSPORT override")
+    parser.add_argument("--single-flight", action="store_true", help="keep RUN_SINGLE_FLIGHT on")
+    parser.add_argument("--output", default="", help="write the JSON report here")
+    parser.add_argument("--baseline", default="", help="fail when the report regresses against this report")
+    parser.add_argument("--save-baseline", default="", help="store the report as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (fraction, default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0,
+                        help="ignore latency changes smaller than this many ms (default 10)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    _print_report(report)
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] Report written to {path}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("[Bench] Warning: baseline was recorded with a different configuration")
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"[Bench] {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"[Bench]   {line}")
+            return 1
+        print("[Bench] No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Micro-benchmarks for the rendering and export hot paths in utils/.
+
+Times csv_utils.write_csv_rows, chart_utils.make_bar_chart_from_rows,
+pdf_utils.create_pdf_summary and the SendGrid message build (attachment
+base64 encoding plus the JSON body sg.send() would post) over synthetic,
+seeded datasets:
+
+- numeric:     numeric-heavy rows (ids, counts, amounts)
+- wide:        many columns (--columns)
+- text:        long free-text values (--width characters)
+- categorical: a high-cardinality category column
+
+Each case reports wall time (median and min over --repeat runs) and, from a
+separate traced run, peak traced memory and the blocks still allocated after the call.
+Artifacts are written to a temporary directory.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --rows 1000 10000 100000 --only csv chart
+    python -m benchmarks.micro --output micro.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils import chart_utils, csv_utils, pdf_utils, sendgrid_utils
+
+SHAPES = ("numeric", "wide", "text", "categorical")
+FUNCTIONS = ("csv", "chart", "pdf", "email")
+
+
+def numeric_rows(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    return [
+        {"id": i, "region": rnd.choice("NSEW"), "quantity": rnd.randint(1, 500),
+         "price": round(rnd.uniform(1, 999), 2), "discount": round(rnd.random(), 4),
+         "amount": round(rnd.uniform(10, 50000), 2)}
+        for i in range(count)
+    ]
+
+
+def wide_rows(count: int, columns: int = 50, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    names = [f"col_{c:03d}" for c in range(columns)]
+    return [
+        {name: (rnd.randint(0, 1000) if c % 3 else rnd.choice(("alpha", "beta", "gamma", "delta")))
+         for c, name in enumerate(names)}
+        for _ in range(count)
+    ]
+
+
+def text_rows(count: int, width: int = 200, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    alphabet = string.ascii_letters + "      "
+    return [
+        {"id": i, "status": rnd.choice(("open", "closed", "pending")),
+         "title": "".join(rnd.choices(alphabet, k=max(1, width // 4))),
+         "body": "".join(rnd.choices(alphabet, k=width))}
+        for i in range(count)
+    ]
+
+
+def categorical_rows(count: int, cardinality: int = 10000, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    return [
+        {"customer": f"customer-{rnd.randrange(cardinality):06d}", "segment": rnd.choice(("smb", "mid", "ent")),
+         "amount": round(rnd.uniform(10, 5000), 2)}
+        for _ in range(count)
+    ]
+
+
+def make_rows(shape: str, count: int, columns: int, width: int, seed: int) -> List[Dict[str, Any]]:
+    if shape == "numeric":
+        return numeric_rows(count, seed)
+    if shape == "wide":
+        return wide_rows(count, columns, seed)
+    if shape == "text":
+        return text_rows(count, width, seed)
+    if shape == "categorical":
+        return categorical_rows(count, max(10, count // 4), seed)
+    raise ValueError(f"Unknown shape {shape}")
+
+
+def _case(func: str, rows: List[Dict[str, Any]], workdir: str) -> Callable[[], Any]:
+    """Zero-argument callable for one function over one dataset."""
+    if func == "csv":
+        return lambda: csv_utils.write_csv_rows(rows, file_path=os.path.join(workdir, "bench.csv"))
+    if func == "chart":
+        return lambda: chart_utils.make_bar_chart_from_rows(rows, top_k=10, title="bench")
+    if func == "pdf":
+        return lambda: pdf_utils.create_pdf_summary("bench", rows, file_path=os.path.join(workdir, "bench.pdf"))
+    if func == "email":
+        # Attachments as a run sends them: the CSV of the rows plus a PDF report
+        csv_path = csv_utils.write_csv_rows(rows, file_path=os.path.join(workdir, "attach.csv"))
+        pdf_path = pdf_utils.create_pdf_summary("bench", rows, file_path=os.path.join(workdir, "attach.pdf"))
+        attachments = [
+            {"file_path": csv_path, "mime_type": "text/csv"},
+            {"file_path": pdf_path, "mime_type": "application/pdf"},
+        ]
+
+        def build() -> int:
+            message = sendgrid_utils.build_message("bench", "bench", ["to@example.com"], "from@example.com", attachments)
+            return len(json.dumps(message.get()))
+        return build
+    raise ValueError(f"Unknown function {func}")
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Wall time over `repeat` runs, then one traced run for allocations."""
+    fn()  # warm imports, fonts and caches
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    grown = sum(max(0, stat.count_diff) for stat in after.compare_to(before, "filename"))
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kb": round(peak / 1024, 1),
+        "blocks_retained": grown,
+    }
+
+
+def iter_cases(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    for shape in args.shapes:
+        for count in args.rows:
+            rows = make_rows(shape, count, args.columns, args.width, args.seed)
+            for func in args.only:
+                yield {"function": func, "shape": shape, "rows": count, "data": rows}
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-micro-") as workdir:
+        # chart_utils writes under ./artifacts; keep benchmark output out of the repo
+        os.chdir(workdir)
+        try:
+            for case in iter_cases(args):
+                stats = measure(_case(case["function"], case["data"], workdir), args.repeat)
+                cols = len(case["data"][0]) if case["data"] else 0
+                result = {"function": case["function"], "shape": case["shape"], "rows": case["rows"],
+                          "columns": cols, **stats}
+                results.append(result)
+                print(f"[Micro] {result['function']:<6} {result['shape']:<12} rows={result['rows']:<8} "
+                      f"cols={cols:<4} median {result['median_ms']:>10} ms  min {result['min_ms']:>10} ms  "
+                      f"peak {result['peak_kb']:>10} KiB  retained blocks {result['blocks_retained']}")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for utils rendering and export")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--only", nargs="+", choices=FUNCTIONS, default=list(FUNCTIONS))
+    parser.add_argument("--columns", type=int, default=50, help="columns of the wide shape")
+    parser.add_argument("--width", type=int, default=200, help="characters per text value")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "output"}, "results": results}, f, indent=2)
+        print(f"[Micro] Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
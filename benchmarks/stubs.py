@@ -0,0 +1,194 @@
+"""Local stand-ins for the external services a run touches.
+
+- StubOpenAI: an OpenAI-compatible /v1/chat/completions endpoint that answers
+  with a fixed SQL query after a configurable latency.
+- SendGridSink: accepts /v3/mail/send like SendGrid and only counts requests.
+- make_sqlite_dataset / make_postgres_dataset: a synthetic `bench_sales` table.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+TABLE = "bench_sales"
+REGIONS = ["north", "south", "east", "west", "central"]
+CATEGORIES = ["hardware", "software", "services", "support", "training", "licenses", "cloud", "devices"]
+_COLUMNS = "id, sale_date, region, category, customer, quantity, amount"
+
+
+class _StubServer:
+    """ThreadingHTTPServer on a free local port, served from a daemon thread."""
+
+    def __init__(self, handler: type):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self  # type: ignore[attr-defined]
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "bytes_received": self.bytes_received}
+
+    def start(self) -> "_StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # keep benchmark output clean
+        pass
+
+    def _body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.stub.count(len(body))  # type: ignore[attr-defined]
+        return body
+
+    def _reply(self, status: int, payload: Optional[Dict[str, Any]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+
+class _OpenAIHandler(_Handler):
+    def do_POST(self) -> None:
+        self._body()
+        stub: StubOpenAI = self.server.stub  # type: ignore[attr-defined]
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._reply(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        if stub.latency:
+            time.sleep(stub.latency)
+        self._reply(200, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": stub.sql}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+class StubOpenAI(_StubServer):
+    """OpenAI stand-in; point the SDK at it with OPENAI_BASE_URL=<url>/v1."""
+
+    def __init__(self, sql: str, latency: float = 0.0):
+        super().__init__(_OpenAIHandler)
+        self.sql = sql
+        self.latency = latency
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+
+class _SendGridHandler(_Handler):
+    def do_POST(self) -> None:
+        self._body()
+        self._reply(202)
+
+
+class SendGridSink(_StubServer):
+    """SendGrid stand-in; point the app at it with SENDGRID_API_HOST=<url>."""
+
+    def __init__(self) -> None:
+        super().__init__(_SendGridHandler)
+
+
+def _rows(count: int, seed: int = 7) -> Iterator[Tuple[Any, ...]]:
+    rnd = random.Random(seed)
+    start = date(2024, 1, 1)
+    for i in range(1, count + 1):
+        yield (
+            i,
+            (start + timedelta(days=rnd.randrange(730))).isoformat(),
+            rnd.choice(REGIONS),
+            rnd.choice(CATEGORIES),
+            f"customer-{rnd.randrange(max(1, count // 20))}",
+            rnd.randint(1, 50),
+            round(rnd.uniform(5, 5000), 2),
+        )
+
+
+def _batches(count: int, size: int = 50000) -> Iterator[list]:
+    it = _rows(count)
+    while True:
+        batch = [row for _, row in zip(range(size), it)]
+        if not batch:
+            return
+        yield batch
+
+
+def make_sqlite_dataset(path: str, rows: int) -> str:
+    """Create (or reuse, when it already has `rows` rows) a SQLite bench_sales table."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        try:
+            if conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0] == rows:
+                return path
+        except sqlite3.OperationalError:
+            pass
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(
+            f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, sale_date TEXT, region TEXT, category TEXT, "
+            "customer TEXT, quantity INTEGER, amount REAL)"
+        )
+        for batch in _batches(rows):
+            conn.executemany(f"INSERT INTO {TABLE} ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def make_postgres_dataset(dsn: str, rows: int) -> str:
+    """Create (or reuse) a Postgres bench_sales table; returns the DSN."""
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s)", (TABLE,))
+            if cur.fetchone()[0]:
+                cur.execute(f"SELECT COUNT(*) FROM {TABLE}")
+                if cur.fetchone()[0] == rows:
+                    return dsn
+            cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cur.execute(
+                f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, sale_date DATE, region TEXT, category TEXT, "
+                "customer TEXT, quantity INTEGER, amount NUMERIC(12, 2))"
+            )
+            for batch in _batches(rows):
+                execute_values(cur, f"INSERT INTO {TABLE} ({_COLUMNS}) VALUES %s", batch, page_size=5000)
+    finally:
+        conn.close()
+    return dsn
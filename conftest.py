@@ -0,0 +1,62 @@
+"""pytest setup for the unit tests (test_*.py in the project root).
+
+The older test_*.py scripts drive a running backend and are run directly
+(`python test_app_flow.py`), so pytest does not collect them. Tests that
+need the app-store Postgres (SUPABASE_POOLER_DSN / PG*) skip when it is not
+reachable; run with `python -m pytest -q`.
+"""
+import pytest
+
+collect_ignore = ["test_app_flow.py", "test_mcp_integration.py", "test_supabase_mcp.py"]
+
+
+@pytest.fixture(scope="session")
+def app_db():
+    """The process-wide app-store Database (skips the test without Postgres)."""
+    try:
+        from main import get_app
+        _, db, _ = get_app()
+    except Exception as e:
+        pytest.skip(f"App-store Postgres not available: {e}")
+    return db
+
+
+@pytest.fixture(scope="session")
+def _queue_store(app_db):
+    """A Database whose tables live in a private schema, so queue tests see only their own jobs."""
+    import psycopg2.extensions
+    from app import database
+
+    with app_db._conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DROP SCHEMA IF EXISTS pytest_queue CASCADE; CREATE SCHEMA pytest_queue")
+    dsn = psycopg2.extensions.make_dsn(app_db._dsn, options="-c search_path=pytest_queue")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, "_pg_dsn_from_settings", lambda: dsn)
+        db = database.Database()
+    yield db
+    db.close()
+    with app_db._conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DROP SCHEMA pytest_queue CASCADE")
+
+
+@pytest.fixture
+def queue_db(_queue_store):
+    """Empty run_jobs/runs tables in the private test schema."""
+    with _queue_store._conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE run_jobs, runs")
+    return _queue_store
+
+
+@pytest.fixture(scope="session")
+def pipeline(app_db, tmp_path_factory):
+    """MCP servers started and run overrides for a small bench_sales table in a temporary SQLite file."""
+    from benchmarks.stubs import TABLE, make_sqlite_dataset
+    from mcp_client import cleanup_mcp_sync, initialize_mcp_sync
+
+    path = make_sqlite_dataset(str(tmp_path_factory.mktemp("data") / "sales.db"), 200)
+    initialize_mcp_sync()
+    yield {"DATA_DB_TYPE": "sqlite", "DATA_NAME": path, "DATA_TABLE": TABLE}
+    cleanup_mcp_sync()
@@ -1,21 +1,41 @@
-from typing import TypedDict, List, Dict, Any, Optional
+import asyncio
+import json
+import threading
+import time
+from typing import Annotated, TypedDict, List, Dict, Any, Optional, Tuple
 from typing import Any as _Any
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, END, START
 from uuid import uuid4
-from dataclasses import replace
 
-from app.config import settings
+from app.config import settings, with_overrides
 from app.database import Database
+from app.checkpoints import PostgresCheckpointSaver
 from app.logging_utils import JsonSqlLogger
+from app import timing
+from app.single_flight import SingleFlight, run_key
+from app.batch import BatchContext
+from app.run_events import node_event, run_events
+from app.row_store import row_store
+from utils import db_utils
 from agents import nlp_agent, email_agent, orchestrator, supervisor, csv_agent, db_agent, report_agent, memory_agent
 
 
+def merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer for keys written by parallel branches in the same step."""
+    return {**(left or {}), **(right or {})}
+
+
 class AppState(TypedDict, total=False):
     run_id: str
     user_input: str
     query: str
-    data: List[Dict[str, Any]]
-    artifacts: Dict[str, str]
+    # Query result rows live in the run-scoped row store; state carries the handle
+    rows_handle: str
+    row_count: int
+    artifacts: Annotated[Dict[str, str], merge_dicts]
+    # Results of the parallel csv/report branches, keyed by node name
+    branch_results: Annotated[Dict[str, Dict[str, Any]], merge_dicts]
     user_id: str
     memory_messages: List[Dict[str, Any]]
     last_node: str
@@ -25,12 +45,39 @@ class AppState(TypedDict, total=False):
     status: str
 
 
+def run_settings(config: Optional[RunnableConfig], default=settings):
+    """Per-run settings passed as config["configurable"]["settings"]."""
+    return ((config or {}).get("configurable") or {}).get("settings") or default
+
+
 def build_app(cfg=settings) -> _Any:
     db = Database(cfg.DB_PATH)
     logger = JsonSqlLogger(db, cfg.LOG_FILE)
 
-    def memory_load_node(state: AppState) -> AppState:
-        res = memory_agent.load(state, cfg, logger)
+    # Nodes read connection/email settings from the run config, so one compiled
+    # graph serves every request; cfg is only the fallback
+    def agent_node(name: str, run, arun, updates):
+        """Node with a sync (invoke) and async (ainvoke) implementation sharing one state update."""
+        def node(state: AppState, config: RunnableConfig) -> AppState:
+            with timing.node_span(state.get("run_id", ""), name) as span:
+                res = run(state, run_settings(config, cfg), logger)
+                span.status = res.get("status")
+            return updates(state, res)
+
+        async def anode(state: AppState, config: RunnableConfig) -> AppState:
+            s = run_settings(config, cfg)
+            batch: Optional[BatchContext] = ((config or {}).get("configurable") or {}).get("batch")
+            with timing.node_span(state.get("run_id", ""), name) as span:
+                if batch is not None:
+                    res = await batch.run_node(name, state, s, lambda: arun(state, s, logger))
+                else:
+                    res = await arun(state, s, logger)
+                span.status = res.get("status")
+            return updates(state, res)
+
+        return RunnableLambda(node, afunc=anode, name=name)
+
+    def memory_load_updates(state: AppState, res: Dict[str, Any]) -> AppState:
         updates: AppState = {
             "memory_messages": (res.get("data") or {}).get("messages") or [],
             "last_node": "memory_load",
@@ -39,29 +86,28 @@ def build_app(cfg=settings) -> _Any:
         }
         return updates
 
-    def nlp_node(state: AppState) -> AppState:
-        res = nlp_agent.run(state, cfg, logger)
+    def nlp_updates(state: AppState, res: Dict[str, Any]) -> AppState:
         updates: AppState = {
             "query": (res.get("data") or {}).get("query"),
-            "data": (res.get("data") or {}).get("rows"),
             "last_node": "nlp",
             "last_result": res,
             "status": res.get("status"),
         }
         return updates
 
-    def csv_node(state: AppState) -> AppState:
-        res = csv_agent.run(state, cfg, logger)
-        artifacts = dict(state.get("artifacts") or {})
+    # csv and report run in the same step, so they only write reducer keys;
+    # the artifacts join node reports their combined result to the supervisor
+    def csv_updates(state: AppState, res: Dict[str, Any]) -> AppState:
+        artifacts: Dict[str, str] = {}
         csv_path = (res.get("data") or {}).get("csv_path")
         if csv_path:
             artifacts["csv_path"] = csv_path
-        return {"artifacts": artifacts, "last_node": "csv", "last_result": res, "status": res.get("status")}
+        return {"artifacts": artifacts, "branch_results": {"csv": res}}
 
-    def db_node(state: AppState) -> AppState:
-        res = db_agent.run(state, cfg, logger)
+    def db_updates(state: AppState, res: Dict[str, Any]) -> AppState:
         updates: AppState = {
-            "data": (res.get("data") or {}).get("rows"),
+            "rows_handle": (res.get("data") or {}).get("rows_handle"),
+            "row_count": (res.get("data") or {}).get("row_count") or 0,
             "query": (res.get("data") or {}).get("query_used") or state.get("query"),
             "last_node": "db",
             "last_result": res,
@@ -69,70 +115,180 @@ def build_app(cfg=settings) -> _Any:
         }
         return updates
 
-    def email_node(state: AppState) -> AppState:
-        res = email_agent.run(state, cfg, logger)
-        artifacts = dict(state.get("artifacts") or {})
-        return {"artifacts": artifacts, "last_node": "email", "last_result": res, "status": res.get("status")}
+    def email_updates(state: AppState, res: Dict[str, Any]) -> AppState:
+        return {"last_node": "email", "last_result": res, "status": res.get("status")}
 
-    def report_node(state: AppState) -> AppState:
-        res = report_agent.run(state, cfg, logger)
-        artifacts = dict(state.get("artifacts") or {})
+    def report_updates(state: AppState, res: Dict[str, Any]) -> AppState:
+        artifacts: Dict[str, str] = {}
         pdf_path = (res.get("data") or {}).get("pdf_path")
         if pdf_path:
             artifacts["pdf_path"] = pdf_path
-        return {"artifacts": artifacts, "last_node": "report", "last_result": res, "status": res.get("status")}
+        return {"artifacts": artifacts, "branch_results": {"report": res}}
 
-    def memory_save_node(state: AppState) -> AppState:
-        res = memory_agent.save(state, cfg, logger)
+    def artifacts_node(state: AppState) -> AppState:
+        with timing.node_span(state.get("run_id", ""), "artifacts") as span:
+            branches = state.get("branch_results") or {}
+            failed = [name for name, res in branches.items() if res.get("status") not in ("success", "skipped")]
+            res = {"status": "error" if failed else "success", "data": {"branches": branches}, "log": {"failed": failed}}
+            span.status = res["status"]
+        return {"last_node": "artifacts", "last_result": res, "status": res.get("status")}
+
+    def memory_save_updates(state: AppState, res: Dict[str, Any]) -> AppState:
         return {"last_node": "memory_save", "last_result": res, "status": res.get("status")}
 
-    def supervisor_node(state: AppState) -> AppState:
+    def supervise(state: AppState) -> Tuple[AppState, Dict[str, Any]]:
         ok, reason = supervisor.check(state.get("last_node"), state.get("last_result"))
-        logger.info(state["run_id"], "supervisor", "check", {"ok": ok, "reason": reason, "after": state.get("last_node")})
         route = orchestrator.decide_next(state.get("last_node"), state)
         if not ok:
             route = "end"
-        return {"supervisor_ok": ok, "route": route}
+        return {"supervisor_ok": ok, "route": route}, {"ok": ok, "reason": reason, "after": state.get("last_node")}
+
+    def supervisor_node(state: AppState) -> AppState:
+        with timing.node_span(state["run_id"], "supervisor") as span:
+            updates, check = supervise(state)
+            # Passing checks are routine (one per node) and may be dropped under LOG_OVERFLOW=drop-debug
+            logger.log(state["run_id"], "INFO" if not check["ok"] else "DEBUG", "supervisor", "check", check)
+            span.status = check["reason"]
+        return updates
+
+    async def asupervisor_node(state: AppState) -> AppState:
+        with timing.node_span(state["run_id"], "supervisor") as span:
+            updates, check = supervise(state)
+            await logger.alog(state["run_id"], "INFO" if not check["ok"] else "DEBUG", "supervisor", "check", check)
+            span.status = check["reason"]
+        return updates
 
     def route_after_supervisor(state: AppState):
-        return state.get("route") or "end"
+        route = state.get("route") or "end"
+        if route == "artifacts":
+            return list(orchestrator.PARALLEL_BRANCHES)
+        return route
 
     graph = StateGraph(AppState)
-    graph.add_node("memory_load", memory_load_node)
-    graph.add_node("nlp", nlp_node)
-    graph.add_node("db", db_node)
-    graph.add_node("csv", csv_node)
-    graph.add_node("report", report_node)
-    graph.add_node("email", email_node)
-    graph.add_node("memory_save", memory_save_node)
-    graph.add_node("supervisor", supervisor_node)
+    graph.add_node("memory_load", agent_node("memory_load", memory_agent.load, memory_agent.aload, memory_load_updates))
+    graph.add_node("nlp", agent_node("nlp", nlp_agent.run, nlp_agent.arun, nlp_updates))
+    graph.add_node("db", agent_node("db", db_agent.run, db_agent.arun, db_updates))
+    graph.add_node("csv", agent_node("csv", csv_agent.run, csv_agent.arun, csv_updates))
+    graph.add_node("report", agent_node("report", report_agent.run, report_agent.arun, report_updates))
+    graph.add_node("artifacts", artifacts_node)
+    graph.add_node("email", agent_node("email", email_agent.run, email_agent.arun, email_updates))
+    graph.add_node("memory_save", agent_node("memory_save", memory_agent.save, memory_agent.asave, memory_save_updates))
+    graph.add_node("supervisor", RunnableLambda(supervisor_node, afunc=asupervisor_node, name="supervisor"))
     graph.add_edge(START, "memory_load")
     graph.add_edge("memory_load", "supervisor")
     graph.add_edge("nlp", "supervisor")
     graph.add_conditional_edges("supervisor", route_after_supervisor, {"nlp": "nlp", "db": "db", "csv": "csv", "report": "report", "email": "email", "memory_save": "memory_save", "end": END})
     graph.add_edge("db", "supervisor")
-    graph.add_edge("csv", "supervisor")
-    graph.add_edge("report", "supervisor")
+    # Fan in: artifacts waits for both branches
+    graph.add_edge(list(orchestrator.PARALLEL_BRANCHES), "artifacts")
+    graph.add_edge("artifacts", "supervisor")
     graph.add_edge("email", "supervisor")
     graph.add_edge("memory_save", END)
-    app = graph.compile()
+    # Checkpoints let a failed run resume from the node that failed (resume_run)
+    app = graph.compile(checkpointer=PostgresCheckpointSaver(db) if cfg.RUN_CHECKPOINTS else None)
     return app, db, logger
 
 
-def run_once(question: str, overrides: Optional[Dict[str, Any]] = None, user_id: str = "default") -> Dict[str, Any]:
-    cfg = settings
-    if overrides:
-        try:
-            cfg = replace(settings, **{k: v for k, v in overrides.items() if hasattr(settings, k)})
-        except Exception:
-            pass
-    app, db, logger = build_app(cfg)
-    run_id = str(uuid4())
-    db.start_run(run_id, question)
+_runtime: Optional[Tuple[_Any, Database, JsonSqlLogger]] = None
+_runtime_lock = threading.Lock()
+
+
+def get_app() -> Tuple[_Any, Database, JsonSqlLogger]:
+    """Compiled graph, database and logger, built once per process."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = build_app(settings)
+    return _runtime
+
+
+def _new_run(question: str, overrides: Optional[Dict[str, Any]], user_id: str,
+             run_id: Optional[str] = None, batch: Optional[BatchContext] = None) -> Tuple[str, AppState, RunnableConfig]:
+    run_id = run_id or str(uuid4())
     initial: AppState = {"run_id": run_id, "user_input": question, "artifacts": {}, "user_id": user_id}
-    out = app.invoke(initial)
+    config = _run_config(run_id, overrides, user_id)
+    if batch is not None:
+        config["configurable"]["batch"] = batch
+    return run_id, initial, config
+
+
+# Override keys that carry credentials (DATA_PASSWORD, DATA_DSN, SENDGRID_API_KEY, ...)
+_SECRET_SUFFIXES = ("PASSWORD", "_DSN", "API_KEY", "SECRET", "TOKEN")
+
+
+def _is_secret(key: str) -> bool:
+    return key.upper().endswith(_SECRET_SUFFIXES)
+
+
+def _run_config(run_id: str, overrides: Optional[Dict[str, Any]], user_id: str) -> RunnableConfig:
+    # thread_id keys the run's checkpoints; metadata is stored with each checkpoint
+    # so a resumed run gets the same overrides. Credentials are not stored, only
+    # their names: a resume has to be given them again
+    overrides = overrides or {}
+    stored = {k: v for k, v in overrides.items() if not _is_secret(k)}
+    secrets = sorted(k for k in overrides if _is_secret(k))
+    return {
+        "configurable": {"settings": with_overrides(overrides), "thread_id": run_id},
+        "metadata": {
+            "run_overrides": json.dumps(stored, default=str),
+            "run_secrets": json.dumps(secrets),
+            "user_id": user_id,
+        },
+    }
+
+
+def run_summary(out: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing result of a run (also stored on the runs row)."""
+    preview = out.get("preview")
+    if preview is None:
+        preview = _preview(out.get("rows_handle"))
+    return {
+        "status": out.get("status") or "success",
+        "artifacts": out.get("artifacts", {}),
+        "preview": preview,
+        "query": out.get("query"),
+    }
+
+
+def _preview(handle: Optional[str]) -> List[Dict[str, Any]]:
+    if not handle:
+        return []
+    try:
+        return row_store.get(handle).head(5)
+    except KeyError:
+        return []
+
+
+def _release_rows(run_id: str, failed: bool) -> None:
+    # A failed run keeps its rows (spilled to disk) so a resume can reuse them
+    try:
+        row_store.release_run(run_id, keep=failed and settings.RUN_CHECKPOINTS)
+    except Exception as e:
+        print(f"[Main] Could not release rows for {run_id}: {e}")
+
+
+def _save_spans(db: Database, run_id: str, spans: List[Dict[str, Any]]) -> None:
+    # Timing is diagnostics only; never fail a finished run over it
+    try:
+        db.insert_spans(run_id, spans)
+    except Exception as e:
+        print(f"[Main] Could not save timing spans for {run_id}: {e}")
+
+
+def _finish(db: Database, run_id: str, out: Dict[str, Any], spans: List[Dict[str, Any]]) -> Dict[str, Any]:
     status = out.get("status") or "success"
-    db.finish_run(run_id, status)
+    # The preview is taken before the run's rows are released
+    out["preview"] = _preview(out.get("rows_handle"))
+    db.finish_run(run_id, status, run_summary(out))
+    _release_rows(run_id, out.get("supervisor_ok") is False)
+    _save_spans(db, run_id, spans)
+    # Only failed runs are resumable; drop the checkpoints of runs that went through
+    if settings.RUN_CHECKPOINTS and out.get("supervisor_ok") is not False:
+        try:
+            db.delete_checkpoints(run_id)
+        except Exception as e:
+            print(f"[Main] Could not drop checkpoints for {run_id}: {e}")
     # include run_id for clients
     try:
         out["run_id"] = run_id  # type: ignore[index]
@@ -141,6 +297,286 @@ def run_once(question: str, overrides: Optional[Dict[str, Any]] = None, user_id:
     return out
 
 
+# Graph runs are streamed: "tasks" chunks become progress events (GET /runs/{run_id}/events),
+# the last "values" chunk is the final state
+STREAM_MODES = ["tasks", "values"]
+
+
+def _on_chunk(run_id: str, mode: str, chunk: Any, out: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if mode == "values":
+        return chunk
+    event = node_event(chunk)
+    if event is not None:
+        run_events.publish(run_id, *event)
+    return out
+
+
+def _invoke(run_id: str, question: str, payload: Optional[AppState], config: RunnableConfig) -> Dict[str, Any]:
+    app, db, logger = get_app()
+    db.start_run(run_id, question)
+    run_events.start(run_id, {"question": question, "resumed": payload is None})
+    out: Optional[Dict[str, Any]] = None
+    try:
+        for mode, chunk in app.stream(payload, config=config, stream_mode=STREAM_MODES):
+            out = _on_chunk(run_id, mode, chunk, out)
+    except Exception as e:
+        _release_rows(run_id, True)
+        db.finish_run(run_id, "error", {"status": "error", "error": str(e)})
+        run_events.finish(run_id, {"status": "error", "error": str(e)})
+        raise
+    finally:
+        spans = timing.pop_run(run_id)
+    out = _finish(db, run_id, out or {}, spans)
+    run_events.finish(run_id, run_summary(out))
+    return out
+
+
+async def _ainvoke(run_id: str, question: str, payload: Optional[AppState], config: RunnableConfig) -> Dict[str, Any]:
+    app, db, logger = _runtime or await asyncio.to_thread(get_app)
+    await asyncio.to_thread(db.start_run, run_id, question)
+    run_events.start(run_id, {"question": question, "resumed": payload is None})
+    out: Optional[Dict[str, Any]] = None
+    try:
+        async for mode, chunk in app.astream(payload, config=config, stream_mode=STREAM_MODES):
+            out = _on_chunk(run_id, mode, chunk, out)
+    except Exception as e:
+        await asyncio.to_thread(_release_rows, run_id, True)
+        await asyncio.to_thread(db.finish_run, run_id, "error", {"status": "error", "error": str(e)})
+        run_events.finish(run_id, {"status": "error", "error": str(e)})
+        raise
+    finally:
+        spans = timing.pop_run(run_id)
+    out = await asyncio.to_thread(_finish, db, run_id, out or {}, spans)
+    run_events.finish(run_id, run_summary(out))
+    return out
+
+
+def _execute_run(question: str, overrides: Optional[Dict[str, Any]], user_id: str,
+                 run_id: Optional[str]) -> Dict[str, Any]:
+    run_id, initial, config = _new_run(question, overrides, user_id, run_id)
+    return _invoke(run_id, question, initial, config)
+
+
+async def _aexecute_run(question: str, overrides: Optional[Dict[str, Any]], user_id: str,
+                        run_id: Optional[str], batch: Optional[BatchContext] = None) -> Dict[str, Any]:
+    run_id, initial, config = _new_run(question, overrides, user_id, run_id, batch)
+    return await _ainvoke(run_id, question, initial, config)
+
+
+def _resume_point(run_id: str, check_status: bool = True,
+                  secrets: Optional[Dict[str, Any]] = None) -> Tuple[str, RunnableConfig]:
+    """Question and config (checkpoint taken just before the failed node) for resuming a run.
+
+    `secrets` supplies the credential overrides the run was started with (they
+    are not checkpointed). Raises LookupError when there is nothing stored for
+    the run and ValueError when it cannot be resumed.
+    """
+    if not settings.RUN_CHECKPOINTS:
+        raise ValueError("Checkpoints are disabled (RUN_CHECKPOINTS=false)")
+    app, db, logger = get_app()
+    run = db.get_run(run_id)
+    if run is None:
+        raise LookupError(f"Unknown run {run_id}")
+    if check_status and run["status"] in ("queued", "running"):
+        raise ValueError(f"Run {run_id} is {run['status']}")
+    thread: RunnableConfig = {"configurable": {"thread_id": run_id}}
+    latest = app.get_state(thread)
+    if not latest.values:
+        raise LookupError(f"No checkpoints stored for run {run_id}")
+    if latest.next:
+        # The run stopped mid-step (a node raised); pick up where it stopped
+        point = latest
+    else:
+        if latest.values.get("supervisor_ok") is not False:
+            raise ValueError(f"Run {run_id} completed; nothing to resume")
+        failed = latest.values.get("last_node")
+        # A failed join re-runs the parallel branches it joined
+        targets = set(orchestrator.PARALLEL_BRANCHES) if failed == "artifacts" else {failed}
+        point = next((snap for snap in app.get_state_history(thread) if targets & set(snap.next)), None)
+        if point is None:
+            raise LookupError(f"No checkpoint before node {failed} for run {run_id}")
+    point = _with_rows(app, thread, point, run_id)
+    meta = point.metadata or {}
+    overrides = json.loads(meta.get("run_overrides") or "{}")
+    needed = json.loads(meta.get("run_secrets") or "[]")
+    missing = [k for k in needed if not (secrets or {}).get(k)]
+    if missing:
+        raise ValueError(f"Run {run_id} used credentials that are not stored ({', '.join(missing)}); pass them again to resume")
+    overrides.update({k: secrets[k] for k in needed})
+    config = _run_config(run_id, overrides, meta.get("user_id") or run.get("user_id") or "default")
+    config["configurable"].update(point.config["configurable"])
+    logger.info(run_id, "resume", "run_resumed", {"next": list(point.next), "checkpoint_id": point.config["configurable"]["checkpoint_id"]})
+    return run["user_input"], config
+
+
+def _with_rows(app: _Any, thread: RunnableConfig, point: _Any, run_id: str) -> _Any:
+    """`point`, or the checkpoint before db when the rows it needs are gone.
+
+    Checkpoints only hold the rows handle; the rows themselves are local to the
+    process that fetched them (or were purged), so a resume elsewhere re-queries.
+    """
+    handle = point.values.get("rows_handle")
+    if not handle or "db" in point.next:
+        return point
+    try:
+        row_store.get(handle)
+        return point
+    except KeyError:
+        pass
+    before_db = next((snap for snap in app.get_state_history(thread) if "db" in snap.next), None)
+    if before_db is None:
+        raise LookupError(f"Rows of run {run_id} are gone and there is no checkpoint before db")
+    print(f"[Main] Rows {handle} of run {run_id} are not available here; resuming from db")
+    return before_db
+
+
+def resume_run(run_id: str, check_status: bool = True, secrets: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Re-run a failed run from the node that failed, reusing the stored state, rows and artifacts.
+
+    check_status=False skips the queued/running guard (for a worker holding the job's lease).
+    secrets: the run's credential overrides (password, DSN, API keys), which are not checkpointed.
+    """
+    question, config = _resume_point(run_id, check_status, secrets)
+    return _invoke(run_id, question, None, config)
+
+
+async def aresume_run(run_id: str, check_status: bool = True, secrets: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    question, config = await asyncio.to_thread(_resume_point, run_id, check_status, secrets)
+    return await _ainvoke(run_id, question, None, config)
+
+
+# Identical runs (same user, question, connection profile and options) share one execution
+_flights = SingleFlight(settings.RUN_REUSE_TTL)
+
+
+def _flight_key(question: str, overrides: Optional[Dict[str, Any]], user_id: str) -> Optional[str]:
+    if not settings.RUN_SINGLE_FLIGHT:
+        return None
+    return run_key(question, db_utils.profile_key(with_overrides(overrides)), overrides, user_id)
+
+
+def _reuse_run(question: str, user_id: str, run_id: Optional[str], original: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    """Record a run answered by another run's result; the new run_id points to the original."""
+    _, db, logger = get_app()
+    run_id = run_id or str(uuid4())
+    original_id = original.get("run_id")
+    summary = dict(run_summary(original), reused_from=original_id)
+    db.start_run(run_id, question)
+    db.finish_run(run_id, summary["status"], summary)
+    run_events.start(run_id, {"question": question, "resumed": False})
+    run_events.finish(run_id, summary)
+    logger.info(run_id, "single_flight", f"run_{kind}", {"reused_from": original_id, "user_id": user_id, **_flights.stats()})
+    out = dict(original)
+    out["run_id"] = run_id
+    out["reused_from"] = original_id
+    return out
+
+
+def run_dedup_stats() -> Dict[str, Any]:
+    return {"enabled": settings.RUN_SINGLE_FLIGHT, "reuse_ttl": settings.RUN_REUSE_TTL, **_flights.stats()}
+
+
+def run_once(question: str, overrides: Optional[Dict[str, Any]] = None, user_id: str = "default",
+             run_id: Optional[str] = None) -> Dict[str, Any]:
+    key = _flight_key(question, overrides, user_id)
+    if key is None:
+        return _execute_run(question, overrides, user_id, run_id)
+    state, value = _flights.begin(key)
+    if state == "fresh":
+        return _reuse_run(question, user_id, run_id, value, "reused")
+    if state == "wait":
+        return _reuse_run(question, user_id, run_id, value.result(), "coalesced")
+    try:
+        out = _execute_run(question, overrides, user_id, run_id)
+    except BaseException as e:
+        _flights.finish(key, value, error=e)
+        raise
+    _flights.finish(key, value, result=out)
+    return out
+
+
+async def arun_once(question: str, overrides: Optional[Dict[str, Any]] = None, user_id: str = "default",
+                    run_id: Optional[str] = None, batch: Optional[BatchContext] = None) -> Dict[str, Any]:
+    """Async run_once(): awaits the graph on the caller's loop instead of holding a thread."""
+    key = _flight_key(question, overrides, user_id)
+    if key is None:
+        return await _aexecute_run(question, overrides, user_id, run_id, batch)
+    state, value = _flights.begin(key)
+    if state == "fresh":
+        return await asyncio.to_thread(_reuse_run, question, user_id, run_id, value, "reused")
+    if state == "wait":
+        # shield: a cancelled waiter must not cancel the leader's shared future
+        original = await asyncio.shield(asyncio.wrap_future(value))
+        return await asyncio.to_thread(_reuse_run, question, user_id, run_id, original, "coalesced")
+    try:
+        out = await _aexecute_run(question, overrides, user_id, run_id, batch)
+    except BaseException as e:
+        _flights.finish(key, value, error=e)
+        raise
+    _flights.finish(key, value, result=out)
+    return out
+
+
+async def arun_many(questions: List[str], overrides: Optional[Dict[str, Any]] = None, user_id: str = "default",
+                    concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Run many questions against one connection profile.
+
+    Runs share the compiled graph, one schema fetch and the db server's pooled
+    connections; at most `concurrency` run at once, SQL generation is bounded
+    by BATCH_LLM_CONCURRENCY and identical generated SQL executes once.
+    Results are per question, in input order.
+    """
+    concurrency = max(1, concurrency or settings.BATCH_CONCURRENCY)
+    batch = BatchContext(min(concurrency, settings.BATCH_LLM_CONCURRENCY))
+    run_cfg = with_overrides(overrides)
+    table = getattr(run_cfg, "DATA_TABLE", "")
+    if table:
+        # Load the schema once up front; every nlp node then hits the catalog cache
+        try:
+            await asyncio.to_thread(db_utils.describe_table, run_cfg, table)
+        except Exception as e:
+            print(f"[Main] Batch schema prefetch failed: {e}")
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(question: str) -> Dict[str, Any]:
+        async with slots:
+            try:
+                out = await arun_once(question, overrides=overrides, user_id=user_id, batch=batch)
+            except Exception as e:
+                return {"question": question, "status": "error", "error": str(e)}
+        result = {"question": question, "run_id": out.get("run_id"), **run_summary(out)}
+        if out.get("reused_from"):
+            result["reused_from"] = out["reused_from"]
+        return result
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(one(q) for q in questions))
+    finally:
+        batch.release()
+    stats = {
+        "questions": len(questions),
+        "succeeded": sum(1 for r in results if r["status"] == "success"),
+        "concurrency": concurrency,
+        "seconds": round(time.perf_counter() - start, 3),
+        **batch.stats(),
+    }
+    print(f"[Main] Batch finished: {stats}")
+    return {"results": results, "stats": stats}
+
+
+def run_many(questions: List[str], overrides: Optional[Dict[str, Any]] = None, user_id: str = "default",
+             concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Sync arun_many() for scripts; call arun_many() from code already on an event loop."""
+    async def _run() -> Dict[str, Any]:
+        try:
+            return await arun_many(questions, overrides, user_id, concurrency)
+        finally:
+            await nlp_agent.aclose_clients()
+
+    return asyncio.run(_run())
+
+
 if __name__ == "__main__":
     # Initialize MCP servers for standalone execution
     from mcp_client import initialize_mcp_sync, cleanup_mcp_sync
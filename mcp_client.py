@@ -3,109 +3,298 @@ MCP Client Manager
 Manages connections to internal and external MCP servers
 """
 import asyncio
+import importlib
 import json
 import os
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+import time
 from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
 
+import anyio
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_client_server_memory_streams
+from mcp.types import CONNECTION_CLOSED
+
+from app.config import settings
+from app import timing
+
+
+# Tools that are safe to repeat if the server died while handling them.
+# db.fetch_page and db.close_cursor are read-only too, but their cursor lived in
+# the dead process: a retry on the restarted server can only report an unknown
+# cursor, so callers get the connection-lost error and re-run the query instead.
+IDEMPOTENT_TOOLS = {"db.query_supabase", "db.describe_table"}
+
+# Upper bound on the wait between attempts to restart a member whose respawn failed
+RESPAWN_BACKOFF_MAX = 60.0
+
+
+def _is_dead_pipe(exc: BaseException) -> bool:
+    """Whether an exception means the server subprocess/pipe is gone."""
+    if isinstance(exc, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)):
+        return True
+    if isinstance(exc, McpError) and getattr(exc.error, "code", None) == CONNECTION_CLOSED:
+        return True
+    return False
+
+
+@asynccontextmanager
+async def inprocess_client(server):
+    """Connect to an MCP ``Server`` object in this process over memory streams.
+
+    Yields ``(read_stream, write_stream)`` like ``stdio_client`` does, but the
+    messages are handed over as objects: no subprocess, no stdio pipe and no
+    JSON-RPC framing on either side.
+    """
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(partial(
+                server.run,
+                server_streams[0],
+                server_streams[1],
+                server.create_initialization_options(),
+                raise_exceptions=False,
+            ))
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
 
 
-class MCPClientManager:
-    """Manages multiple MCP client connections."""
+class PooledSession:
+    """One live connection to an MCP server plus its in-flight call count."""
 
-    def __init__(self):
-        self.sessions: Dict[str, ClientSession] = {}
-        self.connections: Dict[str, Any] = {}  # Store connection contexts
-        self._initialized = False
+    def __init__(self, server: str, index: int, session: ClientSession, task: "asyncio.Task", stop: asyncio.Event):
+        self.server = server
+        self.index = index
+        self.session = session
+        self.task = task
+        self.stop = stop
+        self.inflight = 0
+        self.calls = 0
+        self.alive = True
+        self.replacement: Optional["asyncio.Future[None]"] = None
+        # Failed respawns in a row, and when the supervisor may try again
+        self.respawn_failures = 0
+        self.retry_at = 0.0
 
-    async def initialize(self):
-        """Initialize all MCP server connections."""
-        if self._initialized:
-            return
 
+class MCPClientManager:
+    """Manages multiple MCP client connections.
+
+    All sessions live on a single background event loop owned by the manager.
+    Async callers on other loops and sync callers from worker threads are both
+    routed onto that loop, so the stdio sessions stay warm for the life of the
+    process instead of being rebuilt per call.
+
+    Each server name maps to a pool of sessions (one subprocess each); tool
+    calls are dispatched to the least-busy member of the pool.
+
+    Internal servers use the "stdio" transport (one subprocess per session) by
+    default; "inprocess" runs their ``Server`` objects on the manager loop
+    instead, keeping the same tool surface without the stdio hop.
+    """
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None, transports: Optional[Dict[str, str]] = None):
+        self.pools: Dict[str, List[PooledSession]] = {}
+        self.pool_sizes: Dict[str, int] = {
+            "db": settings.MCP_DB_POOL_SIZE,
+            "email": settings.MCP_EMAIL_POOL_SIZE,
+        }
+        if pool_sizes:
+            self.pool_sizes.update(pool_sizes)
+        self.transports: Dict[str, str] = {
+            "db": settings.MCP_TRANSPORT,
+            "email": settings.MCP_TRANSPORT,
+        }
+        if transports:
+            self.transports.update(transports)
+        self.warm_standby = settings.MCP_WARM_STANDBY
+        self.health_check_interval = settings.MCP_HEALTH_CHECK_INTERVAL
+        self.restarts: Dict[str, int] = {}
+        # Per-tool response sizes (calls, bytes, max_bytes), for benchmarks
+        self.payloads: Dict[str, Dict[str, int]] = {}
+        self._rr: Dict[str, int] = {}
+        # Cursors live in the server process that opened them
+        self._cursor_affinity: Dict[str, PooledSession] = {}
+        self._openers: Dict[str, Callable[[], Any]] = {}
+        self._standby: Dict[str, PooledSession] = {}
+        self._standby_tasks: Dict[str, "asyncio.Task"] = {}
+        self._supervisor_task: Optional["asyncio.Task"] = None
+        self._initialized = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------
+    # Background event loop
+    # ------------------------------------------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop thread if it is not running yet."""
+        with self._thread_lock:
+            if self._loop is None or self._thread is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def _run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(started.set)
+                    loop.run_forever()
+
+                thread = threading.Thread(target=_run, name="mcp-event-loop", daemon=True)
+                thread.start()
+                started.wait()
+                self._loop = loop
+                self._thread = thread
+            return self._loop
+
+    async def _on_loop(self, coro):
+        """Await a coroutine on the manager loop from whichever loop we are on."""
+        loop = self._ensure_loop()
         try:
-            # Start internal MCP servers
-            await self._start_db_server()
-            await self._start_email_server()
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def run_sync(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the manager loop and block until it finishes."""
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run_sync() called from the MCP event loop thread; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return future.result(timeout)
+
+    def shutdown(self) -> None:
+        """Stop the background event loop thread."""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+    async def initialize(self):
+        """Initialize all MCP server connections."""
+        await self._on_loop(self._initialize())
 
-            # Note: External MCP servers (filesystem, fetch) would be configured here
-            # if they are running separately. For now, we'll handle filesystem operations
-            # directly in the agents since they're simple file operations.
+    async def _initialize(self):
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._initialized:
+                return
 
-            self._initialized = True
-            print("[MCP] All MCP servers initialized successfully")
+            try:
+                # Start internal MCP servers
+                await self._start_db_server()
+                await self._start_email_server()
+
+                # Note: External MCP servers (filesystem, fetch) would be configured here
+                # if they are running separately. For now, we'll handle filesystem operations
+                # directly in the agents since they're simple file operations.
+
+                self._initialized = True
+                if self.warm_standby:
+                    for name in self._openers:
+                        self._schedule_standby(name)
+                if self.health_check_interval > 0:
+                    self._supervisor_task = asyncio.create_task(self._supervise())
+                print("[MCP] All MCP servers initialized successfully")
 
-        except Exception as e:
-            print(f"[MCP] Error initializing MCP servers: {e}")
-            raise
+            except Exception as e:
+                print(f"[MCP] Error initializing MCP servers: {e}")
+                await self._cleanup()
+                raise
 
     async def _start_db_server(self):
         """Start the internal database MCP server."""
-        try:
-            server_script = os.path.join(os.path.dirname(__file__), "mcp_servers", "db_server.py")
-            if not os.path.exists(server_script):
-                raise FileNotFoundError(f"DB server script not found: {server_script}")
-
-            server_params = StdioServerParameters(
-                command=sys.executable,
-                args=[server_script],
-                env=None,
-            )
-
-            # Create stdio client connection and keep the context manager
-            stdio_context = stdio_client(server_params)
-            read_stream, write_stream = await stdio_context.__aenter__()
-
-            # Create session
-            session = ClientSession(read_stream, write_stream)
-            await session.__aenter__()
-            
-            # Initialize the session
-            await session.initialize()
-
-            self.sessions["db"] = session
-            self.connections["db"] = stdio_context
-            print("[MCP] DB server started successfully")
-
-        except Exception as e:
-            print(f"[MCP] Error starting DB server: {e}")
-            raise
+        await self._start_internal_server("db", "db_server", "DB")
 
     async def _start_email_server(self):
         """Start the internal email MCP server."""
+        await self._start_internal_server("email", "email_server", "Email")
+
+    async def _start_internal_server(self, name: str, module_name: str, label: str):
+        """Start a pool of sessions to one of the servers in ``mcp_servers``."""
         try:
-            server_script = os.path.join(os.path.dirname(__file__), "mcp_servers", "email_server.py")
-            if not os.path.exists(server_script):
-                raise FileNotFoundError(f"Email server script not found: {server_script}")
-
-            server_params = StdioServerParameters(
-                command=sys.executable,
-                args=[server_script],
-                env=None,
+            transport = str(self.transports.get(name) or "stdio").strip().lower()
+            if transport == "inprocess":
+                server = importlib.import_module(f"mcp_servers.{module_name}").app
+                self._openers[name] = partial(inprocess_client, server)
+            elif transport == "stdio":
+                server_script = os.path.join(os.path.dirname(__file__), "mcp_servers", f"{module_name}.py")
+                if not os.path.exists(server_script):
+                    raise FileNotFoundError(f"{label} server script not found: {server_script}")
+
+                server_params = StdioServerParameters(
+                    command=sys.executable,
+                    args=[server_script],
+                    # Same settings as this process (env=None would pass only a minimal default env)
+                    env=dict(os.environ),
+                )
+                self._openers[name] = partial(stdio_client, server_params)
+            else:
+                raise ValueError(f"Unsupported MCP transport '{transport}'. Use stdio or inprocess.")
+
+            size = max(1, int(self.pool_sizes.get(name, 1) or 1))
+            pool = self.pools.setdefault(name, [])
+            members = await asyncio.gather(
+                *(self._spawn_member(name, index) for index in range(size)),
+                return_exceptions=True,
             )
-
-            # Create stdio client connection and keep the context manager
-            stdio_context = stdio_client(server_params)
-            read_stream, write_stream = await stdio_context.__aenter__()
-
-            # Create session
-            session = ClientSession(read_stream, write_stream)
-            await session.__aenter__()
-            
-            # Initialize the session
-            await session.initialize()
-
-            self.sessions["email"] = session
-            self.connections["email"] = stdio_context
-            print("[MCP] Email server started successfully")
+            errors = [m for m in members if isinstance(m, BaseException)]
+            pool.extend(m for m in members if not isinstance(m, BaseException))
+            if errors:
+                raise errors[0]
+            print(f"[MCP] {label} server started successfully ({transport}, pool size {size})")
 
         except Exception as e:
-            print(f"[MCP] Error starting Email server: {e}")
+            print(f"[MCP] Error starting {label} server: {e}")
             raise
 
+    async def _spawn_member(self, name: str, index: int) -> PooledSession:
+        """Open one session to a server and wait for it to initialize."""
+        # The transport and session are entered and exited by one owner task;
+        # anyio cancel scopes must not cross task boundaries.
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._hold_session(name, self._openers[name], ready, stop))
+        session = await ready
+        return PooledSession(name, index, session, task, stop)
+
+    async def _hold_session(self, name: str, open_transport: Callable[[], Any],
+                            ready: "asyncio.Future[ClientSession]", stop: asyncio.Event):
+        """Own a server's transport and session until asked to stop."""
+        try:
+            async with open_transport() as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"[MCP] Connection to {name} server closed: {e}")
+
     async def call_tool(self, server: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """
         Call a tool on a specific MCP server.
@@ -118,38 +307,223 @@ class MCPClientManager:
         Returns:
             Parsed response from the tool
         """
-        if not self._initialized:
-            await self.initialize()
+        return await self._on_loop(self._call_tool(server, tool_name, arguments))
 
-        session = self.sessions.get(server)
-        if not session:
-            raise ValueError(f"MCP server '{server}' not found or not initialized")
+    async def _call_tool(self, server: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if not self._initialized:
+            await self._initialize()
+
+        # Idempotent tools get one retry on a fresh server if the pipe died
+        attempts = 2 if tool_name in IDEMPOTENT_TOOLS else 1
+        cursor_id = arguments.get("cursor_id") if isinstance(arguments, dict) else None
+        for attempt in range(attempts):
+            member = self._cursor_affinity.get(cursor_id) if cursor_id else None
+            if member is None or not member.alive:
+                member = self._acquire(server)
+            if not member:
+                raise ValueError(f"MCP server '{server}' not found or not initialized")
+            if not member.alive:
+                # Every member is down (an earlier respawn failed); try to bring this one back
+                try:
+                    await self._replace_member(member)
+                except Exception as respawn_error:
+                    return {"status": "error", "error": f"MCP server '{server}' died and could not be restarted: {respawn_error}"}
+                member = self._acquire(server)
+
+            member.inflight += 1
+            member.calls += 1
+            try:
+                result = await member.session.call_tool(tool_name, arguments)
+                
+                # Parse the result
+                if result and len(result.content) > 0:
+                    content = result.content[0]
+                    if hasattr(content, 'text'):
+                        self._count_payload(tool_name, len(content.text))
+                        parsed = json.loads(content.text)
+                        self._track_cursor(member, cursor_id, parsed)
+                        return parsed
+                
+                return {"status": "error", "error": "Empty response from MCP server"}
 
+            except Exception as e:
+                if not _is_dead_pipe(e):
+                    return {"status": "error", "error": str(e)}
+                print(f"[MCP] {server} server #{member.index} connection lost during {tool_name}")
+                try:
+                    await self._replace_member(member)
+                except Exception as respawn_error:
+                    return {"status": "error", "error": f"MCP server '{server}' died and could not be restarted: {respawn_error}"}
+                if attempt + 1 < attempts:
+                    print(f"[MCP] Retrying {tool_name} on restarted {server} server")
+                    continue
+                return {"status": "error", "error": f"MCP server '{server}' connection lost during {tool_name}"}
+            finally:
+                member.inflight -= 1
+
+        return {"status": "error", "error": f"MCP server '{server}' unavailable"}
+
+    def _track_cursor(self, member: PooledSession, requested: Optional[str], result: Any) -> None:
+        """Pin open cursors to the session that owns them; forget closed ones."""
+        if not isinstance(result, dict):
+            return
+        if requested and (result.get("cursor_id") != requested or "closed" in result):
+            self._cursor_affinity.pop(requested, None)
+        opened = result.get("cursor_id")
+        if opened and result.get("has_more"):
+            self._cursor_affinity[opened] = member
+
+    def _acquire(self, server: str) -> Optional[PooledSession]:
+        """Pick the least-busy session for a server, round-robin among ties."""
+        pool = self.pools.get(server)
+        if not pool:
+            return None
+        start = self._rr.get(server, 0) % len(pool)
+        self._rr[server] = (start + 1) % len(pool)
+        ordered = pool[start:] + pool[:start]
+        alive = [m for m in ordered if m.alive] or ordered
+        return min(alive, key=lambda m: m.inflight)
+
+    # ------------------------------------------------------------------
+    # Supervision: respawn, warm standby, health checks
+    # ------------------------------------------------------------------
+    async def _replace_member(self, member: PooledSession) -> None:
+        """Replace a dead pool member; concurrent callers share one respawn.
+
+        A failed respawn is forgotten so the next caller (or the supervisor,
+        after a backoff) tries again instead of re-raising the same error.
+        """
+        if member.replacement is None:
+            member.alive = False
+            member.replacement = asyncio.ensure_future(self._respawn(member))
+        replacement = member.replacement
         try:
-            result = await session.call_tool(tool_name, arguments)
-            
-            # Parse the result
-            if result and len(result.content) > 0:
-                content = result.content[0]
-                if hasattr(content, 'text'):
-                    return json.loads(content.text)
-            
-            return {"status": "error", "error": "Empty response from MCP server"}
+            await asyncio.shield(replacement)
+        except Exception:
+            if member.replacement is replacement:
+                member.replacement = None
+                member.respawn_failures += 1
+                backoff = self.health_check_interval * 2 ** (member.respawn_failures - 1)
+                member.retry_at = time.monotonic() + min(RESPAWN_BACKOFF_MAX, backoff)
+            raise
 
+    async def _respawn(self, member: PooledSession) -> None:
+        server = member.server
+        # Let the owner task unwind the dead transport and reap the process
+        member.stop.set()
+
+        new_member = self._standby.pop(server, None)
+        if new_member is not None and new_member.alive and not new_member.task.done():
+            new_member.index = member.index
+            print(f"[MCP] Promoting warm standby for {server} server #{member.index}")
+        else:
+            new_member = await self._spawn_member(server, member.index)
+
+        pool = self.pools.get(server)
+        if pool is not None and member in pool:
+            pool[pool.index(member)] = new_member
+        else:
+            # Manager was cleaned up while we were respawning
+            new_member.stop.set()
+        self.restarts[server] = self.restarts.get(server, 0) + 1
+        print(f"[MCP] {server} server #{member.index} restarted (restarts={self.restarts[server]})")
+
+        if self.warm_standby:
+            self._schedule_standby(server)
+        await asyncio.wait({member.task}, timeout=5)
+
+    def _schedule_standby(self, server: str) -> None:
+        """Pre-initialize a spare session so failover skips the cold start."""
+        existing = self._standby_tasks.get(server)
+        if server in self._standby or (existing is not None and not existing.done()):
+            return
+
+        async def _fill():
+            try:
+                spare = await self._spawn_member(server, -1)
+            except Exception as e:
+                print(f"[MCP] Could not start warm standby for {server} server: {e}")
+                return
+            if self._initialized and server not in self._standby:
+                self._standby[server] = spare
+            else:
+                spare.stop.set()
+
+        self._standby_tasks[server] = asyncio.create_task(_fill())
+
+    async def _supervise(self) -> None:
+        """Periodically ping idle sessions and respawn any with a dead pipe."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for server, pool in list(self.pools.items()):
+                for member in list(pool):
+                    if not member.alive:
+                        # A member whose respawn failed is retried with backoff
+                        if member.replacement is None and time.monotonic() >= member.retry_at:
+                            try:
+                                await self._replace_member(member)
+                            except Exception as e:
+                                print(f"[MCP] Error restarting {server} server #{member.index}: {e}")
+                        continue
+                    if member.inflight:
+                        continue
+                    if not await self._ping(member):
+                        print(f"[MCP] {server} server #{member.index} failed health check")
+                        try:
+                            await self._replace_member(member)
+                        except Exception as e:
+                            print(f"[MCP] Error restarting {server} server: {e}")
+            for server, spare in list(self._standby.items()):
+                if not await self._ping(spare):
+                    self._standby.pop(server, None)
+                    spare.stop.set()
+                    self._schedule_standby(server)
+
+    async def _ping(self, member: PooledSession) -> bool:
+        try:
+            await asyncio.wait_for(member.session.send_ping(), timeout=5)
+            return True
         except Exception as e:
-            return {"status": "error", "error": str(e)}
+            return not _is_dead_pipe(e) and not isinstance(e, asyncio.TimeoutError)
+
+    def _count_payload(self, tool_name: str, size: int) -> None:
+        stats = self.payloads.setdefault(tool_name, {"calls": 0, "bytes": 0, "max_bytes": 0})
+        stats["calls"] += 1
+        stats["bytes"] += size
+        stats["max_bytes"] = max(stats["max_bytes"], size)
+
+    def payload_stats(self, reset: bool = False) -> Dict[str, Dict[str, int]]:
+        """Response payload sizes (characters of tool result text) per tool."""
+        stats = {tool: dict(s) for tool, s in self.payloads.items()}
+        if reset:
+            self.payloads = {}
+        return stats
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Snapshot of pool members, restarts and standby state per server."""
+        return {
+            server: {
+                "members": [{"index": m.index, "inflight": m.inflight, "calls": m.calls, "alive": m.alive} for m in pool],
+                "restarts": self.restarts.get(server, 0),
+                "standby": server in self._standby,
+            }
+            for server, pool in self.pools.items()
+        }
 
     async def list_tools(self, server: str) -> List[Dict[str, Any]]:
         """List available tools from a specific server."""
+        return await self._on_loop(self._list_tools(server))
+
+    async def _list_tools(self, server: str) -> List[Dict[str, Any]]:
         if not self._initialized:
-            await self.initialize()
+            await self._initialize()
 
-        session = self.sessions.get(server)
-        if not session:
+        member = self._acquire(server)
+        if not member:
             raise ValueError(f"MCP server '{server}' not found")
 
         try:
-            result = await session.list_tools()
+            result = await member.session.list_tools()
             return [
                 {
                     "name": tool.name,
@@ -164,33 +538,68 @@ class MCPClientManager:
 
     async def cleanup(self):
         """Clean up all MCP connections."""
-        for server_name, session in list(self.sessions.items()):
-            try:
-                await session.__aexit__(None, None, None)
-            except Exception as e:
-                print(f"[MCP] Error closing session {server_name}: {e}")
-
-        for server_name, connection in list(self.connections.items()):
-            try:
-                await connection.__aexit__(None, None, None)
-            except Exception as e:
-                print(f"[MCP] Error closing connection {server_name}: {e}")
+        if self._loop is None:
+            return
+        await self._on_loop(self._cleanup())
 
-        self.sessions.clear()
-        self.connections.clear()
+    async def _cleanup(self):
         self._initialized = False
+        if self._supervisor_task is not None:
+            self._supervisor_task.cancel()
+            self._supervisor_task = None
+        for task in self._standby_tasks.values():
+            task.cancel()
+        self._standby_tasks.clear()
+        for spare in self._standby.values():
+            spare.stop.set()
+            await asyncio.wait({spare.task}, timeout=5)
+        self._standby.clear()
+
+        for server_name, pool in list(self.pools.items()):
+            for member in pool:
+                member.stop.set()
+            for member in pool:
+                try:
+                    await member.task
+                except Exception as e:
+                    print(f"[MCP] Error closing connection {server_name}#{member.index}: {e}")
+
+        self.pools.clear()
+        self._rr.clear()
+        self._cursor_affinity.clear()
         print("[MCP] All MCP connections cleaned up")
 
+    # ------------------------------------------------------------------
+    # Thread-safe sync facade
+    # ------------------------------------------------------------------
+    def initialize_sync(self, timeout: Optional[float] = None):
+        """Blocking variant of initialize() for non-async callers."""
+        return self.run_sync(self._initialize(), timeout)
+
+    def call_tool_sync(self, server: str, tool_name: str, arguments: Dict[str, Any],
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking variant of call_tool() that is safe to call from any thread."""
+        return self.run_sync(self._call_tool(server, tool_name, arguments), timeout)
+
+    def cleanup_sync(self, timeout: Optional[float] = None):
+        """Blocking variant of cleanup() for non-async callers."""
+        if self._loop is None:
+            return
+        return self.run_sync(self._cleanup(), timeout)
+
 
 # Global singleton instance
 _mcp_manager: Optional[MCPClientManager] = None
+_mcp_manager_lock = threading.Lock()
 
 
 def get_mcp_manager() -> MCPClientManager:
     """Get or create the global MCP manager instance."""
     global _mcp_manager
     if _mcp_manager is None:
-        _mcp_manager = MCPClientManager()
+        with _mcp_manager_lock:
+            if _mcp_manager is None:
+                _mcp_manager = MCPClientManager()
     return _mcp_manager
 
 
@@ -204,57 +613,42 @@ async def cleanup_mcp():
     """Cleanup the global MCP manager."""
     global _mcp_manager
     if _mcp_manager:
-        await _mcp_manager.cleanup()
+        manager = _mcp_manager
         _mcp_manager = None
+        await manager.cleanup()
+        manager.shutdown()
+
+
+async def call_mcp_tool(server: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Call an MCP tool from any event loop without blocking it."""
+    with timing.measure("mcp"):
+        return await get_mcp_manager().call_tool(server, tool_name, arguments)
 
 
 # Synchronous wrappers for use in non-async code
 def call_mcp_tool_sync(server: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-    """Synchronous wrapper for calling MCP tools."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    if loop.is_running():
-        # If we're already in an event loop, create a new thread
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, _async_call_tool(server, tool_name, arguments))
-            return future.result()
-    else:
-        # Run in the current loop
-        return loop.run_until_complete(_async_call_tool(server, tool_name, arguments))
-
-
-async def _async_call_tool(server: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-    """Helper for async tool calls."""
-    manager = get_mcp_manager()
-    return await manager.call_tool(server, tool_name, arguments)
+    """Synchronous wrapper for calling MCP tools.
+
+    The call is submitted to the manager's background loop, so it reuses the
+    warm sessions whether or not the calling thread has a running loop.
+    """
+    with timing.measure("mcp"):
+        return get_mcp_manager().call_tool_sync(server, tool_name, arguments)
 
 
 def initialize_mcp_sync():
     """Synchronous wrapper for initializing MCP."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    if not loop.is_running():
-        loop.run_until_complete(initialize_mcp())
+    get_mcp_manager().initialize_sync()
 
 
 def cleanup_mcp_sync():
     """Synchronous wrapper for cleaning up MCP."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        return  # No loop, nothing to cleanup
-    
-    if not loop.is_running():
-        loop.run_until_complete(cleanup_mcp())
+    global _mcp_manager
+    if _mcp_manager:
+        manager = _mcp_manager
+        _mcp_manager = None
+        manager.cleanup_sync()
+        manager.shutdown()
 
 
 if __name__ == "__main__":
@@ -283,6 +677,7 @@ if __name__ == "__main__":
         print(f"Result: {json.dumps(result, indent=2)}")
         
         await manager.cleanup()
+        manager.shutdown()
     
     asyncio.run(test())
 
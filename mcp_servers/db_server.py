@@ -2,12 +2,21 @@
 """
 MCP Server for Supabase/PostgreSQL Database Queries
 Provides: db.query_supabase - safe, read-only SQL queries
+          db.fetch_page     - next page from a cursor opened by db.query_supabase
+          db.close_cursor   - release a cursor before it expires
+          db.describe_table - column metadata from the cached schema catalog
 """
 import asyncio
 import json
 import os
+import re
 import sys
-from typing import Any, Sequence
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -20,7 +29,205 @@ from utils import db_utils
 from app.config import settings
 
 
-app = Server("db-server")
+@asynccontextmanager
+async def lifespan(server: Server) -> AsyncIterator[Dict[str, Any]]:
+    """Expire idle cursors in the background while any session is open.
+
+    In-process transports run several sessions of this module at once, so the
+    reaper is shared; cursors and connection pools are closed when the last
+    session ends.
+    """
+    global _sessions, _reaper
+    _sessions += 1
+    if _reaper is None or _reaper.done():
+        _reaper = asyncio.create_task(_reap_idle_cursors())
+    try:
+        yield {}
+    finally:
+        _sessions -= 1
+        if _sessions == 0:
+            _reaper.cancel()
+            _reaper = None
+            await _close_all_cursors()
+            await asyncio.to_thread(db_utils.close_pools)
+
+
+app = Server("db-server", lifespan=lifespan)
+
+
+# Connection parameters shared by the tools that open connections
+CONNECTION_PROPERTIES = {
+    "dsn": {
+        "type": "string",
+        "description": "PostgreSQL DSN connection string (optional, uses .env if not provided)",
+    },
+    "db_type": {
+        "type": "string",
+        "description": "Database type (postgres, mysql, sqlite)",
+    },
+    "host": {
+        "type": "string",
+        "description": "Database host",
+    },
+    "port": {
+        "type": "integer",
+        "description": "Database port",
+    },
+    "name": {
+        "type": "string",
+        "description": "Database name",
+    },
+    "user": {
+        "type": "string",
+        "description": "Database user",
+    },
+    "password": {
+        "type": "string",
+        "description": "Database password",
+    },
+    "sslmode": {
+        "type": "string",
+        "description": "SSL mode (require, prefer, disable)",
+    },
+}
+
+FORMAT_PROPERTY = {
+    "type": "string",
+    "enum": ["rows", "columnar"],
+    "description": (
+        "Result encoding: 'rows' (default) returns rows as dictionaries; "
+        "'columnar' returns {columns, types, data} with data as value arrays"
+    ),
+    "default": "rows",
+}
+
+
+class CursorHandle:
+    """An open streaming cursor plus the bookkeeping needed to expire it."""
+
+    def __init__(self, cursor: db_utils.StreamingCursor, page_size: int, result_format: str, query: str):
+        self.cursor = cursor
+        self.page_size = page_size
+        self.format = result_format
+        self.query = query
+        self.last_used = time.monotonic()
+        # Pages are read in worker threads; one reader per cursor at a time
+        self.lock = threading.Lock()
+
+
+# Open cursors by id; idle ones are closed after DB_CURSOR_IDLE_TIMEOUT seconds
+_cursors: Dict[str, CursorHandle] = {}
+_sessions = 0
+_reaper: Optional["asyncio.Task[None]"] = None
+
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace outside quoted literals and drop a trailing ';'."""
+    parts = _QUOTED.split(query.strip().rstrip(";").strip())
+    return "".join(p if i % 2 else re.sub(r"\s+", " ", p) for i, p in enumerate(parts))
+
+
+def _rows_size(rows: List[Dict[str, Any]]) -> int:
+    """Approximate memory held by row dicts (column names are shared by the rows)."""
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(k) for k in (rows[0] if rows else ()))
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+    return size
+
+
+class CachedResult:
+    """Rows for one cached query plus their serialized encodings by format.
+
+    `size` counts both: the rows stay in memory to encode other formats.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.created = time.monotonic()
+        self.fragments: Dict[str, str] = {}
+        self.size = _rows_size(rows)
+
+
+class QueryResultCache:
+    """TTL + LRU cache of SELECT results, bounded by total (approximate) bytes.
+
+    Entries are keyed by connection profile hash, normalized SQL and limit.
+    The serialized rows are kept per result format, so a hit only has to
+    encode the small envelope around them.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+
+    def get(self, key: tuple) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: CachedResult) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def fragment(self, key: tuple, entry: CachedResult, result_format: str) -> str:
+        """Serialized rows for a format, encoded once per entry."""
+        text = entry.fragments.get(result_format)
+        if text is None:
+            text = json.dumps(_encode_rows(entry.rows, result_format), default=str)
+            with self._lock:
+                entry.fragments[result_format] = text
+                entry.size += len(text)
+                if self._entries.get(key) is entry:
+                    self._bytes += len(text)
+                    self._evict()
+        return text
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+_result_cache = QueryResultCache(settings.DB_CACHE_TTL, settings.DB_CACHE_MAX_BYTES)
 
 
 @app.list_tools()
@@ -33,7 +240,8 @@ async def list_tools() -> list[Tool]:
                 "Execute a safe, read-only SQL SELECT query on Supabase (PostgreSQL). "
                 "Only SELECT queries are allowed. INSERT, UPDATE, DELETE, DROP, etc. are forbidden. "
                 "Queries are automatically limited to 500 rows if no LIMIT clause is present. "
-                "Returns a list of rows as dictionaries."
+                "Returns a list of rows as dictionaries, or with format='columnar' the column "
+                "names and types once plus one value array per row."
             ),
             inputSchema={
                 "type": "object",
@@ -47,53 +255,217 @@ async def list_tools() -> list[Tool]:
                         "description": "Maximum number of rows to return (default: 500)",
                         "default": 500,
                     },
-                    "dsn": {
-                        "type": "string",
-                        "description": "PostgreSQL DSN connection string (optional, uses .env if not provided)",
+                    **CONNECTION_PROPERTIES,
+                    "format": FORMAT_PROPERTY,
+                    "cursor": {
+                        "type": "boolean",
+                        "description": (
+                            "Open a server-side cursor instead of returning everything at once. "
+                            "The response holds the first page plus a cursor_id for db.fetch_page; "
+                            "no automatic LIMIT is applied in this mode."
+                        ),
+                        "default": False,
                     },
-                    "db_type": {
+                    "page_size": {
+                        "type": "integer",
+                        "description": "Rows per page when cursor is true (default: 1000)",
+                        "default": 1000,
+                    },
+                    "cache": {
                         "type": "string",
-                        "description": "Database type (postgres, mysql, sqlite)",
+                        "enum": ["use", "bypass", "refresh"],
+                        "description": (
+                            "Result cache behaviour: 'use' (default) serves repeats within the TTL from memory, "
+                            "'bypass' skips the cache entirely, 'refresh' re-runs the query and replaces the entry"
+                        ),
+                        "default": "use",
                     },
-                    "host": {
+                },
+                "required": ["query"],
+            },
+        ),
+        Tool(
+            name="db.fetch_page",
+            description=(
+                "Fetch the next page of rows from a cursor opened by db.query_supabase with cursor=true. "
+                "The cursor is released automatically after the last page."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
                         "type": "string",
-                        "description": "Database host",
+                        "description": "Cursor id returned by db.query_supabase",
                     },
-                    "port": {
+                    "page_size": {
                         "type": "integer",
-                        "description": "Database port",
+                        "description": "Rows to fetch (defaults to the page size the cursor was opened with)",
                     },
-                    "name": {
-                        "type": "string",
-                        "description": "Database name",
-                    },
-                    "user": {
+                    "format": FORMAT_PROPERTY,
+                },
+                "required": ["cursor_id"],
+            },
+        ),
+        Tool(
+            name="db.close_cursor",
+            description="Release a cursor opened by db.query_supabase before it is exhausted or expires.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
                         "type": "string",
-                        "description": "Database user",
+                        "description": "Cursor id returned by db.query_supabase",
                     },
-                    "password": {
+                },
+                "required": ["cursor_id"],
+            },
+        ),
+        Tool(
+            name="db.describe_table",
+            description=(
+                "Return the columns (name and type) of a table. Metadata comes from a per-schema "
+                "catalog cache loaded in one query and refreshed after DB_SCHEMA_CACHE_TTL seconds; "
+                "the response includes the schema fingerprint."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "table": {
                         "type": "string",
-                        "description": "Database password",
+                        "description": "Table name, optionally schema-qualified (schema.table)",
                     },
-                    "sslmode": {
-                        "type": "string",
-                        "description": "SSL mode (require, prefer, disable)",
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Reload the schema catalog before answering (e.g. after a migration)",
+                        "default": False,
                     },
+                    **CONNECTION_PROPERTIES,
                 },
-                "required": ["query"],
+                "required": ["table"],
             },
         ),
     ]
 
 
+def _json_result(payload: Dict[str, Any]) -> Sequence[TextContent]:
+    # default=str: dates and Decimals from Postgres/MySQL travel as strings
+    return [TextContent(type="text", text=json.dumps(payload, default=str))]
+
+
+def _join_json_objects(*texts: str) -> str:
+    """Concatenate already-serialized JSON objects into one object."""
+    return "{" + ", ".join(t.strip()[1:-1] for t in texts if t.strip() != "{}") + "}"
+
+
+def _encode_rows(rows: List[Dict[str, Any]], result_format: str) -> Dict[str, Any]:
+    if result_format == "columnar":
+        return {"format": "columnar", **db_utils.rows_to_columnar(rows)}
+    return {"rows": rows}
+
+
+def _connection_settings(arguments: Dict[str, Any]):
+    """Use provided connection parameters or fall back to settings."""
+    # Create a custom settings object if any connection parameter is provided
+    # (db_type/name alone select another database, e.g. a SQLite file)
+    if any(arguments.get(key) for key in CONNECTION_PROPERTIES):
+        class CustomSettings:
+            pass
+        custom_settings = CustomSettings()
+        custom_settings.DATA_DB_TYPE = arguments.get("db_type") or settings.DATA_DB_TYPE
+        custom_settings.DATA_DSN = arguments.get("dsn") or settings.DATA_DSN
+        custom_settings.DATA_HOST = arguments.get("host") or settings.DATA_HOST
+        custom_settings.DATA_PORT = str(arguments.get("port") or settings.DATA_PORT)
+        custom_settings.DATA_NAME = arguments.get("name") or settings.DATA_NAME
+        custom_settings.DATA_USER = arguments.get("user") or settings.DATA_USER
+        custom_settings.DATA_PASSWORD = arguments.get("password") or settings.DATA_PASSWORD
+        custom_settings.DATA_SSLMODE = arguments.get("sslmode") or settings.DATA_SSLMODE
+        return custom_settings
+    return settings
+
+
+def _schema_fingerprint(connection_settings) -> str:
+    """Fingerprint of the default schema, or "" when the catalog cannot be read."""
+    try:
+        return db_utils.schema_catalog.fingerprint(connection_settings)
+    except Exception:
+        return ""
+
+
+async def _expire_idle_cursors() -> None:
+    """Close cursors that have not been touched within the idle timeout."""
+    now = time.monotonic()
+    expired = [
+        cursor_id for cursor_id, handle in _cursors.items()
+        if now - handle.last_used > settings.DB_CURSOR_IDLE_TIMEOUT and not handle.lock.locked()
+    ]
+    for cursor_id in expired:
+        handle = _cursors.pop(cursor_id, None)
+        if handle is not None:
+            await asyncio.to_thread(handle.cursor.close)
+
+
+async def _reap_idle_cursors() -> None:
+    interval = max(1.0, settings.DB_CURSOR_IDLE_TIMEOUT / 2)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _expire_idle_cursors()
+        except Exception as e:
+            print(f"[DB Server] Cursor expiry failed: {e}", file=sys.stderr)
+
+
+async def _close_all_cursors() -> None:
+    handles = list(_cursors.values())
+    _cursors.clear()
+    for handle in handles:
+        try:
+            await asyncio.to_thread(handle.cursor.close)
+        except Exception:
+            pass
+
+
+def _read_page(handle: CursorHandle, page_size: int) -> List[Dict[str, Any]]:
+    with handle.lock:
+        rows = handle.cursor.fetch(page_size)
+        handle.last_used = time.monotonic()
+        return rows
+
+
+async def _page_response(cursor_id: str, handle: CursorHandle, page_size: int, result_format: str) -> Dict[str, Any]:
+    """Read one page and release the cursor once it is exhausted."""
+    rows = await asyncio.to_thread(_read_page, handle, page_size)
+    has_more = not handle.cursor.exhausted
+    if not has_more:
+        _cursors.pop(cursor_id, None)
+        await asyncio.to_thread(handle.cursor.close)
+    payload = {"status": "success", **_encode_rows(rows, result_format)}
+    payload["count"] = len(rows)
+    payload["fetched"] = handle.cursor.fetched
+    payload["has_more"] = has_more
+    payload["cursor_id"] = cursor_id if has_more else None
+    payload["query"] = handle.query
+    return payload
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
     """Handle tool execution."""
-    if name != "db.query_supabase":
-        raise ValueError(f"Unknown tool: {name}")
+    await _expire_idle_cursors()
+    if name == "db.query_supabase":
+        return await _query_supabase(arguments)
+    if name == "db.fetch_page":
+        return await _fetch_page(arguments)
+    if name == "db.close_cursor":
+        return await _close_cursor(arguments)
+    if name == "db.describe_table":
+        return await _describe_table(arguments)
+    raise ValueError(f"Unknown tool: {name}")
+
 
+async def _query_supabase(arguments: Dict[str, Any]) -> Sequence[TextContent]:
     query = arguments.get("query", "")
     limit = arguments.get("limit", 500)
+    result_format = arguments.get("format") or "rows"
 
     if not query:
         return [
@@ -119,40 +491,64 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
                 )
             ]
 
-        # Use provided connection parameters or fall back to settings
-        # Create a custom settings object if parameters are provided
-        if arguments.get("dsn") or arguments.get("host"):
-            class CustomSettings:
-                pass
-            custom_settings = CustomSettings()
-            custom_settings.DATA_DB_TYPE = arguments.get("db_type") or settings.DATA_DB_TYPE
-            custom_settings.DATA_DSN = arguments.get("dsn") or settings.DATA_DSN
-            custom_settings.DATA_HOST = arguments.get("host") or settings.DATA_HOST
-            custom_settings.DATA_PORT = str(arguments.get("port") or settings.DATA_PORT)
-            custom_settings.DATA_NAME = arguments.get("name") or settings.DATA_NAME
-            custom_settings.DATA_USER = arguments.get("user") or settings.DATA_USER
-            custom_settings.DATA_PASSWORD = arguments.get("password") or settings.DATA_PASSWORD
-            custom_settings.DATA_SSLMODE = arguments.get("sslmode") or settings.DATA_SSLMODE
-            connection_settings = custom_settings
-        else:
-            connection_settings = settings
-
-        # Execute the query
-        rows = db_utils.execute_select(connection_settings, query, limit=limit)
+        connection_settings = _connection_settings(arguments)
 
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "status": "success",
-                    "rows": rows,
-                    "count": len(rows),
+        if arguments.get("cursor"):
+            if len(_cursors) >= settings.DB_MAX_OPEN_CURSORS:
+                return _json_result({
+                    "status": "error",
+                    "error": f"Too many open cursors ({len(_cursors)}); close some with db.close_cursor",
                     "query": query,
-                }),
-            )
-        ]
+                })
+            page_size = max(1, int(arguments.get("page_size") or 1000))
+            cursor = await asyncio.to_thread(db_utils.StreamingCursor, connection_settings, query)
+            cursor_id = uuid.uuid4().hex
+            handle = CursorHandle(cursor, page_size, result_format, query)
+            _cursors[cursor_id] = handle
+            try:
+                return _json_result(await _page_response(cursor_id, handle, page_size, result_format))
+            except Exception:
+                if _cursors.pop(cursor_id, None) is not None:
+                    await asyncio.to_thread(cursor.close)
+                raise
+
+        cache_mode = arguments.get("cache") or "use"
+        if not _result_cache.enabled:
+            cache_mode = "bypass"
+        # The schema fingerprint retires cached results when the table layout changes
+        fingerprint = await asyncio.to_thread(_schema_fingerprint, connection_settings) if cache_mode != "bypass" else ""
+        cache_key = (db_utils.profile_key(connection_settings), fingerprint, normalize_sql(query), limit)
+        entry = _result_cache.get(cache_key) if cache_mode == "use" else None
+        if entry is not None:
+            cache_status = "hit"
+        else:
+            # Execute the query off the event loop so concurrent calls (and the
+            # in-process transport, which shares the client's loop) are not blocked
+            rows = await asyncio.to_thread(db_utils.execute_select, connection_settings, query, limit=limit)
+            entry = CachedResult(rows)
+            if cache_mode == "bypass":
+                cache_status = "bypass"
+            else:
+                cache_status = "miss" if cache_mode == "use" else "refresh"
+                _result_cache.put(cache_key, entry)
+
+        meta = {
+            "status": "success",
+            "count": len(entry.rows),
+            "query": query,
+            "cache": {
+                "status": cache_status,
+                "age": round(time.monotonic() - entry.created, 6),
+                **_result_cache.stats(),
+            },
+        }
+        text = _join_json_objects(json.dumps(meta), _result_cache.fragment(cache_key, entry, result_format))
+        return [TextContent(type="text", text=text)]
 
     except Exception as e:
+        if db_utils.is_schema_error(e):
+            # A table or column changed since the schema was cached; reload it next time
+            db_utils.schema_catalog.invalidate(_connection_settings(arguments))
         return [
             TextContent(
                 type="text",
@@ -165,6 +561,46 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
         ]
 
 
+async def _fetch_page(arguments: Dict[str, Any]) -> Sequence[TextContent]:
+    cursor_id = arguments.get("cursor_id") or ""
+    handle = _cursors.get(cursor_id)
+    if handle is None:
+        return _json_result({"status": "error", "error": f"Unknown or expired cursor: {cursor_id}"})
+    page_size = max(1, int(arguments.get("page_size") or handle.page_size))
+    result_format = arguments.get("format") or handle.format
+    try:
+        return _json_result(await _page_response(cursor_id, handle, page_size, result_format))
+    except Exception as e:
+        _cursors.pop(cursor_id, None)
+        await asyncio.to_thread(handle.cursor.close)
+        return _json_result({"status": "error", "error": str(e), "query": handle.query})
+
+
+async def _close_cursor(arguments: Dict[str, Any]) -> Sequence[TextContent]:
+    cursor_id = arguments.get("cursor_id") or ""
+    handle = _cursors.pop(cursor_id, None)
+    if handle is None:
+        return _json_result({"status": "success", "closed": False, "cursor_id": cursor_id})
+    await asyncio.to_thread(handle.cursor.close)
+    return _json_result({"status": "success", "closed": True, "cursor_id": cursor_id, "fetched": handle.cursor.fetched})
+
+
+async def _describe_table(arguments: Dict[str, Any]) -> Sequence[TextContent]:
+    table = arguments.get("table") or ""
+    if not table:
+        return _json_result({"status": "error", "error": "Table parameter is required"})
+    try:
+        connection_settings = _connection_settings(arguments)
+        info = await asyncio.to_thread(
+            db_utils.describe_table, connection_settings, table, bool(arguments.get("refresh"))
+        )
+        if not info["found"]:
+            return _json_result({"status": "error", "error": f"Table not found: {table}", **info})
+        return _json_result({"status": "success", **info})
+    except Exception as e:
+        return _json_result({"status": "error", "error": str(e), "table": table})
+
+
 async def main():
     """Run the MCP server using stdio transport."""
     async with stdio_server() as (read_stream, write_stream):
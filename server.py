@@ -1,40 +1,94 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import partial
+from itertools import islice
 
-from main import run_once
-from app.database import Database
+from main import run_once, arun_once, arun_many, aresume_run, run_summary, get_app, run_dedup_stats
 from app.config import settings
 from utils import db_utils
 from agents.scheduler_agent import SchedulerService
-from mcp_client import initialize_mcp_sync, cleanup_mcp_sync
+from mcp_client import initialize_mcp, cleanup_mcp
+from app.run_queue import RunQueue, PostgresRunQueue, QueueFull
+from app.run_events import run_events
+from app.row_store import row_store
+from app.event_log import read_events
+from agents import nlp_agent
+
+
+run_queue: Optional[Any] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage MCP server lifecycle."""
+    """Manage MCP server and run queue lifecycle."""
+    global run_queue
     print("[Server] Initializing MCP servers...")
     try:
-        initialize_mcp_sync()
+        await initialize_mcp()
         print("[Server] MCP servers initialized successfully")
     except Exception as e:
         print(f"[Server] Warning: Failed to initialize MCP servers: {e}")
         print("[Server] The app will continue but MCP features may not work")
+
+    try:
+        _, db, _ = await asyncio.to_thread(get_app)
+        if settings.RUN_QUEUE_BACKEND == "postgres":
+            run_queue = PostgresRunQueue(
+                db,
+                max_depth=settings.RUN_QUEUE_MAX_DEPTH,
+                max_per_user=settings.RUN_QUEUE_MAX_PER_USER,
+                max_attempts=settings.RUN_JOB_MAX_ATTEMPTS,
+            )
+        else:
+            run_queue = RunQueue(
+                arun_once,
+                db,
+                workers=settings.RUN_WORKERS,
+                max_depth=settings.RUN_QUEUE_MAX_DEPTH,
+                max_per_user=settings.RUN_QUEUE_MAX_PER_USER,
+            )
+        await run_queue.start()
+    except Exception as e:
+        run_queue = None
+        print(f"[Server] Warning: Failed to start run queue: {e}")
+
+    # Spilled rows of failed runs nobody resumed
+    removed = await asyncio.to_thread(row_store.purge, settings.ROW_STORE_RETENTION_HOURS * 3600)
+    if removed:
+        print(f"[Server] Purged {removed} expired row store files")
     
     yield
     
+    if run_queue is not None:
+        await run_queue.stop()
+        run_queue = None
+    await nlp_agent.aclose_clients()
+
     # Cleanup on shutdown
     print("[Server] Shutting down MCP servers...")
     try:
-        cleanup_mcp_sync()
+        await cleanup_mcp()
         print("[Server] MCP servers shut down successfully")
     except Exception as e:
         print(f"[Server] Warning during MCP cleanup: {e}")
 
+    # Write out queued log records before the app-store pool goes away
+    _, db, logger = get_app()
+    logger.close()
+    db.close()
+    db_utils.close_pools()
+
 
 app = FastAPI(title="Multi-Agent Data Assistant", lifespan=lifespan)
 
@@ -72,6 +126,18 @@ class RunRequest(BaseModel):
     use_env: Optional[bool] = False
 
 
+class ResumeRequest(RunRequest):
+    # Only the credential fields (password, dsn, email_key, use_env) are used
+    question: Optional[str] = None
+
+
+class BatchRunRequest(RunRequest):
+    question: Optional[str] = None
+    questions: List[str]
+    # Runs in flight at once; capped at BATCH_CONCURRENCY
+    concurrency: Optional[int] = None
+
+
 def _mk_overrides(req: RunRequest) -> Dict[str, Any]:
     o: Dict[str, Any] = {}
     if getattr(req, "use_env", False):
@@ -121,21 +187,174 @@ def health() -> Dict[str, Any]:
 
 
 @app.post("/run")
-def run_flow(req: RunRequest) -> Dict[str, Any]:
+async def run_flow(req: RunRequest) -> Dict[str, Any]:
+    # Async end to end: the run holds no threadpool worker while it waits on
+    # MCP, OpenAI or the database
     overrides = _mk_overrides(req)
-    result = run_once(req.question, overrides=overrides, user_id=req.user_id or "default")
-    preview: List[Dict[str, Any]] = []
-    data = result.get("data") or []
-    if isinstance(data, list):
-        preview = data[:5]
+    result = await arun_once(req.question, overrides=overrides, user_id=req.user_id or "default")
+    summary = run_summary(result)
     return {
-        "status": result.get("status"),
-        "artifacts": result.get("artifacts", {}),
-        "preview": preview,
+        "status": summary["status"],
+        "artifacts": summary["artifacts"],
+        "preview": summary["preview"],
         "run_id": result.get("run_id"),
     }
 
 
+@app.post("/run/batch")
+async def run_batch(req: BatchRunRequest):
+    """Run many questions against one connection profile; per-question results in input order."""
+    questions = [q for q in req.questions if q and q.strip()]
+    if not questions:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "No questions given"})
+    if len(questions) > settings.BATCH_MAX_QUESTIONS:
+        return JSONResponse(
+            status_code=413,
+            content={"status": "error", "error": f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch"},
+        )
+    concurrency = min(req.concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+    batch = await arun_many(questions, overrides=_mk_overrides(req), user_id=req.user_id or "default", concurrency=concurrency)
+    return {"status": "success", "results": batch["results"], "stats": batch["stats"]}
+
+
+@app.post("/runs")
+async def submit_run(req: RunRequest):
+    """Queue a run and return its run_id immediately; poll GET /runs/{run_id}."""
+    if run_queue is None:
+        return JSONResponse(status_code=503, content={"status": "error", "error": "Run queue is not available"})
+    try:
+        run_id = await run_queue.submit(req.question, _mk_overrides(req), req.user_id or "default")
+    except QueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"status": "error", "error": str(e), "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return JSONResponse(status_code=202, content={"status": "queued", "run_id": run_id})
+
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    _, db, _ = await asyncio.to_thread(get_app)
+    run = await asyncio.to_thread(db.get_run, run_id)
+    if run is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Run not found"})
+    if run_queue is not None and run.get("status") == "queued":
+        run["position"] = await asyncio.to_thread(run_queue.position, run_id)
+    return {"status": "success", "run": run}
+
+
+@app.post("/runs/{run_id}/resume")
+async def resume_run(run_id: str, req: Optional[ResumeRequest] = None):
+    """Re-run a failed run from its failed node with the checkpointed state.
+
+    Credentials the run was started with are not checkpointed; send them again in the body.
+    """
+    try:
+        result = await aresume_run(run_id, secrets=_mk_overrides(req) if req is not None else None)
+    except LookupError as e:
+        return JSONResponse(status_code=404, content={"status": "error", "error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"status": "error", "error": str(e)})
+    summary = run_summary(result)
+    return {
+        "status": summary["status"],
+        "artifacts": summary["artifacts"],
+        "preview": summary["preview"],
+        "run_id": run_id,
+    }
+
+
+_EVENTS_POLL_SECONDS = 1.0
+_EVENTS_PING_SECONDS = 15.0
+
+
+def _sse(item: Dict[str, Any]) -> str:
+    if item["event"] == "ping":
+        return ": ping\n\n"
+    head = f"id: {item['id']}\n" if item.get("id") is not None else ""
+    return f"{head}event: {item['event']}\ndata: {json.dumps(item['data'], default=str)}\n\n"
+
+
+async def _run_event_items(db: Any, run_id: str, after: int):
+    """Live events when the run executes in this process; otherwise its status
+    polled from the runs table (queued, or running on a worker node)."""
+    last_status, last_sent = None, time.monotonic()
+    while True:
+        if run_events.has(run_id):
+            async for item in run_events.subscribe(run_id, after, heartbeat=_EVENTS_PING_SECONDS):
+                yield item
+            return
+        run = await asyncio.to_thread(db.get_run, run_id)
+        status = (run or {}).get("status")
+        if status in ("queued", "running"):
+            if status != last_status:
+                last_status, last_sent = status, time.monotonic()
+                yield {"id": None, "event": "status", "data": {"status": status}}
+            elif time.monotonic() - last_sent >= _EVENTS_PING_SECONDS:
+                last_sent = time.monotonic()
+                yield {"id": None, "event": "ping", "data": {}}
+            await asyncio.sleep(_EVENTS_POLL_SECONDS)
+            continue
+        # Finished before the client subscribed, or elsewhere: replay the stored timeline
+        for span in await asyncio.to_thread(db.get_spans, run_id):
+            yield {"id": None, "event": "node_finished",
+                   "data": {"node": span["node"], "status": span["status"], "duration_ms": span["duration_ms"]}}
+        yield {"id": None, "event": "run_finished", "data": (run or {}).get("result") or {"status": status}}
+        return
+
+
+@app.get("/runs/{run_id}/events")
+async def run_event_stream(run_id: str, request: Request):
+    """Server-Sent Events: node_started/node_finished (status, rows, artifacts) and run_finished."""
+    _, db, _ = await asyncio.to_thread(get_app)
+    if not run_events.has(run_id) and await asyncio.to_thread(db.get_run, run_id) is None:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "Run not found"})
+    try:
+        after = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        after = -1
+
+    async def body():
+        async for item in _run_event_items(db, run_id, after):
+            yield _sse(item)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/runs/{run_id}/timeline")
+async def run_timeline(run_id: str):
+    """Per-node spans of a run with offsets from the first node start."""
+    _, db, _ = await asyncio.to_thread(get_app)
+    spans = await asyncio.to_thread(db.get_spans, run_id)
+    if not spans:
+        return JSONResponse(status_code=404, content={"status": "error", "error": "No timeline for run"})
+    t0 = spans[0]["started_at"]
+    for span in spans:
+        span["offset_ms"] = round((span["started_at"] - t0) * 1000, 3)
+    wall_ms = max(span["offset_ms"] + span["duration_ms"] for span in spans)
+    return {"status": "success", "run_id": run_id, "wall_ms": round(wall_ms, 3), "spans": spans}
+
+
+@app.get("/timeline/stats")
+def timeline_stats(runs: int = 200) -> Dict[str, Any]:
+    """p50/p95/p99 per node across the most recent `runs` runs."""
+    _, db, _ = get_app()
+    return {"status": "success", "runs": runs, "nodes": db.node_timing_stats(runs)}
+
+
+@app.get("/runs")
+def runs_queue_stats() -> Dict[str, Any]:
+    if run_queue is None:
+        return {"status": "error", "error": "Run queue is not available"}
+    return {"status": "success", "queue": run_queue.stats(), "single_flight": run_dedup_stats(), "row_store": row_store.stats(),
+            "logger": get_app()[2].stats()}
+
+
 class DbTestRequest(BaseModel):
     db_type: str
     host: Optional[str] = None
@@ -192,13 +411,41 @@ def db_test(req: DbTestRequest) -> Dict[str, Any]:
         return {"status": "error", "error": str(e)}
 
 
+@app.get("/db/pools")
+def db_pools() -> Dict[str, Any]:
+    # Pools used by this API process (NLP schema lookups, /db/test, the app
+    # store); the MCP db server keeps its own pools per subprocess
+    _, db, _ = get_app()
+    return {"status": "success", "pools": db_utils.pool_stats(), "app_store": db.pool_stats(),
+            "schema_catalog": db_utils.schema_catalog.stats()}
+
+
+@app.post("/db/schema/invalidate")
+def db_schema_invalidate() -> Dict[str, Any]:
+    """Drop this process's cached schemas (e.g. after a migration); they reload on next use."""
+    return {"status": "success", "invalidated": db_utils.schema_catalog.invalidate()}
+
+
 @app.get("/logs")
 def get_logs(limit: int = 200) -> Dict[str, Any]:
-    db = Database(settings.DB_PATH)
+    _, db, _ = get_app()
     logs = db.get_logs(limit=limit)
     return {"status": "success", "logs": logs}
 
 
+@app.get("/logs/events")
+def get_log_events(since: Optional[str] = None, until: Optional[str] = None, run_id: Optional[str] = None,
+                   level: Optional[str] = None, limit: int = 1000) -> Dict[str, Any]:
+    """JSONL log records (UTC ISO `since`/`until`), oldest first, including rotated and gzipped segments."""
+    try:
+        start = datetime.fromisoformat(since) if since else None
+        end = datetime.fromisoformat(until) if until else None
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "error": str(e)})
+    records = list(islice(read_events(settings.LOG_FILE, start, end, run_id=run_id, level=level), max(0, limit)))
+    return {"status": "success", "count": len(records), "events": records}
+
+
 # Scheduler endpoints for React frontend
 class ScheduleJobRequest(BaseModel):
     question: str
@@ -248,11 +495,31 @@ def _mk_overrides_from_schedule(req: ScheduleJobRequest) -> Dict[str, Any]:
     return o
 
 
+def _schedule_key(req: ScheduleJobRequest, overrides: Dict[str, Any]) -> str:
+    """Identity of a schedule that is the same on every replica (job ids are random per replica)."""
+    options = {k: str(v) for k, v in sorted(overrides.items()) if k != "DATA_PASSWORD"}
+    raw = json.dumps([req.question, req.frequency, req.time, options])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _enqueue_scheduled_run(schedule_key: str, question: str, overrides: Dict[str, Any], user_id: str = "scheduler") -> None:
+    _, db, _ = get_app()
+    # Schedules fire at most once a day (UTC), so the date names the firing even
+    # when replicas fire on either side of a minute boundary
+    fired = datetime.utcnow().strftime("%Y%m%d")
+    db.enqueue_job(str(uuid4()), question, overrides, user_id,
+                   max_attempts=settings.RUN_JOB_MAX_ATTEMPTS, dedupe_key=f"scheduled:{schedule_key}:{fired}")
+
+
 @app.post("/scheduler/add")
 def scheduler_add(req: ScheduleJobRequest) -> Dict[str, Any]:
     job_id = f"scheduled_{uuid4().hex[:8]}"
     overrides = _mk_overrides_from_schedule(req)
-    SchedulerService.add_job(job_id, req.question, req.frequency, req.time, overrides, run_once)
+    func = run_once
+    if settings.RUN_QUEUE_BACKEND == "postgres":
+        # Every replica fires the job; the per-firing dedupe key lets only one enqueue it
+        func = partial(_enqueue_scheduled_run, _schedule_key(req, overrides))
+    SchedulerService.add_job(job_id, req.question, req.frequency, req.time, overrides, func)
     return {"status": "success", "job_id": job_id}
 
 
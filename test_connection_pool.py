@@ -0,0 +1,179 @@
+"""ConnectionPool: bounded checkout, discard, health checks, close_pools() and which failures are retried."""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import db_utils
+from utils.db_utils import ConnectionPool
+
+
+class FakeConnection:
+    """Postgres-like connection: `closed` flag, cursor() that fails once the server is gone."""
+
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+
+    def cursor(self):
+        conn = self
+
+        class Cursor:
+            def execute(self, sql):
+                if conn.dead:
+                    raise RuntimeError("server closed the connection")
+
+            def fetchall(self):
+                return [(1,)]
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, **kwargs):
+        super().__init__(SimpleNamespace(DATA_DB_TYPE="postgres"), "test", **kwargs)
+        self.opened = []
+
+    def _open(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_checkout_is_bounded_and_times_out():
+    pool = FakePool(max_size=2, checkout_timeout=0.1)
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats["size"] == 2 and stats["in_use"] == 2
+    pool.release(a)
+    pool.release(b)
+    assert pool.stats()["idle"] == 2
+
+
+def test_waiter_gets_released_connection_and_wait_is_measured():
+    pool = FakePool(max_size=1, checkout_timeout=5)
+    held = pool.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    time.sleep(0.1)
+    pool.release(held)
+    t.join(2)
+    assert got == [held]
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["max_wait_seconds"] >= 0.05
+    assert stats["created"] == 1
+
+
+def test_discard_closes_and_replaces():
+    pool = FakePool(max_size=1)
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+    assert conn.closed and pool.stats()["size"] == 0
+    again = pool.acquire()
+    assert again is not conn
+    assert pool.stats()["created"] == 2
+
+
+def test_stale_connection_failing_health_check_is_replaced():
+    pool = FakePool(max_size=2, health_check_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.dead = True
+    time.sleep(0.01)
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert pool.stats()["health_check_failures"] == 1
+
+
+def test_broken_connection_flushes_idle_ones():
+    pool = FakePool(max_size=3)
+    a, b, c = pool.acquire(), pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    c.closed = 1  # dropped by the server while checked out
+    pool.release(c)
+    assert a.closed and b.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_close_all_closes_in_use_connections_on_release():
+    pool = FakePool(max_size=2)
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.close_all()
+    assert idle.closed and not busy.closed
+    pool.release(busy)
+    assert busy.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_close_pools_empties_the_registry(tmp_path):
+    settings = SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME=str(tmp_path / "pool.db"))
+    with db_utils.pooled_connection(settings) as conn:
+        conn.execute("SELECT 1")
+    assert db_utils.pool_stats()
+    db_utils.close_pools()
+    assert db_utils.pool_stats() == {}
+
+
+@pytest.fixture
+def pg_settings(app_db):
+    from psycopg2.extensions import make_dsn
+
+    yield SimpleNamespace(DATA_DB_TYPE="postgres", DATA_DSN=make_dsn(app_db._dsn, options="-c statement_timeout=100"))
+    db_utils.close_pools()
+
+
+def _count_attempts(monkeypatch):
+    attempts = []
+    execute = db_utils._execute_select
+
+    def counted(settings, query):
+        attempts.append(query)
+        return execute(settings, query)
+
+    monkeypatch.setattr(db_utils, "_execute_select", counted)
+    return attempts
+
+
+def test_dropped_connection_is_retried_once(pg_settings, app_db, monkeypatch):
+    import psycopg2
+
+    db_utils.execute_select(pg_settings, "SELECT 1 AS x")
+    pid = db_utils.get_pool(pg_settings)._idle[0][0].get_backend_pid()
+    admin = psycopg2.connect(app_db._dsn)
+    try:
+        with admin, admin.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+    finally:
+        admin.close()
+    attempts = _count_attempts(monkeypatch)
+    assert db_utils.execute_select(pg_settings, "SELECT 1 AS x") == [{"x": 1}]
+    assert len(attempts) == 2
+
+
+def test_statement_timeout_is_not_retried(pg_settings, monkeypatch):
+    import psycopg2
+
+    attempts = _count_attempts(monkeypatch)
+    with pytest.raises(psycopg2.errors.QueryCanceled):
+        db_utils.execute_select(pg_settings, "SELECT pg_sleep(1)")
+    assert len(attempts) == 1
+
+
+def test_only_mysql_connection_errors_are_retried():
+    pymysql = pytest.importorskip("pymysql")
+    assert db_utils._is_connection_error(pymysql.err.OperationalError(2013, "Lost connection to MySQL server"))
+    assert not db_utils._is_connection_error(pymysql.err.OperationalError(3024, "maximum statement execution time exceeded"))
+    assert not db_utils._is_connection_error(pymysql.err.OperationalError(1205, "Lock wait timeout exceeded"))
@@ -0,0 +1,86 @@
+"""RotatingJsonlWriter rotation/compression/retention and read_events over the segments."""
+import json
+import os
+from datetime import datetime, timedelta
+
+from app.event_log import RotatingJsonlWriter, list_segments, read_events
+
+
+def _line(i, ts=None, run_id="r1", level="INFO"):
+    ts = ts or datetime.utcnow().isoformat()
+    return json.dumps({"timestamp": ts, "run_id": run_id, "level": level, "event": f"e{i:03d}"}) + "\n"
+
+
+def _events(path, **kwargs):
+    return [r["event"] for r in read_events(path, **kwargs)]
+
+
+def test_size_rotation_compresses_segments_and_reads_back_in_order(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    writer = RotatingJsonlWriter(path, max_bytes=300, daily=False, compress=True)
+    for i in range(20):
+        writer.write(_line(i))
+    writer.close()
+    segments = list_segments(path)
+    assert writer.rotations == len(segments) >= 3
+    assert all(s.endswith(".gz") for s in segments)
+    assert all(os.path.getsize(s) < 400 for s in segments)
+    assert os.path.getsize(path) <= 300
+    assert _events(path) == [f"e{i:03d}" for i in range(20)]
+
+
+def test_retention_keeps_the_newest_segments(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    writer = RotatingJsonlWriter(path, max_bytes=100, daily=False, compress=False, retention_files=2)
+    for i in range(10):
+        writer.write(_line(i))
+    writer.close()
+    assert len(list_segments(path)) == 2
+    assert _events(path)[-1] == "e009"
+
+
+def test_old_segments_are_pruned_by_age_on_startup(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    old = (datetime.utcnow() - timedelta(days=30)).strftime("%Y%m%dT%H%M%S%f")
+    stale = tmp_path / f"events.{old}.1.jsonl"
+    stale.write_text(_line(0))
+    writer = RotatingJsonlWriter(path, daily=False, compress=True, retention_days=7)
+    writer.wait_idle()
+    assert list_segments(path) == []
+    writer.close()
+
+
+def test_day_change_rotates(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    writer = RotatingJsonlWriter(path, daily=True, compress=False)
+    writer.write(_line(0))
+    writer._day = "20000101"  # the file was opened on an earlier UTC day
+    writer.write(_line(1))
+    writer.close()
+    assert writer.rotations == 1
+    assert _events(path) == ["e000", "e001"]
+
+
+def test_writers_sharing_a_file_follow_each_others_rotation(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    a = RotatingJsonlWriter(path, max_bytes=200, daily=False, compress=False)
+    b = RotatingJsonlWriter(path, max_bytes=200, daily=False, compress=False)
+    for i in range(12):
+        (a if i % 2 else b).write(_line(i))
+    a.close()
+    b.close()
+    assert a.rotations + b.rotations >= 2
+    assert sorted(_events(path)) == [f"e{i:03d}" for i in range(12)]
+
+
+def test_read_events_filters_by_time_run_and_level(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    writer = RotatingJsonlWriter(path, daily=False, compress=False)
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(6):
+        ts = (start + timedelta(minutes=i)).isoformat()
+        writer.write(_line(i, ts=ts, run_id="r1" if i % 2 else "r2", level="ERROR" if i == 3 else "INFO"))
+    writer.close()
+    assert _events(path, since=start + timedelta(minutes=2), until=start + timedelta(minutes=4)) == ["e002", "e003", "e004"]
+    assert _events(path, run_id="r1") == ["e001", "e003", "e005"]
+    assert _events(path, level="ERROR") == ["e003"]
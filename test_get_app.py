@@ -0,0 +1,15 @@
+"""get_app(): one graph, database and logger per process."""
+import threading
+
+import main
+
+
+def test_get_app_builds_once_across_threads(app_db):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(main.get_app())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(rt) for rt in seen}) == 1
+    assert seen[0][1] is app_db
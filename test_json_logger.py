@@ -0,0 +1,116 @@
+"""JsonSqlLogger: batched background writes and the LOG_OVERFLOW modes."""
+import os
+import threading
+import time
+
+import pytest
+
+from app.logging_utils import JsonSqlLogger
+
+
+class SlowDb:
+    """insert_logs() waits for `gate`, so the logger's queue fills up behind it."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.records = []
+        self.batches = 0
+
+    def insert_logs(self, records):
+        self.gate.wait(5)
+        self.records.extend(records)
+        self.batches += 1
+
+
+def _logger(tmp_path, db, overflow="block", **kwargs):
+    kwargs.setdefault("queue_size", 1)
+    kwargs.setdefault("flush_interval", 0.01)
+    return JsonSqlLogger(db, jsonl_file=str(tmp_path / "events.jsonl"), async_writes=True, batch_size=100,
+                         overflow=overflow, spill_file=str(tmp_path / "spill.jsonl"), **kwargs)
+
+
+def _fill(logger, db):
+    """One record held by the stalled flusher, one in the queue: the next log() overflows."""
+    logger.info("r", "n", "held")
+    while logger.stats()["queue_depth"]:
+        time.sleep(0.005)
+    time.sleep(0.05)  # past flush_interval: the flusher is now stuck in insert_logs
+    logger.info("r", "n", "queued")
+
+
+def test_records_are_batched(tmp_path):
+    db = SlowDb()
+    db.gate.set()
+    logger = _logger(tmp_path, db, queue_size=1000, flush_interval=0.2)
+    for i in range(50):
+        logger.info("r", "n", f"e{i}")
+    assert logger.flush()
+    assert len(db.records) == 50 and db.batches < 50
+    with open(tmp_path / "events.jsonl") as f:
+        assert len(f.readlines()) == 50
+    logger.close()
+
+
+def test_block_waits_for_room(tmp_path):
+    db = SlowDb()
+    logger = _logger(tmp_path, db, "block")
+    _fill(logger, db)
+    t = threading.Thread(target=logger.info, args=("r", "n", "overflow"))
+    t.start()
+    time.sleep(0.05)
+    assert t.is_alive()  # blocked on the full queue
+    db.gate.set()
+    t.join(2)
+    logger.close()
+    assert [r["event"] for r in db.records] == ["held", "queued", "overflow"]
+    assert logger.stats()["blocked"] == 1
+
+
+def test_drop_debug_drops_only_debug(tmp_path):
+    db = SlowDb()
+    logger = _logger(tmp_path, db, "drop-debug")
+    _fill(logger, db)
+    logger.debug("r", "n", "noise")
+    t = threading.Thread(target=logger.info, args=("r", "n", "kept"))
+    t.start()
+    time.sleep(0.05)
+    assert t.is_alive()  # INFO waits for room instead of being dropped
+    db.gate.set()
+    t.join(2)
+    logger.close()
+    assert [r["event"] for r in db.records] == ["held", "queued", "kept"]
+    stats = logger.stats()
+    assert stats["dropped"] == 1 and stats["blocked"] == 1
+
+
+def test_spill_writes_overflow_to_disk_and_loads_it_later(tmp_path):
+    db = SlowDb()
+    logger = _logger(tmp_path, db, "spill")
+    _fill(logger, db)
+    logger.info("r", "n", "spilled-1")
+    logger.error("r", "n", "spilled-2")
+    assert os.path.exists(tmp_path / "spill.jsonl")
+    db.gate.set()
+    assert logger.flush()
+    logger.close()
+    assert sorted(r["event"] for r in db.records) == ["held", "queued", "spilled-1", "spilled-2"]
+    assert logger.stats()["spilled"] == 2
+    assert not os.path.exists(tmp_path / "spill.jsonl")
+    assert not os.path.exists(tmp_path / "spill.jsonl.draining")
+
+
+def test_close_flushes_and_later_records_are_written_synchronously(tmp_path):
+    db = SlowDb()
+    db.gate.set()
+    logger = _logger(tmp_path, db, queue_size=100)
+    logger.info("r", "n", "before")
+    logger.close()
+    assert [r["event"] for r in db.records] == ["before"]
+    logger.info("r", "n", "after")
+    assert [r["event"] for r in db.records] == ["before", "after"]
+    assert not logger.stats()["async"]
+
+
+def test_unknown_overflow_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _logger(tmp_path, SlowDb(), "drop-info")
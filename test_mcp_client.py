@@ -0,0 +1,92 @@
+"""MCPClientManager pool supervision: a failed respawn is retried, not cached."""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+
+import pytest
+from mcp.server.lowlevel import Server
+from mcp.types import TextContent, Tool
+
+from mcp_client import MCPClientManager, inprocess_client
+
+echo = Server("echo")
+
+
+@echo.list_tools()
+async def list_tools():
+    return [Tool(name="echo", description="Echo the arguments", inputSchema={"type": "object"})]
+
+
+@echo.call_tool()
+async def call_tool(name, arguments):
+    return [TextContent(type="text", text=json.dumps({"status": "success", "echo": arguments}))]
+
+
+@asynccontextmanager
+async def broken_transport():
+    raise RuntimeError("transient spawn failure")
+    yield  # pragma: no cover
+
+
+@pytest.fixture
+def manager():
+    manager = MCPClientManager()
+    manager.warm_standby = False
+    manager.health_check_interval = 0.05
+
+    async def start():
+        manager._openers["echo"] = partial(inprocess_client, echo)
+        manager.pools["echo"] = [await manager._spawn_member("echo", 0)]
+        manager._initialized = True
+
+    manager.run_sync(start(), timeout=10)
+    yield manager
+    manager.cleanup_sync(timeout=10)
+    manager.shutdown()
+
+
+def _kill(manager):
+    """Stop the only member's session, as if its server process had died."""
+    async def kill():
+        member = manager.pools["echo"][0]
+        member.stop.set()
+        await asyncio.wait({member.task}, timeout=5)
+
+    manager.run_sync(kill(), timeout=10)
+
+
+def _call(manager):
+    return manager.call_tool_sync("echo", "echo", {"x": 1}, timeout=10)
+
+
+def test_failed_respawn_is_retried_by_the_next_call(manager):
+    _kill(manager)
+    manager._openers["echo"] = broken_transport
+    failed = _call(manager)
+    assert "could not be restarted: transient spawn failure" in failed["error"]
+    member = manager.pools["echo"][0]
+    assert not member.alive and member.replacement is None and member.respawn_failures == 1
+
+    manager._openers["echo"] = partial(inprocess_client, echo)
+    assert _call(manager) == {"status": "success", "echo": {"x": 1}}
+    stats = manager.pool_stats()["echo"]
+    assert stats["restarts"] == 1 and stats["members"][0]["alive"]
+
+
+def test_supervisor_restarts_a_member_whose_respawn_failed(manager):
+    manager.run_sync(_start_supervisor(manager), timeout=10)
+    _kill(manager)
+    manager._openers["echo"] = broken_transport
+    assert "could not be restarted" in _call(manager)["error"]
+    manager._openers["echo"] = partial(inprocess_client, echo)
+    deadline = time.monotonic() + 5
+    while not manager.pool_stats()["echo"]["members"][0]["alive"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert manager.pool_stats()["echo"]["restarts"] == 1
+    assert _call(manager)["status"] == "success"
+
+
+async def _start_supervisor(manager):
+    manager._supervisor_task = asyncio.create_task(manager._supervise())
@@ -0,0 +1,33 @@
+"""nlp_agent OpenAI clients: one per API key and event loop, closed with the loop."""
+import asyncio
+
+from agents import nlp_agent
+
+
+def test_async_client_is_reused_within_a_loop_and_closed():
+    async def runs():
+        first = nlp_agent._async_client("sk-test")
+        assert nlp_agent._async_client("sk-test") is first
+        assert nlp_agent._async_client("sk-other") is not first
+        await nlp_agent.aclose_clients()
+        assert first.is_closed()
+        return first
+
+    first = asyncio.run(runs())
+    # A new loop (asyncio.run per batch) gets its own client
+    assert asyncio.run(runs()) is not first
+
+
+def test_clients_of_closed_loops_are_dropped():
+    async def make():
+        return nlp_agent._async_client("sk-test")
+
+    nlp_agent._async_clients.clear()
+    asyncio.run(make())
+    asyncio.run(make())
+    # The second loop's lookup dropped the first (closed) loop's client
+    assert len(nlp_agent._async_clients) == 1
+
+
+def test_sync_client_is_shared():
+    assert nlp_agent._client("sk-test") is nlp_agent._client("sk-test")
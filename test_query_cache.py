@@ -0,0 +1,75 @@
+"""db_server QueryResultCache: TTL expiry, LRU order and the byte budget."""
+import json
+import time
+
+from mcp_servers.db_server import CachedResult, QueryResultCache, normalize_sql
+
+
+def _rows(n, width=10):
+    return [{"id": i, "name": "x" * width} for i in range(n)]
+
+
+def _put(cache, key, rows):
+    entry = CachedResult(rows)
+    cache.put(key, entry)
+    cache.fragment(key, entry, "rows")
+    return entry
+
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("SELECT  *\n FROM t WHERE a = 'x  y';") == "SELECT * FROM t WHERE a = 'x  y'"
+
+
+def test_ttl_expiry():
+    cache = QueryResultCache(ttl=0.05, max_bytes=1 << 20)
+    _put(cache, ("p", "q", 10), _rows(3))
+    assert cache.get(("p", "q", 10)) is not None
+    time.sleep(0.08)
+    assert cache.get(("p", "q", 10)) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_byte_budget_evicts_least_recently_used():
+    probe = QueryResultCache(ttl=60, max_bytes=1 << 20)
+    size = _put(probe, "k", _rows(20)).size
+    cache = QueryResultCache(ttl=60, max_bytes=size * 2)
+    _put(cache, "a", _rows(20))
+    _put(cache, "b", _rows(20))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    _put(cache, "c", _rows(20))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= size * 2
+
+
+def test_entry_larger_than_budget_is_not_kept():
+    cache = QueryResultCache(ttl=60, max_bytes=50)
+    _put(cache, "big", _rows(100))
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_retained_rows_count_towards_the_budget():
+    rows = _rows(100)
+    entry = CachedResult(rows)
+    assert entry.size > len(json.dumps(rows))  # dicts take more memory than their JSON
+    cache = QueryResultCache(ttl=60, max_bytes=entry.size - 1)
+    cache.put("k", entry)  # over budget before any format was encoded
+    assert cache.get("k") is None and cache.stats()["bytes"] == 0
+
+
+def test_fragment_is_encoded_once_per_format():
+    cache = QueryResultCache(ttl=60, max_bytes=1 << 20)
+    entry = _put(cache, "k", _rows(5))
+    first = cache.fragment("k", entry, "rows")
+    assert cache.fragment("k", entry, "rows") is first
+    before = cache.stats()["bytes"]
+    cache.fragment("k", entry, "columnar")
+    assert cache.stats()["bytes"] > before
+
+
+def test_disabled_without_ttl_or_budget():
+    assert not QueryResultCache(ttl=0, max_bytes=100).enabled
+    assert not QueryResultCache(ttl=10, max_bytes=0).enabled
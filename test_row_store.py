@@ -0,0 +1,91 @@
+"""RowSet/RowStore: spilling, iteration, mixed-key rows and run-scoped release."""
+import json
+import os
+import stat
+from datetime import date
+from decimal import Decimal
+
+from app.row_store import RowSet, RowStore, _private_dir
+
+
+def _rowset(tmp_path, spill_rows=4, chunk_rows=2):
+    return RowSet("h", str(tmp_path / "h.rows"), spill_rows, chunk_rows)
+
+
+def test_small_result_stays_in_memory(tmp_path):
+    rows = _rowset(tmp_path, spill_rows=10)
+    rows.append_rows({"id": i, "v": i * 2} for i in range(3))
+    assert not rows.spilled and rows.count == 3
+    assert rows.columns == ["id", "v"]
+    assert rows.head(2) == [{"id": 0, "v": 0}, {"id": 1, "v": 2}]
+
+
+def test_large_result_spills_whole_chunks_and_iterates_in_order(tmp_path):
+    rows = _rowset(tmp_path, spill_rows=4, chunk_rows=2)
+    rows.append_rows({"id": i} for i in range(9))
+    assert rows.spilled and os.path.exists(rows.path)
+    assert len(rows._tail) < rows.chunk_rows
+    assert [r["id"] for r in rows.iter_rows()] == list(range(9))
+
+
+def test_columnar_pages_in_another_order_are_aligned(tmp_path):
+    rows = _rowset(tmp_path)
+    rows.append_columnar(["a", "b"], [[1, 2]])
+    rows.append_columnar(["b", "a"], [[4, 3]])
+    rows.append_columnar(["a"], [[5]])
+    assert list(rows.iter_rows()) == [{"a": 1, "b": 2}, {"a": 3, "b": 4}, {"a": 5, "b": None}]
+
+
+def test_mixed_keys_widen_columns_across_batches_and_spill(tmp_path):
+    rows = _rowset(tmp_path, spill_rows=2, chunk_rows=2)
+    # Within one batch the union of keys is kept, not just the first row's
+    rows.append_rows([{"a": 1}, {"a": 2, "b": "x"}, {"a": 3}])
+    assert rows.spilled
+    # A later batch brings a new key after earlier rows were spilled
+    rows.append_rows([{"c": True}, {"a": 5, "c": False}])
+    assert rows.columns == ["a", "b", "c"]
+    assert list(rows.iter_rows()) == [
+        {"a": 1, "b": None, "c": None},
+        {"a": 2, "b": "x", "c": None},
+        {"a": 3, "b": None, "c": None},
+        {"a": None, "b": None, "c": True},
+        {"a": 5, "b": None, "c": False},
+    ]
+    assert rows.count == 5
+
+
+def test_failed_run_rows_survive_release_and_reopen(tmp_path):
+    store = RowStore(str(tmp_path), spill_rows=100, chunk_rows=10)
+    rows = store.create("run1")
+    rows.append_rows([{"id": 1}, {"id": 2, "extra": "y"}])
+    store.release_run("run1", keep=True)
+    assert store.stats()["row_sets"] == 0
+    reopened = store.get(rows.handle)
+    assert reopened.count == 2
+    assert list(reopened.iter_rows()) == [{"id": 1, "extra": None}, {"id": 2, "extra": "y"}]
+
+
+def test_shared_rows_are_deleted_after_the_last_holder(tmp_path):
+    store = RowStore(str(tmp_path), spill_rows=1, chunk_rows=1)
+    rows = store.create("run1")
+    rows.append_rows({"id": i} for i in range(3))
+    store.retain(rows.handle, "run2")
+    store.release_run("run1")
+    assert store.get(rows.handle) is rows
+    store.release_run("run2")
+    assert not os.path.exists(rows.path)
+    assert store.purge(0) == 0
+
+
+def test_spill_file_is_plain_json(tmp_path):
+    rows = _rowset(tmp_path, spill_rows=1, chunk_rows=1)
+    rows.append_rows([{"d": date(2026, 1, 2), "amount": Decimal("1.50")}, {"d": None, "amount": 2}])
+    with open(rows.path, encoding="utf-8") as f:
+        chunks = [json.loads(line) for line in f]
+    assert chunks == [[["2026-01-02", "1.50"]], [[None, 2]]]
+    assert list(rows.iter_rows())[0] == {"d": "2026-01-02", "amount": "1.50"}
+
+
+def test_default_directory_is_private():
+    path = _private_dir()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
@@ -0,0 +1,113 @@
+"""In-process RunQueue: bounded depth, per-user limit, round-robin and shutdown."""
+import asyncio
+
+import pytest
+
+from app.run_queue import QueueFull, RunQueue
+
+
+class FakeDb:
+    def __init__(self):
+        self.runs = {}
+
+    def enqueue_run(self, run_id, question, user_id):
+        self.runs[run_id] = "queued"
+
+    def finish_run(self, run_id, status, result=None):
+        self.runs[run_id] = status
+
+
+class Runner:
+    """Records the questions it runs; blocks on `gate` until the test opens it."""
+
+    def __init__(self):
+        self.seen = []
+        self.gate = asyncio.Event()
+
+    async def __call__(self, question, overrides, user_id, run_id):
+        self.seen.append(question)
+        await self.gate.wait()
+        if question == "boom":
+            raise RuntimeError("boom")
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_depth_and_per_user_limits():
+    async def scenario():
+        runner, db = Runner(), FakeDb()
+        queue = RunQueue(runner, db, workers=1, max_depth=3, max_per_user=2)
+        await queue.start()
+        await queue.submit("busy", {}, "a")
+        await _settle()  # the only worker is now blocked on "busy"
+        await queue.submit("a1", {}, "a")
+        await queue.submit("a2", {}, "a")
+        with pytest.raises(QueueFull) as per_user:
+            await queue.submit("a3", {}, "a")
+        await queue.submit("b1", {}, "b")
+        with pytest.raises(QueueFull) as full:
+            await queue.submit("c1", {}, "c")
+        assert per_user.value.retry_after >= 1 and full.value.retry_after >= 1
+        stats = queue.stats()
+        assert stats["pending"] == 3 and stats["running"] == 1 and stats["rejected"] == 2
+        runner.gate.set()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_users_are_served_round_robin():
+    async def scenario():
+        runner, db = Runner(), FakeDb()
+        queue = RunQueue(runner, db, workers=1, max_depth=10)
+        await queue.start()
+        await queue.submit("busy", {}, "a")
+        await _settle()
+        ids = [await queue.submit(q, {}, u) for q, u in (("a1", "a"), ("a2", "a"), ("b1", "b"))]
+        assert [queue.position(i) for i in ids] == [0, 2, 1]
+        runner.gate.set()
+        while len(runner.seen) < 4:
+            await asyncio.sleep(0.01)
+        assert runner.seen == ["busy", "a1", "b1", "a2"]
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_run_is_marked_error():
+    async def scenario():
+        runner, db = Runner(), FakeDb()
+        runner.gate.set()
+        queue = RunQueue(runner, db, workers=2)
+        await queue.start()
+        run_id = await queue.submit("boom", {}, "a")
+        while queue.stats()["failed"] == 0:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return db.runs[run_id]
+
+    assert asyncio.run(scenario()) == "error"
+
+
+def test_stop_cancels_pending_and_running_runs():
+    async def scenario():
+        runner, db = Runner(), FakeDb()
+        queue = RunQueue(runner, db, workers=1)
+        await queue.start()
+        running = await queue.submit("busy", {}, "a")
+        await _settle()
+        pending = await queue.submit("later", {}, "b")
+        await queue.stop()
+        assert queue.stats()["pending"] == 0
+        return db.runs[running], db.runs[pending]
+
+    assert asyncio.run(scenario()) == ("cancelled", "cancelled")
+
+
+def test_submit_before_start_is_rejected():
+    queue = RunQueue(Runner(), FakeDb())
+    with pytest.raises(RuntimeError):
+        asyncio.run(queue.submit("q", {}, "a"))
@@ -0,0 +1,145 @@
+"""SchemaCatalog: TTL, refresh on unknown tables, invalidation and per-profile loading."""
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents import db_agent
+from utils import db_utils
+from utils.db_utils import SchemaCatalog
+
+
+@pytest.fixture
+def sqlite_settings(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sales (id INTEGER, amount REAL)")
+    conn.commit()
+    conn.close()
+    yield SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME=path)
+    db_utils.close_pools()
+
+
+def _execute(settings, sql):
+    conn = sqlite3.connect(settings.DATA_NAME)
+    conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def test_schema_is_loaded_once_then_served_from_cache(sqlite_settings):
+    catalog = SchemaCatalog(ttl=60)
+    first = catalog.describe(sqlite_settings, "sales")
+    second = catalog.describe(sqlite_settings, "sales")
+    assert [c["name"] for c in first["columns"]] == ["id", "amount"]
+    assert not first["cached"] and second["cached"]
+    assert catalog.stats()["loads"] == 1
+
+
+def test_ttl_expiry_reloads(sqlite_settings):
+    catalog = SchemaCatalog(ttl=0.05)
+    catalog.describe(sqlite_settings, "sales")
+    time.sleep(0.08)
+    catalog.describe(sqlite_settings, "sales")
+    assert catalog.stats()["loads"] == 2
+
+
+def test_unknown_table_triggers_one_refresh(sqlite_settings):
+    catalog = SchemaCatalog(ttl=60)
+    catalog.describe(sqlite_settings, "sales")
+    _execute(sqlite_settings, "CREATE TABLE refunds (id INTEGER)")
+    info = catalog.describe(sqlite_settings, "refunds")
+    assert info["found"] and catalog.stats()["loads"] == 2
+
+
+def test_missing_table_is_not_reloaded_again_within_the_ttl(sqlite_settings):
+    catalog = SchemaCatalog(ttl=60)
+    catalog.describe(sqlite_settings, "sales")
+    for _ in range(3):
+        assert not catalog.describe(sqlite_settings, "nope")["found"]
+    assert catalog.stats()["loads"] == 2  # one refresh for the first miss only
+    # invalidate() forgets the miss along with the schema
+    _execute(sqlite_settings, "CREATE TABLE nope (id INTEGER)")
+    catalog.invalidate(sqlite_settings)
+    assert catalog.describe(sqlite_settings, "nope")["found"]
+
+
+def test_expired_schemas_and_their_load_locks_are_dropped(monkeypatch):
+    monkeypatch.setattr(db_utils, "load_schema_columns", lambda settings, schema: {"t": []})
+    catalog = SchemaCatalog(ttl=0.05)
+    for i in range(5):
+        catalog.get_schema(SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME=f"/tmp/p{i}.db"))
+    assert catalog.stats()["load_locks"] == 5
+    time.sleep(0.08)
+    catalog.get_schema(SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME="/tmp/last.db"))
+    stats = catalog.stats()
+    assert stats["entries"] == 1 and stats["load_locks"] == 1
+    catalog.invalidate()
+    assert catalog.stats()["load_locks"] == 0
+
+
+def test_invalidate_picks_up_changed_columns(sqlite_settings, tmp_path):
+    catalog = SchemaCatalog(ttl=60)
+    other = SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME=str(tmp_path / "other.db"))
+    _execute(other, "CREATE TABLE t (x INTEGER)")
+    before = catalog.fingerprint(sqlite_settings)
+    catalog.fingerprint(other)
+    _execute(sqlite_settings, "ALTER TABLE sales ADD COLUMN region TEXT")
+    assert catalog.fingerprint(sqlite_settings) == before  # still cached
+    assert catalog.invalidate(sqlite_settings) == 1
+    assert catalog.fingerprint(sqlite_settings) != before
+    assert catalog.stats()["entries"] == 2  # the other profile was kept
+    assert "region" in [c["name"] for c in catalog.describe(sqlite_settings, "sales")["columns"]]
+
+
+def test_loads_are_serialized_per_profile_only(monkeypatch):
+    active, peak, calls = [0], [0], []
+    lock = threading.Lock()
+
+    def slow_load(settings, schema):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            calls.append(settings.DATA_NAME)
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+        return {"t": [{"name": "x", "type": "int"}]}
+
+    monkeypatch.setattr(db_utils, "load_schema_columns", slow_load)
+    catalog = SchemaCatalog(ttl=60)
+    profiles = [SimpleNamespace(DATA_DB_TYPE="sqlite", DATA_NAME=f"/tmp/p{i}.db") for i in (1, 2)]
+    # Two threads per profile: each profile loads once, the two profiles at the same time
+    threads = [threading.Thread(target=catalog.get_schema, args=(p,)) for p in profiles for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(calls) == ["/tmp/p1.db", "/tmp/p2.db"]
+    assert peak[0] == 2
+
+
+@pytest.mark.parametrize("message", [
+    'relation "sales" does not exist',
+    'column "amount" does not exist',
+    "no such table: sales",
+    "no such column: amount",
+    "(1054, \"Unknown column 'amount' in 'field list'\")",
+    "(1146, \"Table 'shop.sales' doesn't exist\")",
+])
+def test_schema_errors_are_recognized(message):
+    assert db_utils.is_schema_error(message)
+    assert db_utils.is_schema_error(Exception(message))
+
+
+def test_other_errors_are_not_schema_errors():
+    assert not db_utils.is_schema_error("syntax error at or near \"FROM\"")
+    assert not db_utils.is_schema_error(TimeoutError("timed out"))
+
+
+def test_db_agent_drops_the_cached_schema_on_undefined_column(sqlite_settings):
+    db_utils.schema_catalog.describe(sqlite_settings, "sales")
+    db_agent._forget_stale_schema(sqlite_settings, Exception("no such column: region"))
+    assert db_utils.schema_catalog.invalidate(sqlite_settings) == 0
@@ -0,0 +1,76 @@
+"""SingleFlight and run_key: coalescing, fresh-result reuse and what makes two runs identical."""
+import threading
+import time
+
+import pytest
+
+from app.single_flight import SingleFlight, normalize_question, run_key
+
+
+def test_normalize_question():
+    assert normalize_question("  Total   Sales by Region?? ") == "total sales by region"
+
+
+def test_run_key_identity():
+    base = run_key("Total sales?", "p1", {"DATA_TABLE": "sales", "DATA_PASSWORD": "x"}, "alice")
+    assert base == run_key("total  sales", "p1", {"DATA_PASSWORD": "y", "DATA_TABLE": "sales"}, "alice")
+    assert base != run_key("total sales", "p2", {"DATA_TABLE": "sales"}, "alice")
+    assert base != run_key("total sales", "p1", {"DATA_TABLE": "orders"}, "alice")
+    # Runs read and write the user's memory, so users never share a run
+    assert base != run_key("total sales", "p1", {"DATA_TABLE": "sales"}, "bob")
+
+
+def test_waiters_get_the_leaders_result():
+    flights = SingleFlight(ttl=0)
+    state, future = flights.begin("k")
+    assert state == "lead"
+    results = []
+
+    def waiter():
+        state, value = flights.begin("k")
+        results.append((state, value.result(timeout=2)))
+
+    threads = [threading.Thread(target=waiter) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    flights.finish("k", future, result={"status": "success", "run_id": "r1"})
+    for t in threads:
+        t.join()
+    assert results == [("wait", {"status": "success", "run_id": "r1"})] * 3
+    stats = flights.stats()
+    assert stats["leads"] == 1 and stats["coalesced"] == 3 and stats["inflight"] == 0
+    assert flights.begin("k")[0] == "lead"  # ttl=0: nothing is reused
+
+
+def test_leader_error_reaches_waiters_and_is_not_cached():
+    flights = SingleFlight(ttl=60)
+    _, future = flights.begin("k")
+    _, waiting = flights.begin("k")
+    flights.finish("k", future, error=RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        waiting.result(timeout=1)
+    assert flights.begin("k")[0] == "lead"
+
+
+def test_only_successful_results_are_reused_until_ttl():
+    flights = SingleFlight(ttl=0.05)
+    _, future = flights.begin("failed")
+    flights.finish("failed", future, result={"status": "error"})
+    assert flights.begin("failed")[0] == "lead"
+
+    _, future = flights.begin("ok")
+    flights.finish("ok", future, result={"status": "success"})
+    assert flights.begin("ok") == ("fresh", {"status": "success"})
+    time.sleep(0.08)
+    assert flights.begin("ok")[0] == "lead"
+
+
+def test_recent_results_are_bounded():
+    flights = SingleFlight(ttl=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        _, future = flights.begin(key)
+        flights.finish(key, future, result={"status": "success"})
+    assert flights.stats()["fresh_entries"] == 2
+    assert flights.begin("a")[0] == "lead"
+    assert flights.begin("c")[0] == "fresh"
@@ -0,0 +1,236 @@
+"""Postgres work queue (run_jobs): claim, lease, retry, expiry and the worker's failure handling."""
+import asyncio
+import json
+import os
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.run_queue import PostgresRunQueue, QueueFull
+from worker import QueueWorker, is_transient, run_error
+
+
+def _enqueue(db, run_id, max_attempts=2, user_id="u1", dedupe_key=None):
+    return db.enqueue_job(run_id, f"question {run_id}", {"DATA_TABLE": "sales"}, user_id, max_attempts, dedupe_key)
+
+
+def test_claim_leases_the_oldest_job(queue_db):
+    _enqueue(queue_db, "r1")
+    _enqueue(queue_db, "r2")
+    assert queue_db.job_position("r2") == 1
+    job = queue_db.claim_job("w1", lease_seconds=60)
+    assert job["run_id"] == "r1" and job["attempts"] == 1
+    assert job["overrides"] == {"DATA_TABLE": "sales"}
+    assert queue_db.claim_job("w2", lease_seconds=60)["run_id"] == "r2"
+    assert queue_db.claim_job("w3", lease_seconds=60) is None
+    assert queue_db.job_counts() == {"running": 2}
+
+
+def test_dedupe_key_enqueues_once(queue_db):
+    assert _enqueue(queue_db, "r1", dedupe_key="k")
+    assert not _enqueue(queue_db, "r2", dedupe_key="k")
+    assert queue_db.pending_jobs() == 1 and queue_db.get_run("r2") is None
+
+
+def test_scheduled_firing_is_enqueued_once_across_replicas(queue_db, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "get_app", lambda: (None, queue_db, None))
+    req = server.ScheduleJobRequest(question="daily sales", frequency="daily", time="06:00", table="sales")
+    overrides = server._mk_overrides_from_schedule(req)
+    # Every replica derives the same key from the request (not its random job id)
+    replicas = [server._schedule_key(req, dict(overrides)) for _ in range(2)]
+    for key in replicas:
+        server._enqueue_scheduled_run(key, req.question, overrides)
+    assert queue_db.job_counts() == {"pending": 1}
+    other = server.ScheduleJobRequest(question="daily sales", frequency="weekly", time="06:00", table="sales")
+    assert server._schedule_key(other, overrides) != replicas[0]
+
+
+def test_failed_attempt_backs_off_then_fails_for_good(queue_db):
+    _enqueue(queue_db, "r1", max_attempts=2)
+    job = queue_db.claim_job("w1", 60)
+    assert queue_db.fail_job(job["id"], "w1", "boom", retry_delay=30) == "pending"
+    assert queue_db.claim_job("w1", 60) is None  # still backing off
+    _enqueue(queue_db, "r2", max_attempts=1)
+    job2 = queue_db.claim_job("w1", 60)
+    assert job2["run_id"] == "r2"
+    assert queue_db.fail_job(job2["id"], "w1", "boom", retry_delay=0) == "failed"
+    assert queue_db.fail_job(job2["id"], "w1", "boom", retry_delay=0) == "lost"
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_it(queue_db):
+    _enqueue(queue_db, "r1", max_attempts=2)
+    first = queue_db.claim_job("w1", 60)
+    time.sleep(0.05)
+    again = queue_db.claim_job("w2", lease_seconds=0.01)
+    assert again["id"] == first["id"] and again["attempts"] == 2
+    assert queue_db.heartbeat_jobs([first["id"]], "w1") == []
+    assert queue_db.heartbeat_jobs([first["id"]], "w2") == [first["id"]]
+    # The second lease also lapses on the last attempt: the job is failed, not re-run
+    time.sleep(0.05)
+    assert queue_db.claim_job("w3", lease_seconds=0.01) is None
+    assert queue_db.expire_jobs(0.01) == ["r1"]
+    assert queue_db.job_counts() == {"failed": 1}
+
+
+def test_postgres_run_queue_limits(queue_db):
+    async def scenario():
+        queue = PostgresRunQueue(queue_db, max_depth=2, max_per_user=1)
+        first = await queue.submit("q1", {}, "a", dedupe_key="same")
+        assert await queue.submit("q1", {}, "b", dedupe_key="same") is None
+        with pytest.raises(QueueFull):
+            await queue.submit("q2", {}, "a")  # user a already has a pending run
+        await queue.submit("q3", {}, "c")
+        with pytest.raises(QueueFull):
+            await queue.submit("q4", {}, "d")  # two pending: queue full
+        return first, queue
+
+    first, queue = asyncio.run(scenario())
+    assert queue.position(first) == 0
+    assert queue.stats()["rejected"] == 2
+
+
+def test_run_error_reads_failed_node():
+    assert run_error({"status": "success", "supervisor_ok": True}) is None
+    failed = {"status": "error", "last_node": "db", "last_result": {"status": "error", "log": {"error": "timeout"}}}
+    assert run_error(failed) == "node db failed: timeout"
+    join = {"status": "success", "supervisor_ok": False, "last_node": "artifacts",
+            "last_result": {"status": "error", "log": {"failed": ["report"]}}}
+    assert run_error(join) == "node artifacts failed: ['report']"
+
+
+def test_worker_retries_runs_that_return_an_error(queue_db, monkeypatch):
+    worker = QueueWorker(worker_id="w-test")
+    worker.db, worker.retry_delay = queue_db, 0
+    failed = {"status": "error", "last_node": "db", "last_result": {"status": "error", "log": {"error": "timeout"}}}
+    monkeypatch.setattr(worker, "_run", lambda job: failed)
+    _enqueue(queue_db, "r1", max_attempts=2)
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"pending": 1}
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"failed": 1}
+    run = queue_db.get_run("r1")
+    assert run["status"] == "error"
+    assert run["result"] == {"error": "node db failed: timeout", "attempts": 2}
+
+
+def test_run_error_names_why_join_branches_failed():
+    join = {"status": "success", "supervisor_ok": False, "last_node": "artifacts",
+            "last_result": {"status": "error", "log": {"failed": ["report"]},
+                            "data": {"branches": {"csv": {"status": "success"},
+                                                  "report": {"status": "error", "log": {"error": "timed out"}}}}}}
+    assert run_error(join) == "node artifacts failed: report: timed out"
+
+
+def test_only_transient_failures_are_retried():
+    assert is_transient(RuntimeError("node db failed: connection refused"))
+    assert is_transient(TimeoutError())
+    assert not is_transient(RuntimeError("node db failed: no_rows_from_db"))
+    assert not is_transient(RuntimeError("node artifacts failed: ['report']"))
+
+
+def test_worker_fails_deterministic_errors_without_retrying(queue_db, monkeypatch):
+    worker = QueueWorker(worker_id="w-test")
+    worker.db, worker.retry_delay = queue_db, 0
+    failed = {"status": "error", "last_node": "db", "last_result": {"status": "error", "log": {"error": "no_rows_from_db"}}}
+    monkeypatch.setattr(worker, "_run", lambda job: failed)
+    _enqueue(queue_db, "r1", max_attempts=3)
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"failed": 1}
+    assert queue_db.get_run("r1")["result"] == {"error": "node db failed: no_rows_from_db", "attempts": 1}
+
+
+def test_worker_completes_successful_runs(queue_db, monkeypatch):
+    worker = QueueWorker(worker_id="w-test")
+    worker.db = queue_db
+    monkeypatch.setattr(worker, "_run", lambda job: {"status": "success", "supervisor_ok": True})
+    _enqueue(queue_db, "r1")
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"done": 1}
+
+
+def test_worker_resumes_a_failed_node_on_the_next_attempt(queue_db, pipeline, monkeypatch):
+    from main import get_app
+    from utils import pdf_utils
+
+    create_pdf = pdf_utils.create_pdf_summary
+    calls = []
+
+    def flaky_pdf(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise TimeoutError("renderer timed out")
+        return create_pdf(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_utils, "create_pdf_summary", flaky_pdf)
+    worker = QueueWorker(worker_id="w-test")
+    worker.db, worker.retry_delay = queue_db, 0
+    run_id = f"resume-{uuid4()}"
+    queue_db.enqueue_job(run_id, "total sales by region", pipeline, "u1", 2)
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"pending": 1}
+    worker._execute(queue_db.claim_job(worker.worker_id, 60))
+    assert queue_db.job_counts() == {"done": 1}
+    assert len(calls) == 2
+    # Attempt 2 started from the checkpoint before the failed branch: db ran once, report twice
+    nodes = [span["node"] for span in get_app()[1].get_spans(run_id)]
+    assert nodes.count("db") == 1 and nodes.count("report") == 2
+
+
+def test_resume_requeries_when_the_rows_are_gone(pipeline, monkeypatch):
+    from main import get_app, resume_run, run_once
+    from app.row_store import row_store
+    from utils import pdf_utils
+
+    create_pdf = pdf_utils.create_pdf_summary
+    calls = []
+
+    def flaky_pdf(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("renderer crashed")
+        return create_pdf(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_utils, "create_pdf_summary", flaky_pdf)
+    run_id = f"rows-{uuid4()}"
+    app, db, _ = get_app()
+    first = run_once("total sales by region", overrides=pipeline, run_id=run_id)
+    assert first["supervisor_ok"] is False
+    # As if the resume ran on another worker: the spilled rows are not there
+    handle = app.get_state({"configurable": {"thread_id": run_id}}).values["rows_handle"]
+    path = row_store._path(handle)
+    for p in (path, path + ".json"):
+        os.remove(p)
+    out = resume_run(run_id, secrets=pipeline)
+    assert out["status"] == "success" and out["supervisor_ok"]
+    nodes = [span["node"] for span in db.get_spans(run_id)]
+    assert nodes.count("db") == 2 and nodes.count("report") == 2
+
+
+def test_checkpoints_keep_no_credentials(pipeline, monkeypatch):
+    from main import get_app, resume_run, run_once
+    from utils import pdf_utils
+
+    create_pdf = pdf_utils.create_pdf_summary
+    calls = []
+
+    def flaky_pdf(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("renderer crashed")
+        return create_pdf(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_utils, "create_pdf_summary", flaky_pdf)
+    run_id = f"secrets-{uuid4()}"
+    overrides = dict(pipeline, DATA_PASSWORD="s3cret", SENDGRID_API_KEY="SG.key")
+    assert run_once("total sales by region", overrides=overrides, run_id=run_id)["supervisor_ok"] is False
+    app = get_app()[0]
+    for snapshot in app.get_state_history({"configurable": {"thread_id": run_id}}):
+        stored = json.dumps(snapshot.metadata)
+        assert "s3cret" not in stored and "SG.key" not in stored
+    with pytest.raises(ValueError, match="DATA_PASSWORD, SENDGRID_API_KEY"):
+        resume_run(run_id, secrets=pipeline)
+    out = resume_run(run_id, secrets=overrides)
+    assert out["status"] == "success" and out["supervisor_ok"]
@@ -1,9 +1,9 @@
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
-import matplotlib
-matplotlib.use("Agg")  # non-interactive backend
-import matplotlib.pyplot as plt
+from uuid import uuid4
+from itertools import chain, islice
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from matplotlib.figure import Figure  # no pyplot: its global figure state is not thread-safe
 
 
 def _pick_categorical_column(rows: List[Dict[str, Any]]) -> Optional[str]:
@@ -31,15 +31,18 @@ essential_colors = [
 ]
 
 
-def make_bar_chart_from_rows(rows: List[Dict[str, Any]], column: Optional[str] = None, top_k: int = 10, title: Optional[str] = None) -> Optional[str]:
-    if not rows:
+def make_bar_chart_from_rows(rows: Iterable[Dict[str, Any]], column: Optional[str] = None, top_k: int = 10, title: Optional[str] = None) -> Optional[str]:
+    # The column is picked from a sample; counting then streams over every row once
+    it = iter(rows)
+    sample = list(islice(it, 500))
+    if not sample:
         return None
     os.makedirs("artifacts", exist_ok=True)
-    col = column or _pick_categorical_column(rows)
+    col = column or _pick_categorical_column(sample)
     if not col:
         return None
     counts = {}
-    for r in rows:
+    for r in chain(sample, it):
         key = str(r.get(col, ""))
         counts[key] = counts.get(key, 0) + 1
     items = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
@@ -47,18 +50,20 @@ def make_bar_chart_from_rows(rows: List[Dict[str, Any]], column: Optional[str] =
     values = [v for _, v in items]
     if not items:
         return None
-    plt.figure(figsize=(8, 4.5), dpi=150)
-    bars = plt.bar(labels, values, color=essential_colors[: len(labels)])
-    plt.xticks(rotation=30, ha="right")
-    plt.ylabel("Count")
-    plt.title(title or f"Top {top_k} by {col}")
+    fig = Figure(figsize=(8, 4.5), dpi=150)
+    ax = fig.subplots()
+    bars = ax.bar(labels, values, color=essential_colors[: len(labels)])
+    ax.tick_params(axis="x", labelrotation=30)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.set_ylabel("Count")
+    ax.set_title(title or f"Top {top_k} by {col}")
     # annotate
     for b in bars:
         h = b.get_height()
-        plt.text(b.get_x() + b.get_width() / 2, h, f"{int(h)}", ha="center", va="bottom", fontsize=8)
-    plt.tight_layout()
+        ax.text(b.get_x() + b.get_width() / 2, h, f"{int(h)}", ha="center", va="bottom", fontsize=8)
+    fig.tight_layout()
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    out_path = os.path.join("artifacts", f"chart-{ts}.png")
-    plt.savefig(out_path)
-    plt.close()
+    out_path = os.path.join("artifacts", f"chart-{ts}-{uuid4().hex[:6]}.png")
+    fig.savefig(out_path)
     return out_path
@@ -1,21 +1,28 @@
 import os
 import csv
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from uuid import uuid4
+from typing import Iterable, List, Dict, Any, Optional
 
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def write_csv_rows(rows: List[Dict[str, Any]], file_path: Optional[str] = None) -> str:
+def write_csv_rows(rows: Iterable[Dict[str, Any]], file_path: Optional[str] = None,
+                   fieldnames: Optional[List[str]] = None) -> str:
+    """Write rows to a CSV file; with fieldnames, rows are streamed in a single pass."""
     _ensure_dir("artifacts")
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    out_path = file_path or os.path.join("artifacts", f"data-{ts}.csv")
-    fieldnames = set()
-    for r in rows:
-        fieldnames.update(r.keys())
-    headers = list(fieldnames)
+    out_path = file_path or os.path.join("artifacts", f"data-{ts}-{uuid4().hex[:6]}.csv")
+    if fieldnames is None:
+        rows = list(rows)
+        union = set()
+        for r in rows:
+            union.update(r.keys())
+        headers = list(union)
+    else:
+        headers = list(fieldnames)
     with open(out_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=headers)
         writer.writeheader()
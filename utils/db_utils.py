@@ -1,14 +1,23 @@
+import hashlib
+import json
 import os
 import re
 import sqlite3
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 try:
     import pymysql  # type: ignore
     from pymysql.cursors import DictCursor as MySQLDictCursor  # type: ignore
+    from pymysql.cursors import SSDictCursor as MySQLSSDictCursor  # type: ignore
 except Exception:  # pragma: no cover
     pymysql = None
     MySQLDictCursor = None  # type: ignore
+    MySQLSSDictCursor = None  # type: ignore
 
 try:
     import psycopg2  # type: ignore
@@ -18,18 +27,32 @@ except Exception:  # pragma: no cover
     pg_extras = None  # type: ignore
 
 
+from app.config import settings as _app_settings
+from app import timing
+
+
 FORBIDDEN = re.compile(r"\b(insert|update|delete|drop|alter|create|truncate|grant|revoke)\b", re.IGNORECASE)
 SELECT_START = re.compile(r"^\s*select\b", re.IGNORECASE)
+# Undefined table/column errors (Postgres, SQLite, MySQL): the cached schema is stale
+SCHEMA_ERROR = re.compile(
+    r"(relation|column) \S+ does not exist|no such (table|column)|unknown column|table \S+ doesn't exist",
+    re.IGNORECASE,
+)
+_SCHEMA_PGCODES = ("42P01", "42703")
+# Failures a fresh connection can fix: Postgres server shutdowns (class 08 is
+# checked by prefix) and MySQL can't connect / server gone away / lost connection
+_CONNECTION_PGCODES = ("57P01", "57P02", "57P03")
+_CONNECTION_MYSQL_ERRNOS = (2003, 2006, 2013, 2055)
 HAS_LIMIT = re.compile(r"\blimit\b", re.IGNORECASE)
 
 
-def _sqlite_connect(path: str):
-    conn = sqlite3.connect(path)
+def _sqlite_connect(path: str, check_same_thread: bool = True):
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def connect(settings):
+def connect(settings, check_same_thread: bool = True):
     db_type = str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower()
     if db_type == "mysql":
         if not pymysql:
@@ -64,11 +87,284 @@ def connect(settings):
         path = getattr(settings, "DATA_NAME", "")
         if not path:
             raise ValueError("For sqlite, set DATA_NAME to the database file path")
-        return _sqlite_connect(path)
+        return _sqlite_connect(path, check_same_thread=check_same_thread)
     else:
         raise ValueError("Unsupported DATA_DB_TYPE. Use mysql, postgres, or sqlite.")
 
 
+def _db_type(settings) -> str:
+    db_type = str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower()
+    return "postgres" if db_type == "postgresql" else db_type
+
+
+def connection_profile(settings) -> Dict[str, str]:
+    """Normalized connection parameters; equal profiles reach the same database."""
+    db_type = _db_type(settings)
+    profile = {"db_type": db_type}
+    dsn = str(getattr(settings, "DATA_DSN", "") or "").strip()
+    if db_type == "postgres" and dsn:
+        profile["dsn"] = dsn
+    elif db_type == "sqlite":
+        profile["name"] = os.path.abspath(str(getattr(settings, "DATA_NAME", "") or ""))
+    else:
+        default_port = 3306 if db_type == "mysql" else 5432
+        host = str(getattr(settings, "DATA_HOST", "") or "localhost").strip().lower()
+        profile.update({
+            "host": host,
+            "port": str(int(getattr(settings, "DATA_PORT", default_port) or default_port)),
+            "name": str(getattr(settings, "DATA_NAME", "") or ""),
+            "user": str(getattr(settings, "DATA_USER", "") or ""),
+            "password": str(getattr(settings, "DATA_PASSWORD", "") or ""),
+        })
+        if db_type == "postgres":
+            sslmode = str(getattr(settings, "DATA_SSLMODE", "") or "").strip() or ("require" if "supabase" in host else "")
+            profile["sslmode"] = sslmode
+    return profile
+
+
+def profile_key(settings) -> str:
+    """Stable hash of the connection profile (credentials never leave the hash)."""
+    raw = json.dumps(connection_profile(settings), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of connections for one connection profile.
+
+    Keeps at least ``min_size`` idle connections warm, never opens more than
+    ``max_size``, closes extra idle connections after ``idle_timeout`` seconds
+    and pings connections that sat idle for ``health_check_after`` seconds
+    before handing them out.
+    """
+
+    def __init__(self, settings, key: str, min_size: int = 1, max_size: int = 5,
+                 idle_timeout: float = 300.0, health_check_after: float = 30.0,
+                 checkout_timeout: float = 30.0):
+        self.settings = settings
+        self.key = key
+        self.db_type = _db_type(settings)
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+        self._idle: "deque[Tuple[Any, float]]" = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.last_used = time.monotonic()
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "closed": 0,
+            "health_check_failures": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def _open(self):
+        conn = connect(self.settings, check_same_thread=False)
+        # Pooled connections run plain SELECTs; autocommit keeps them out of
+        # long-lived transactions (stale MySQL snapshots, idle-in-transaction PG)
+        if self.db_type == "postgres":
+            conn.autocommit = True
+        elif self.db_type == "mysql":
+            conn.autocommit(True)
+        return conn
+
+    def _is_open(self, conn) -> bool:
+        if self.db_type == "postgres":
+            return conn.closed == 0
+        if self.db_type == "mysql":
+            return bool(conn.open)
+        return True
+
+    def _is_healthy(self, conn) -> bool:
+        if not self._is_open(conn):
+            return False
+        try:
+            if self.db_type == "mysql":
+                conn.ping(reconnect=False)
+            else:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT 1")
+                    cur.fetchall()
+                finally:
+                    cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    def _reap_idle(self, now: float) -> List[Any]:
+        """Pop idle connections past the timeout, keeping min_size warm."""
+        stale = []
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            stale.append(self._idle.popleft()[0])
+            self._size -= 1
+        return stale
+
+    def acquire(self):
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            self._stats["checkouts"] += 1
+            while True:
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, idle_since = None, None
+                    break
+                remaining = self.checkout_timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for a database connection (pool {self.key}, max {self.max_size})")
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                wait = time.monotonic() - started
+                self._stats["waits"] += 1
+                self._stats["wait_seconds"] += wait
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+
+        if conn is not None:
+            # Health check on checkout: cheap liveness flag always, a round-trip
+            # only for connections that sat idle long enough to have been dropped
+            stale = time.monotonic() - idle_since > self.health_check_after
+            if (stale and self._is_healthy(conn)) or (not stale and self._is_open(conn)):
+                return conn
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            self._close(conn)
+        try:
+            conn = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        now = time.monotonic()
+        broken = not self._is_open(conn)
+        with self._cond:
+            self.last_used = now
+            # Connections handed back after close_all() are closed, not kept
+            discard = discard or self._closed
+            if discard or broken:
+                self._size -= 1
+            else:
+                self._idle.append((conn, now))
+            stale = self._reap_idle(now)
+            if broken:
+                # A dropped connection usually means the server restarted or a
+                # proxy cut idle sessions; the other idle ones are suspect too
+                stale.extend(c for c, _ in self._idle)
+                self._size -= len(self._idle)
+                self._idle.clear()
+            self._cond.notify_all()
+        if discard or broken:
+            self._close(conn)
+        for c in stale:
+            self._close(c)
+
+    def close_all(self) -> None:
+        """Close idle connections now and in-use ones when they are released."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for c in idle:
+            self._close(c)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._stats)
+            out.update({
+                "db_type": self.db_type,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+            return out
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings) -> ConnectionPool:
+    """Process-wide pool for the settings' connection profile."""
+    key = profile_key(settings)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Drop pools for profiles nobody has used in a while (e.g. /db/test probes)
+            now = time.monotonic()
+            for k, p in list(_pools.items()):
+                if now - p.last_used > p.idle_timeout and p.stats()["in_use"] == 0:
+                    p.close_all()
+                    del _pools[k]
+            pool = ConnectionPool(
+                settings,
+                key,
+                min_size=_app_settings.DB_POOL_MIN_SIZE,
+                max_size=_app_settings.DB_POOL_MAX_SIZE,
+                idle_timeout=_app_settings.DB_POOL_IDLE_TIMEOUT,
+                health_check_after=_app_settings.DB_POOL_HEALTH_CHECK_AFTER,
+                checkout_timeout=_app_settings.DB_POOL_CHECKOUT_TIMEOUT,
+            )
+            _pools[key] = pool
+        return pool
+
+
+@contextmanager
+def pooled_connection(settings) -> Iterator[Any]:
+    """Borrow a connection from the profile's pool for the duration of a block."""
+    with timing.measure("db"):
+        pool = get_pool(settings)
+        conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            # A failed statement may have broken the connection; release() checks
+            pool.release(conn)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-pool statistics keyed by connection profile hash."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key: pool.stats() for key, pool in pools}
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
 def is_safe_select(query: str) -> bool:
     if not SELECT_START.search(query or ""):
         return False
@@ -83,42 +379,152 @@ def ensure_limit(query: str, default_limit: int = 500) -> str:
     return query
 
 
+def _is_connection_error(exc: Exception) -> bool:
+    """True when the connection broke, not for statement timeouts, cancellations or lock waits."""
+    if psycopg2 and isinstance(exc, psycopg2.InterfaceError):
+        return True  # connection already closed
+    if psycopg2 and isinstance(exc, psycopg2.OperationalError):
+        code = exc.pgcode
+        if code is None:
+            # No SQLSTATE: the server went away or could not be reached. A
+            # subclass (e.g. QueryCanceled) always names a server-side condition
+            return type(exc) is psycopg2.OperationalError
+        return code.startswith("08") or code in _CONNECTION_PGCODES
+    if pymysql and isinstance(exc, pymysql.err.InterfaceError):
+        return True
+    if pymysql and isinstance(exc, pymysql.err.OperationalError):
+        return bool(exc.args) and exc.args[0] in _CONNECTION_MYSQL_ERRNOS
+    return False
+
+
 def execute_select(settings, query: str, limit: int = 500) -> List[Dict[str, Any]]:
     if not is_safe_select(query):
         raise ValueError("Only SELECT queries are allowed")
     query = ensure_limit(query, limit)
+    try:
+        return _execute_select(settings, query)
+    except Exception as e:
+        if not _is_connection_error(e):
+            raise
+        # Reads are safe to repeat; the broken connection was dropped from the pool
+        return _execute_select(settings, query)
+
+
+def _execute_select(settings, query: str) -> List[Dict[str, Any]]:
     db_type = str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower()
     if db_type == "mysql":
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             with conn.cursor() as cur:
                 cur.execute(query)
                 rows = cur.fetchall()
                 return list(rows)
-        finally:
-            conn.close()
     elif db_type in ("postgres", "postgresql"):
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             with conn.cursor() as cur:
                 cur.execute(query)
                 rows = cur.fetchall()
                 return [dict(r) for r in rows]
-        finally:
-            conn.close()
     elif db_type == "sqlite":
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             cur = conn.cursor()
             cur.execute(query)
             rows = cur.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            conn.close()
     else:
         raise ValueError("Unsupported DATA_DB_TYPE")
 
 
+class StreamingCursor:
+    """Server-side cursor over a SELECT that is read one page at a time.
+
+    Postgres uses a named (server-side) cursor, MySQL an unbuffered SSDictCursor
+    and SQLite its natively lazy cursor, so only the requested page is held in
+    memory. The cursor owns a dedicated connection until close() is called.
+    """
+
+    def __init__(self, settings, query: str):
+        if not is_safe_select(query):
+            raise ValueError("Only SELECT queries are allowed")
+        self.db_type = str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower()
+        self.exhausted = False
+        self.fetched = 0
+        # Pages may be fetched from different worker threads
+        self.conn = connect(settings, check_same_thread=False)
+        try:
+            if self.db_type == "mysql":
+                self.cur = self.conn.cursor(MySQLSSDictCursor)
+            elif self.db_type in ("postgres", "postgresql"):
+                self.cur = self.conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            elif self.db_type == "sqlite":
+                self.cur = self.conn.cursor()
+            else:
+                raise ValueError("Unsupported DATA_DB_TYPE")
+            self.cur.execute(query.rstrip().rstrip(";"))
+        except Exception:
+            self.conn.close()
+            raise
+
+    def fetch(self, size: int) -> List[Dict[str, Any]]:
+        if self.exhausted:
+            return []
+        rows = [dict(r) for r in self.cur.fetchmany(size)]
+        self.fetched += len(rows)
+        if len(rows) < size:
+            self.exhausted = True
+        return rows
+
+    def close(self) -> None:
+        try:
+            self.cur.close()
+        except Exception:
+            pass
+        try:
+            if self.db_type in ("postgres", "postgresql"):
+                self.conn.rollback()
+        except Exception:
+            pass
+        finally:
+            self.conn.close()
+
+
+def _json_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return type(value).__name__.lower()
+
+
+def rows_to_columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode row dicts as {"columns", "types", "data"} with one list per row.
+
+    Column names are sent once instead of once per row. Types are inferred
+    from the first non-null value in each column ("null" if all are null).
+    """
+    columns: List[str] = list(rows[0].keys()) if rows else []
+    types: List[str] = []
+    for c in columns:
+        typ = "null"
+        for r in rows:
+            v = r.get(c)
+            if v is not None:
+                typ = _json_type(v)
+                break
+        types.append(typ)
+    data = [[r.get(c) for c in columns] for r in rows]
+    return {"columns": columns, "types": types, "data": data}
+
+
+def columnar_to_rows(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode a columnar payload back into a list of row dicts."""
+    columns = payload.get("columns") or []
+    return [dict(zip(columns, values)) for values in payload.get("data") or []]
+
+
 def _split_schema_table(table: str) -> (str, str):
     if "." in table:
         parts = table.split(".", 1)
@@ -126,13 +532,197 @@ def _split_schema_table(table: str) -> (str, str):
     return "public", table
 
 
+def _default_schema(settings) -> str:
+    db_type = _db_type(settings)
+    if db_type == "mysql":
+        return str(getattr(settings, "DATA_NAME", "") or "")
+    if db_type == "sqlite":
+        return "main"
+    return "public"
+
+
+def load_schema_columns(settings, schema: str) -> Dict[str, List[Dict[str, str]]]:
+    """All tables and their columns for one schema, in a single catalog query."""
+    db_type = _db_type(settings)
+    if db_type == "mysql":
+        sql = (
+            "SELECT TABLE_NAME AS t, COLUMN_NAME AS c, DATA_TYPE AS d FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA=%s ORDER BY TABLE_NAME, ORDINAL_POSITION"
+        )
+        params: Tuple[Any, ...] = (schema,)
+    elif db_type == "postgres":
+        sql = (
+            "SELECT table_name AS t, column_name AS c, data_type AS d FROM information_schema.columns "
+            "WHERE table_schema = %s ORDER BY table_name, ordinal_position"
+        )
+        params = (schema,)
+    elif db_type == "sqlite":
+        sql = (
+            "SELECT m.name AS t, p.name AS c, p.type AS d FROM sqlite_master m "
+            "JOIN pragma_table_info(m.name) p WHERE m.type IN ('table', 'view') ORDER BY m.name, p.cid"
+        )
+        params = ()
+    else:
+        return {}
+    with pooled_connection(settings) as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+    tables: Dict[str, List[Dict[str, str]]] = {}
+    for r in rows:
+        tables.setdefault(r["t"], []).append({"name": r["c"], "type": r["d"]})
+    return tables
+
+
+def _fingerprint(tables: Dict[str, List[Dict[str, str]]]) -> str:
+    raw = json.dumps(sorted((t, c["name"], c["type"]) for t, cols in tables.items() for c in cols))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class SchemaCatalog:
+    """TTL cache of table/column metadata, loaded one whole schema at a time.
+
+    Entries are keyed by connection profile and schema. Each carries a
+    fingerprint of the column layout that other caches can fold into their
+    keys, so a schema change (or an explicit invalidate()) retires them too.
+    A table still missing after a reload is remembered for the entry's TTL.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # One load at a time per profile+schema; other profiles load in parallel
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+
+    def get_schema(self, settings, schema: Optional[str] = None, refresh: bool = False) -> Dict[str, Any]:
+        schema = schema or _default_schema(settings)
+        key = (profile_key(settings), schema)
+        if not refresh:
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded it while we waited
+            entry = None if refresh else self._fresh(key)
+            if entry is not None:
+                return entry
+            tables = load_schema_columns(settings, schema)
+            entry = {
+                "schema": schema,
+                "tables": tables,
+                "fingerprint": _fingerprint(tables),
+                "loaded_at": time.time(),
+                "_loaded": time.monotonic(),
+                # Lower-cased names of tables looked up and not found in this load
+                "_missing": set(),
+            }
+            with self._lock:
+                self._entries[key] = entry
+                self.loads += 1
+                self._prune()
+            return entry
+
+    def _prune(self) -> None:
+        """Drop expired schemas and idle load locks without a schema; self._lock must be held."""
+        now = time.monotonic()
+        for k in [k for k, e in self._entries.items() if now - e["_loaded"] > self.ttl]:
+            del self._entries[k]
+        for k in [k for k, lock in self._load_locks.items() if k not in self._entries and not lock.locked()]:
+            del self._load_locks[k]
+
+    def _fresh(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry["_loaded"] <= self.ttl:
+                self.hits += 1
+                return entry
+            return None
+
+    def describe(self, settings, table_name: str, refresh: bool = False) -> Dict[str, Any]:
+        schema, table = _split_schema_table(table_name) if "." in table_name else (None, table_name)
+        started = time.monotonic()
+        entry = self.get_schema(settings, schema, refresh=refresh)
+        cached = entry["_loaded"] < started
+        columns = self._lookup(entry, table)
+        if columns is None and cached and table.lower() not in entry["_missing"]:
+            # Table may have been created since the schema was loaded
+            entry = self.get_schema(settings, schema, refresh=True)
+            cached = False
+            columns = self._lookup(entry, table)
+        if columns is None:
+            with self._lock:
+                entry["_missing"].add(table.lower())
+        return {
+            "table": table,
+            "schema": entry["schema"],
+            "columns": columns or [],
+            "found": columns is not None,
+            "fingerprint": entry["fingerprint"],
+            "cached": cached,
+        }
+
+    @staticmethod
+    def _lookup(entry: Dict[str, Any], table: str) -> Optional[List[Dict[str, str]]]:
+        tables = entry["tables"]
+        if table in tables:
+            return tables[table]
+        lowered = table.lower()
+        for name, cols in tables.items():
+            if name.lower() == lowered:
+                return cols
+        return None
+
+    def fingerprint(self, settings, schema: Optional[str] = None) -> str:
+        return self.get_schema(settings, schema)["fingerprint"]
+
+    def invalidate(self, settings=None, schema: Optional[str] = None) -> int:
+        """Drop cached schemas (all, one profile, or one profile+schema)."""
+        key = profile_key(settings) if settings is not None else None
+        with self._lock:
+            doomed = [
+                k for k in self._entries
+                if (key is None or k[0] == key) and (schema is None or k[1] == schema)
+            ]
+            for k in doomed:
+                del self._entries[k]
+            self._prune()
+            return len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "load_locks": len(self._load_locks),
+                    "hits": self.hits, "loads": self.loads}
+
+
+schema_catalog = SchemaCatalog(_app_settings.DB_SCHEMA_CACHE_TTL)
+
+
+def is_schema_error(error: Any) -> bool:
+    """True for undefined-table/undefined-column errors (exceptions or MCP error strings)."""
+    if getattr(error, "pgcode", None) in _SCHEMA_PGCODES:
+        return True
+    return bool(SCHEMA_ERROR.search(str(error)))
+
+
+def describe_table(settings, table_name: str, refresh: bool = False) -> Dict[str, Any]:
+    """Columns for a table from the schema catalog cache."""
+    return schema_catalog.describe(settings, table_name, refresh=refresh)
+
+
 def get_table_columns(settings, table_name: str) -> List[Dict[str, str]]:
     db_type = str(getattr(settings, "DATA_DB_TYPE", "")).strip().lower()
     if not table_name:
         return []
     if db_type == "mysql":
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     "SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA=%s AND TABLE_NAME=%s ORDER BY ORDINAL_POSITION",
@@ -140,12 +730,9 @@ def get_table_columns(settings, table_name: str) -> List[Dict[str, str]]:
                 )
                 rows = cur.fetchall()
                 return [{"name": r["COLUMN_NAME"], "type": r["DATA_TYPE"]} for r in rows]
-        finally:
-            conn.close()
     elif db_type in ("postgres", "postgresql"):
         schema, table = _split_schema_table(table_name)
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     "SELECT column_name, data_type FROM information_schema.columns WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position",
@@ -153,11 +740,8 @@ def get_table_columns(settings, table_name: str) -> List[Dict[str, str]]:
                 )
                 rows = cur.fetchall()
                 return [{"name": r["column_name"], "type": r["data_type"]} for r in rows]
-        finally:
-            conn.close()
     elif db_type == "sqlite":
-        conn = connect(settings)
-        try:
+        with pooled_connection(settings) as conn:
             cur = conn.cursor()
             cur.execute(f"PRAGMA table_info({table_name})")
             rows = cur.fetchall()
@@ -169,6 +753,4 @@ def get_table_columns(settings, table_name: str) -> List[Dict[str, str]]:
                 typ = r["type"] if isinstance(r, sqlite3.Row) else r[2]
                 out.append({"name": name, "type": typ})
             return out
-        finally:
-            conn.close()
     return []
@@ -1,7 +1,9 @@
 import os
 import math
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from uuid import uuid4
+from typing import Iterable, List, Dict, Any, Optional
 from fpdf import FPDF
 
 
@@ -22,10 +24,16 @@ class ReportPDF(FPDF):
         self.cell(0, 10, f"Page {self.page_no()}/{{nb}}", align="C")
 
 
-def create_pdf_summary(question: str, rows: List[Dict[str, Any]], file_path: Optional[str] = None, chart_path: Optional[str] = None) -> str:
+def create_pdf_summary(question: str, rows: Iterable[Dict[str, Any]], file_path: Optional[str] = None,
+                       chart_path: Optional[str] = None, row_count: Optional[int] = None) -> str:
+    """Render the report PDF. Only the first 50 rows are read, so rows may be a
+    lazy iterator; pass row_count when rows has no len()."""
+    sample = list(islice(rows, 50))
+    if row_count is None:
+        row_count = len(rows) if hasattr(rows, "__len__") else len(sample)
     os.makedirs("artifacts", exist_ok=True)
     ts = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    out_path = file_path or os.path.join("artifacts", f"report-{ts}.pdf")
+    out_path = file_path or os.path.join("artifacts", f"report-{ts}-{uuid4().hex[:6]}.pdf")
 
     pdf = ReportPDF()
     pdf.alias_nb_pages()
@@ -39,7 +47,7 @@ def create_pdf_summary(question: str, rows: List[Dict[str, Any]], file_path: Opt
     pdf.multi_cell(epw, 7, f"Question: {question}")
     pdf.ln(2)
     pdf.set_font("Helvetica", size=11)
-    pdf.cell(0, 8, f"Rows: {len(rows)}", ln=1)
+    pdf.cell(0, 8, f"Rows: {row_count}", ln=1)
 
     # Optional chart image
     if chart_path and os.path.exists(chart_path):
@@ -54,15 +62,14 @@ def create_pdf_summary(question: str, rows: List[Dict[str, Any]], file_path: Opt
         pdf.ln(2)
 
     # Table rendering
-    if rows:
+    if sample:
         # Columns from first row (preserve order)
-        first = rows[0]
+        first = sample[0]
         cols = list(first.keys())
 
         # Estimate column widths from header + sample of rows
         padding = 6
         max_widths = []
-        sample = rows[:50]
         for c in cols:
             texts = [str(c)] + [str(r.get(c, "")) for r in sample]
             w = max(pdf.get_string_width(t) for t in texts) + padding
@@ -93,7 +100,7 @@ def create_pdf_summary(question: str, rows: List[Dict[str, Any]], file_path: Opt
                 text = str(r.get(c, ""))
                 # Truncate text to fit cell width
                 if pdf.get_string_width(text) > (w - 2):
-                    ellipsis = "…"
+                    ellipsis = "..."  # core fonts are latin-1 only
                     while text and pdf.get_string_width(text + ellipsis) > (w - 2):
                         text = text[:-1]
                     text = text + ellipsis if text else ""
@@ -0,0 +1,188 @@
+"""
+Standalone run worker for the Postgres work queue (run_jobs table).
+
+API nodes with RUN_QUEUE_BACKEND=postgres only enqueue runs; any number of
+these workers, on any node, claim and execute them:
+
+    python worker.py --concurrency 4
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.config import settings
+from main import get_app, resume_run, run_once
+from utils import db_utils
+
+
+# Failures another attempt can fix: lost connections, timeouts, overloaded services.
+# Anything else (no rows, a rejected query, a supervisor check) would fail the same way again
+_TRANSIENT_ERRORS = (
+    "timeout", "timed out", "connection", "could not connect", "server closed", "reset by peer",
+    "broken pipe", "temporarily", "unavailable", "too many", "rate limit", "429", "502", "503", "504",
+)
+
+
+def run_error(out: Dict[str, Any]) -> Optional[str]:
+    """Why a run that returned normally failed (failed node or supervisor check), or None."""
+    if out.get("status") != "error" and out.get("supervisor_ok") is not False:
+        return None
+    res = out.get("last_result") or {}
+    log = res.get("log") or {}
+    detail = log.get("error") or log.get("failed") or res.get("status") or "supervisor check failed"
+    branches = (res.get("data") or {}).get("branches")
+    if log.get("failed") and branches:
+        # A failed join: report why each branch failed
+        detail = "; ".join(
+            f"{name}: {((branches.get(name) or {}).get('log') or {}).get('error') or 'failed'}"
+            for name in log["failed"]
+        )
+    return f"node {out.get('last_node') or 'unknown'} failed: {detail}"
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed attempt is worth retrying."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    text = str(error).lower()
+    return any(pattern in text for pattern in _TRANSIENT_ERRORS)
+
+
+class QueueWorker:
+    """Claims jobs with FOR UPDATE SKIP LOCKED and runs them on a few threads.
+
+    A heartbeat thread extends the leases of running jobs; a job whose worker
+    dies is picked up again by another worker once its lease expires, until
+    it runs out of attempts.
+    """
+
+    def __init__(self, concurrency: int = 1, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.lease_seconds = settings.RUN_JOB_LEASE_SECONDS
+        self.heartbeat_interval = settings.RUN_JOB_HEARTBEAT_INTERVAL
+        self.poll_interval = settings.RUN_JOB_POLL_INTERVAL
+        self.retry_delay = settings.RUN_JOB_RETRY_DELAY
+        _, self.db, _ = get_app()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._active: Dict[int, str] = {}
+        self._active_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._loop, name=f"run-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        threading.Thread(target=self._heartbeat, name="run-worker-heartbeat", daemon=True).start()
+        print(f"[Worker] {self.worker_id} started with {self.concurrency} thread(s)")
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; running jobs are allowed to finish."""
+        self._stop.set()
+        # Idle data-source connections go now; running jobs' connections close when released
+        db_utils.close_pools()
+
+    def join(self) -> None:
+        for t in self._threads:
+            while t.is_alive():
+                t.join(0.5)
+        # Pools the finishing jobs opened after stop()
+        db_utils.close_pools()
+        self._done.set()
+        print(f"[Worker] {self.worker_id} stopped")
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.db.claim_job(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"[Worker] Claim failed: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id, run_id, attempt = job["id"], job["run_id"], job["attempts"]
+        with self._active_lock:
+            self._active[job_id] = run_id
+        print(f"[Worker] Running {run_id} (attempt {attempt}/{job['max_attempts']})")
+        try:
+            out = self._run(job)
+            # A failed node ends the run normally with status "error"; retry it like an exception
+            error = run_error(out)
+            if error:
+                raise RuntimeError(error)
+        except Exception as e:
+            # Exponential backoff between attempts; deterministic failures are not retried
+            delay = self.retry_delay * (2 ** (attempt - 1))
+            status = self.db.fail_job(job_id, self.worker_id, str(e), delay, retry=is_transient(e))
+            print(f"[Worker] Run {run_id} failed on attempt {attempt}: {e} -> {status}")
+            if status == "failed":
+                self.db.finish_run(run_id, "error", {"error": str(e), "attempts": attempt})
+        else:
+            self.db.complete_job(job_id, self.worker_id)
+        finally:
+            with self._active_lock:
+                self._active.pop(job_id, None)
+
+    def _run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if job["attempts"] > 1:
+            # Retries continue from the previous attempt's checkpoints when there are any;
+            # the lease guarantees no other worker is running this run_id
+            try:
+                return resume_run(job["run_id"], check_status=False, secrets=job["overrides"])
+            except (LookupError, ValueError) as e:
+                print(f"[Worker] Not resuming {job['run_id']}: {e}")
+        return run_once(job["question"], overrides=job["overrides"], user_id=job.get("user_id") or "default", run_id=job["run_id"])
+
+    def _heartbeat(self) -> None:
+        # Keeps going after stop() until the running jobs have finished
+        while not self._done.wait(self.heartbeat_interval):
+            try:
+                with self._active_lock:
+                    job_ids = list(self._active)
+                owned = set(self.db.heartbeat_jobs(job_ids, self.worker_id))
+                for job_id in set(job_ids) - owned:
+                    print(f"[Worker] Lost lease on job {job_id}; another worker may re-run it")
+                for run_id in self.db.expire_jobs(self.lease_seconds):
+                    self.db.finish_run(run_id, "error", {"error": "lease expired on final attempt"})
+            except Exception as e:
+                print(f"[Worker] Heartbeat failed: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run worker for the Postgres work queue")
+    parser.add_argument("--concurrency", type=int, default=settings.RUN_WORKERS, help="runs executed in parallel")
+    parser.add_argument("--worker-id", default=None, help="lease owner name (default: host-pid-random)")
+    args = parser.parse_args()
+
+    from mcp_client import initialize_mcp_sync, cleanup_mcp_sync
+    try:
+        initialize_mcp_sync()
+    except Exception as e:
+        print(f"[Worker] Warning: Failed to initialize MCP servers: {e}")
+
+    worker = QueueWorker(concurrency=args.concurrency, worker_id=args.worker_id)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.start()
+    try:
+        worker.join()
+    finally:
+        get_app()[2].close()
+        try:
+            cleanup_mcp_sync()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    main()